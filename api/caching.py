@@ -0,0 +1,163 @@
+# api/caching.py
+import threading
+import time
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+POLL_SECONDS = 0.05
+_MISSING = object()
+
+# 프로세스 메모리 캐시 (LRU) : key -> (만료 시각, 값)
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+# 같은 키를 이 프로세스에서 계산 중인 요청 : key -> Event
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """적중/미스 횟수 (local_hits: 프로세스 메모리, shared_hits: 공유 캐시, coalesced: 다른 요청의 계산 결과를 받음)"""
+    with _stats_lock:
+        data = {name: _stats[name] for name in ('local_hits', 'shared_hits', 'coalesced', 'misses')}
+    with _local_lock:
+        data['local_entries'] = len(_local)
+    return data
+
+
+def _version_key(com_uuid):
+    return f"community:{com_uuid}:version"
+
+
+def _new_version():
+    # 버전 키가 캐시에서 사라졌다 다시 생겨도 예전 버전 번호를 재사용하지 않도록 시각으로 시작
+    return time.time_ns() // 1000
+
+
+def get_version(com_uuid):
+    key = _version_key(com_uuid)
+    cache.add(key, _new_version(), None)
+    return cache.get(key) or 0
+
+
+def bump(com_uuid):
+    """커뮤니티 데이터가 바뀌었을 때: 버전을 올려 이전 버전의 캐시를 한꺼번에 무효화"""
+    key = _version_key(com_uuid)
+    cache.add(key, _new_version(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # add와 incr 사이에 키가 사라진 경우
+        cache.set(key, _new_version(), None)
+
+
+def invalidate(com_uuid):
+    """트랜잭션 커밋 이후 bump (트랜잭션 밖이면 바로)"""
+    transaction.on_commit(lambda: bump(com_uuid))
+
+
+def _local_get(key):
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] < time.monotonic():
+            del _local[key]
+            return _MISSING
+        _local.move_to_end(key)
+        return entry[1]
+
+
+def _local_set(key, value):
+    with _local_lock:
+        _local[key] = (time.monotonic() + settings.COMMUNITY_CACHE_SECONDS, value)
+        _local.move_to_end(key)
+        while len(_local) > settings.COMMUNITY_CACHE_LOCAL_ENTRIES:
+            _local.popitem(last=False)
+
+
+def _wait_shared(key):
+    """다른 프로세스가 계산 중이면 공유 캐시에 결과가 올라올 때까지 잠깐 기다림"""
+    deadline = time.monotonic() + settings.COMMUNITY_CACHE_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if cache.get(f"{key}:lock") is None:
+            break
+    return _MISSING
+
+
+def get_or_compute(name, com_uuid, compute, params=()):
+    """
+    커뮤니티 단위 읽기 캐시: 프로세스 메모리 -> 공유 캐시 -> compute() 순으로 조회합니다.
+    키에 커뮤니티 버전이 들어가므로 bump() 이후에는 새로 계산됩니다.
+    같은 키를 동시에 놓치면 한 요청만 compute()를 실행하고 나머지는 그 결과를 씁니다.
+    compute()가 예외를 던지면 캐시하지 않고 그대로 올립니다.
+    """
+    version = get_version(com_uuid)
+    key = ':'.join(str(part) for part in (name, com_uuid, version, *params))
+
+    # 1. 프로세스 메모리
+    value = _local_get(key)
+    if value is not _MISSING:
+        _count('local_hits')
+        return value
+
+    # 2. 공유 캐시
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('shared_hits')
+        _local_set(key, value)
+        return value
+
+    # 3. 이 프로세스에서 이미 계산 중이면 기다렸다가 결과 사용
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+    if not leader:
+        event.wait(settings.COMMUNITY_CACHE_WAIT_SECONDS)
+        value = _local_get(key)
+        if value is not _MISSING:
+            _count('coalesced')
+            return value
+
+    try:
+        # 4. 다른 프로세스가 계산 중이면 공유 캐시에 올라올 때까지 대기
+        lock_key = f"{key}:lock"
+        locked = cache.add(lock_key, 1, settings.COMMUNITY_CACHE_WAIT_SECONDS)
+        if not locked:
+            value = _wait_shared(key)
+            if value is not _MISSING:
+                _count('coalesced')
+                _local_set(key, value)
+                return value
+
+        # 5. 직접 계산
+        _count('misses')
+        try:
+            value = compute()
+            cache.set(key, value, settings.COMMUNITY_CACHE_SECONDS)
+            _local_set(key, value)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
+    finally:
+        if leader:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            event.set()
@@ -0,0 +1,21 @@
+# api/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    커뮤니티 캐시 버전(api/caching.py)과 랭킹 버전(api/leaderboard.py)은 모든 프로세스가 같은 값을 봐야 합니다.
+    프로세스별 메모리 캐시면 다른 워커의 변경을 알 수 없으므로 DEBUG가 아니면 거부합니다.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f"CACHES['default']가 프로세스 로컬 캐시({backend})입니다.",
+        hint="Redis 같은 공유 캐시를 설정하세요. (config/settings.py의 REDIS_URL)",
+        id='api.E001',
+    )]
@@ -0,0 +1,86 @@
+# api/conditional.py
+import hashlib
+import uuid
+from django.db.models import Max
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from . import caching
+from .models import Chat, Community
+from .services import CommunityService
+
+
+def _query_hash(request):
+    """?offset=, ?fields= 처럼 응답 모양을 바꾸는 파라미터를 ETag에 반영"""
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.GET.items()))
+    return hashlib.sha1(query.encode()).hexdigest()[:12]
+
+
+def _com_uuid(request, kwargs):
+    """URL의 pk 또는 ?com_uuid= (잘못된 값이면 None -> 검증 없이 그대로 처리)"""
+    value = kwargs.get('pk') or request.GET.get('com_uuid')
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def cached_community(com_uuid):
+    """커뮤니티 캐시에서 커뮤니티 조회 (없으면 Http404, 수정/삭제되면 버전이 바뀜)"""
+    return caching.get_or_compute('community', com_uuid, lambda: get_object_or_404(Community, pk=com_uuid))
+
+
+def shame_target_date(com_uuid):
+    """수치의 전당 기준 날짜: 버전이 그대로여도 마감 시각이 지나면 응답이 바뀜"""
+    return CommunityService.get_shame_target_date(cached_community(com_uuid))
+
+
+def community_etag(name, extra=None):
+    """
+    커뮤니티 캐시 버전(api/caching.py)으로 만든 ETag
+    가입/인증/수정/마감 때마다 버전이 오르므로 DB를 조회하지 않고 변경 여부를 알 수 있습니다.
+    extra(com_uuid): 버전 외에 응답을 바꾸는 값 (예: 시각에 따라 바뀌는 기준 날짜)
+    """
+    def etag(request, *args, **kwargs):
+        com_uuid = _com_uuid(request, kwargs)
+        if com_uuid is None:
+            return None
+        parts = [name, com_uuid, caching.get_version(com_uuid)]
+        if extra is not None:
+            try:
+                parts.append(extra(com_uuid))
+            except Http404:
+                return None
+        return '-'.join(str(part) for part in (*parts, _query_hash(request)))
+    return etag
+
+
+def _latest_chat(request):
+    """커뮤니티의 마지막 채팅 시각 (ETag/Last-Modified 계산에 한 번만 조회)"""
+    if not hasattr(request, '_latest_chat'):
+        com_uuid = _com_uuid(request, {})
+        request._latest_chat = com_uuid and Chat.objects.filter(com_uuid=com_uuid)\
+            .aggregate(latest=Max('created_at'))['latest']
+    return request._latest_chat
+
+
+def chat_etag(request, *args, **kwargs):
+    """마지막 채팅 시각 + 커뮤니티 버전 (보낸 사람 닉네임이 바뀌어도 갱신)"""
+    latest = _latest_chat(request)
+    if latest is None:
+        return None
+    com_uuid = _com_uuid(request, {})
+    return f"chat-{com_uuid}-{latest.timestamp()}-{caching.get_version(com_uuid)}-{_query_hash(request)}"
+
+
+def chat_last_modified(request, *args, **kwargs):
+    return _latest_chat(request)
+
+
+# ViewSet 메서드용 데코레이터 (바뀐 게 없으면 직렬화 없이 304 Not Modified)
+def community_condition(name, extra=None):
+    return method_decorator(condition(etag_func=community_etag(name, extra)))
+
+
+chat_condition = method_decorator(condition(etag_func=chat_etag, last_modified_func=chat_last_modified))
@@ -69,4 +69,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
         member = Member.objects.filter(user_id=user, com_uuid=community).first()
         nickname = member.nick_name if member else user.user_name
         
-        return {'nickname': nickname}
\ No newline at end of file
+        return {'nickname': nickname}
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """로그인한 유저 개인 알림 (인증 마감 리마인더 등)"""
+
+    async def connect(self):
+        user = self.scope['user']
+        if user.is_anonymous:
+            await self.close()
+            return
+        self.group_name = f'notify_{user.user_id}'
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    # 스케줄러가 보낸 인증 마감 리마인더
+    async def cert_reminder(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'cert_reminder',
+            'com_uuid': event['com_uuid'],
+            'com_name': event['com_name'],
+            'deadline': event['deadline'],
+        }))
@@ -0,0 +1,175 @@
+# api/deadlines.py
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import Community, Member, Post, PenaltyRun
+from . import caching, weekdays
+
+# 지난 틱 이후 놓친 마감 버킷을 최대 몇 분까지 따라잡을지 (그 이전은 주기적 전체 점검/자정 작업이 처리)
+MAX_CATCHUP_MINUTES = 60
+# 커뮤니티 추가/삭제/마감 시간 변경 때 오르는 버전 (모든 스케줄러 프로세스가 공유)
+WHEEL_VERSION_KEY = 'deadline_wheel:version'
+
+
+def minute_of(value):
+    """time/datetime의 하루 중 분 (0~1439)"""
+    return value.hour * 60 + value.minute
+
+
+class DeadlineWheel:
+    """
+    (요일, 마감 분) 버킷별 커뮤니티 목록.
+    매 분 틱마다 지금 마감되는 버킷만 꺼내 쓰므로 전체 커뮤니티를 훑지 않습니다.
+    커뮤니티가 추가/수정/삭제되면(공유 캐시의 휠 버전이 오르면) 다시 만듭니다.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.version = None
+        self.last_tick = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        # 버전을 먼저 읽어야 다시 만드는 도중의 변경도 다음 틱에 반영됩니다.
+        version = wheel_version()
+        if version == self.version:
+            return False
+
+        buckets = defaultdict(list)
+        for com_uuid, mask, cert_time in Community.objects.values_list('com_uuid', 'cert_mask', 'cert_time'):
+            for weekday in range(len(weekdays.WEEKDAYS)):
+                if weekdays.is_cert_day(mask, weekday):
+                    buckets[(weekday, minute_of(cert_time))].append(com_uuid)
+        with self.lock:
+            self.buckets = dict(buckets)
+            self.version = version
+        return True
+
+    def due(self, moment):
+        """moment(datetime)가 속한 분에 마감되는 커뮤니티 uuid 목록"""
+        with self.lock:
+            return list(self.buckets.get((moment.weekday(), minute_of(moment)), []))
+
+
+def wheel_version():
+    # 키가 캐시에서 밀려났다 다시 생겨도 예전 버전 번호를 재사용하지 않도록 시각으로 시작
+    cache.add(WHEEL_VERSION_KEY, time.time_ns() // 1000, None)
+    return cache.get(WHEEL_VERSION_KEY)
+
+
+def _bump_wheel():
+    cache.add(WHEEL_VERSION_KEY, time.time_ns() // 1000, None)
+    try:
+        cache.incr(WHEEL_VERSION_KEY)
+    except ValueError:
+        cache.set(WHEEL_VERSION_KEY, time.time_ns() // 1000, None)
+
+
+def invalidate_wheel():
+    """커뮤니티 추가/삭제, 마감 시간/요일 변경 시: 커밋 후 모든 스케줄러의 휠을 다시 만들도록 표시"""
+    transaction.on_commit(_bump_wheel)
+
+
+_wheel = DeadlineWheel()
+
+
+def get_wheel():
+    return _wheel
+
+
+def notify(user_id, message):
+    """유저 개인 알림 그룹(ws/notifications/)으로 전송"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(f'notify_{user_id}', message)
+
+
+def send_reminders(com_uuids, deadline):
+    """마감이 다가온 커뮤니티에서 오늘 아직 인증하지 않은 멤버들에게 리마인더 전송"""
+    certified = Post.objects.filter(
+        user_id=OuterRef('user_id'), com_uuid=OuterRef('com_uuid'), cert_date=deadline.date()
+    )
+    rows = Member.objects.filter(com_uuid__in=com_uuids).filter(~Exists(certified))\
+        .values_list('user_id', 'com_uuid', 'com_uuid__com_name')
+
+    sent = 0
+    for user_id, com_uuid, com_name in rows:
+        try:
+            notify(user_id, {
+                'type': 'cert_reminder',
+                'com_uuid': str(com_uuid),
+                'com_name': com_name,
+                'deadline': deadline.isoformat(),
+            })
+            sent += 1
+        except Exception as e:
+            print(f"--- [리마인더 에러] {user_id}: {e} ---")
+    if sent:
+        print(f"--- [스케줄러] 커뮤니티 {len(com_uuids)}개, 미인증 멤버 {sent}명에게 리마인더 전송 ---")
+    return sent
+
+
+def on_deadline(com_uuids, target_date):
+    """마감된 커뮤니티들의 수치의 전당 스냅샷 고정 + 미인증자 페널티"""
+    from .operator import penalize_communities
+    from .services import CommunityService
+
+    for community in Community.objects.filter(pk__in=com_uuids):
+        CommunityService.build_shame_snapshot(community, target_date)
+        # 마감으로 수치의 전당 기준일이 바뀌므로 커뮤니티 캐시 무효화
+        caching.bump(community.pk)
+
+    # 페널티는 날짜별 실행 기록(PenaltyRun)에 커뮤니티 단위 체크포인트로 남기므로
+    # 자정 작업(auto_penalty)은 여기서 끝난 커뮤니티를 다시 차감하지 않습니다.
+    run, _ = PenaltyRun.objects.get_or_create(target_date=target_date)
+    if run.status == PenaltyRun.STATUS_DONE:
+        return 0
+    finished = set(run.shards.filter(com_uuid__in=com_uuids).values_list('com_uuid', flat=True))
+    pending = [com_uuid for com_uuid in com_uuids if com_uuid not in finished]
+    if not pending:
+        return 0
+    done = penalize_communities(run.pk, target_date, pending)
+    print(f"--- [스케줄러] {target_date} 마감 커뮤니티 {done}개 페널티 부여 ---")
+    return done
+
+
+def deadline_tick(now=None):
+    """
+    매 분 실행:
+    1) REMINDER 분 뒤에 마감되는 버킷에 리마인더
+    2) 지난 틱 이후 마감된 버킷에 스냅샷/페널티
+    """
+    wheel = get_wheel()
+    now = (now or timezone.now()).replace(second=0, microsecond=0)
+    wheel.refresh()
+
+    # 1. 리마인더
+    lead = timedelta(minutes=getattr(settings, 'DEADLINE_REMINDER_MINUTES', 30))
+    reminder_at = now + lead
+    due = wheel.due(reminder_at)
+    if due:
+        send_reminders(due, reminder_at)
+
+    # 2. 마감: [last_tick, now) 사이의 분 버킷 (이번 분의 마감은 아직 지나지 않았을 수 있음)
+    start = now - timedelta(minutes=1)
+    if wheel.last_tick is not None:
+        start = max(wheel.last_tick, now - timedelta(minutes=MAX_CATCHUP_MINUTES))
+    moment = start
+    while moment < now:
+        due = wheel.due(moment)
+        if due:
+            try:
+                on_deadline(due, moment.date())
+            except Exception as e:
+                print(f"--- [스케줄러 에러] {moment} 마감 처리 실패: {e} ---")
+        moment += timedelta(minutes=1)
+    wheel.last_tick = now
@@ -0,0 +1,119 @@
+# api/fieldsets.py
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def requested(request, param):
+    """?fields=a,b -> {'a', 'b'} (파라미터가 없거나 조회 요청이 아니면 None)"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def is_sparse(request):
+    """?fields= 또는 ?expand= 가 있는 조회 요청인지 (기본 응답 캐시를 쓰면 안 됨)"""
+    return requested(request, FIELDS_PARAM) is not None or requested(request, EXPAND_PARAM) is not None
+
+
+class SparseFieldsMixin:
+    """
+    조회 요청의 ?fields=, ?expand= 를 serializer 출력에 반영합니다.
+    - fields: 나열한 필드만 남깁니다. (모르는 이름은 무시)
+    - expand: Meta.expandable_fields에 등록된 FK를 id 대신 중첩 객체로 내려줍니다.
+    SerializerMethodField처럼 모델 컬럼을 직접 가리키지 않는 필드는
+    Meta.field_sources에 필요한 컬럼을 적어두어야 쿼리셋 축소(project)에 반영됩니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = (kwargs.get('context') or {}).get('request')
+
+        # 1. FK를 중첩 객체로 교체
+        expand = requested(request, EXPAND_PARAM) or set()
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand & set(expandable):
+            source = self.fields[name].source if name in self.fields else name
+            options = {'source': source} if source != name else {}
+            self.fields[name] = expandable[name](read_only=True, **options)
+
+        # 2. 요청한 필드만 남기기
+        fields = requested(request, FIELDS_PARAM)
+        if fields is not None:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+
+
+def _columns(serializer, prefix=''):
+    """
+    serializer 출력에 필요한 (only 목록, select_related 목록)
+    모델 컬럼으로 알 수 없는 필드가 있으면 None (이때는 쿼리셋을 줄이지 않음)
+    """
+    meta = serializer.Meta
+    field_sources = getattr(meta, 'field_sources', {})
+    only, related = set(), set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in field_sources:
+            paths = [source.split('.') for source in field_sources[name]]
+        elif field.source == '*':
+            return None
+        else:
+            paths = [field.source_attrs]
+
+        for attrs in paths:
+            try:
+                model_field = meta.model._meta.get_field(attrs[0])
+            except FieldDoesNotExist:
+                return None
+            column = prefix + model_field.name
+            only.add(column)
+
+            if isinstance(field, serializers.ModelSerializer):
+                # 중첩 객체: JOIN으로 가져오고 중첩 serializer의 컬럼만
+                nested = _columns(field, column + '__')
+                if nested is None:
+                    related.add(column)
+                    continue
+                only |= nested[0]
+                related |= {column} | nested[1]
+            elif len(attrs) > 1 and model_field.is_relation:
+                # com_uuid.com_name 같은 FK 너머의 값
+                related.add(column)
+                only.add(f"{column}__{attrs[1]}")
+    return only, related
+
+
+def project(queryset, serializer_class, request, also=()):
+    """
+    ?fields=/?expand= 가 있을 때 serializer가 실제로 쓰는 컬럼만 조회하도록
+    쿼리셋에 .only()/select_related를 적용합니다. (also: 뷰에서 따로 쓰는 컬럼)
+    """
+    if not is_sparse(request):
+        return queryset
+    columns = _columns(serializer_class(context={'request': request}))
+    if columns is None:
+        return queryset
+    only, related = columns
+    # 빠진 FK를 select_related로 따라가면 .only()와 충돌하므로 다시 지정
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only, *also)
+
+
+class SparseFieldsViewMixin:
+    """ViewSet용: get_queryset 결과를 serializer 출력에 맞춰 줄입니다."""
+
+    def get_queryset(self):
+        return self.project(super().get_queryset())
+
+    def project(self, queryset, serializer_class=None, also=()):
+        return project(queryset, serializer_class or self.get_serializer_class(), self.request, also)
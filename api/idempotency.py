@@ -0,0 +1,104 @@
+# api/idempotency.py
+import functools
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+POLL_SECONDS = 0.2
+
+
+def _expired(now):
+    """보관 기간이 지난 키, 또는 처리 중인 채로 너무 오래된(중단된) 키"""
+    return Q(created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_SECONDS)) | Q(
+        status_code__isnull=True,
+        created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    )
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _claim(user, key, path):
+    """
+    키를 선점합니다. (선점한 행, None) 또는 (None, 바로 돌려줄 응답)을 반환합니다.
+    같은 키의 요청이 처리 중이면 끝날 때까지 기다렸다가 그 응답을 돌려줍니다.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        IdempotencyKey.objects.filter(_expired(timezone.now()), user_id=user, key=key).delete()
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user_id=user, key=key, request_path=path), None
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user_id=user, key=key).first()
+        if record is None:
+            # 먼저 들어온 요청이 실패해서 키를 반납함 -> 다시 선점 시도
+            continue
+        if record.request_path != path:
+            return None, Response(
+                {"error": "다른 요청에 사용된 Idempotency-Key입니다."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if record.status_code is not None:
+            return None, _replay(record)
+        if time.monotonic() >= deadline:
+            return None, Response({"error": "같은 요청이 아직 처리 중입니다."}, status=status.HTTP_409_CONFLICT)
+        time.sleep(POLL_SECONDS)
+
+
+def idempotent(view_func):
+    """
+    ViewSet 액션에 Idempotency-Key 헤더 지원을 추가합니다.
+    - 처음 요청: 그대로 처리하고 성공(2xx) 응답을 저장
+    - 같은 키로 다시 온 요청: 업로드/DB 기록 없이 저장된 응답을 반환
+    - 실패한 요청: 키를 반납하므로 같은 키로 다시 시도할 수 있음
+    헤더가 없으면 기존과 똑같이 동작합니다.
+    """
+    @functools.wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_func(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key는 255자 이하여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        record, response = _claim(request.user, key, request.path)
+        if response is not None:
+            return response
+
+        try:
+            response = view_func(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if status.is_success(response.status_code):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code, response_body=response.data
+            )
+        else:
+            record.delete()
+        return response
+
+    return wrapper
+
+
+def purge_idempotency_keys():
+    """보관 기간이 지난 키 정리 (스케줄러에서 주기적으로 실행)"""
+    removed, _ = IdempotencyKey.objects.filter(_expired(timezone.now())).delete()
+    if removed:
+        print(f"--- [스케줄러] 만료된 Idempotency-Key {removed}개 정리 ---")
+    return removed
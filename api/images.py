@@ -0,0 +1,211 @@
+# api/images.py
+import base64
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageFilter, ImageOps
+from .phash import dhash, flag_recycled
+from .storage import settle_blob
+from . import caching
+
+# 원본은 긴 변 기준 MAX_SIZE로 줄이고, 썸네일은 THUMB_SIZE로 만듭니다.
+MAX_SIZE = 1600
+THUMB_SIZE = 320
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+# 미인증 유저에게 보여줄 블러 미리보기 (data URI로 포스트에 함께 저장)
+BLUR_SIZE = 32
+BLUR_RADIUS = 2
+BLUR_QUALITY = 40
+# 블러 미리보기가 아직 없을 때 쓰는 공용 블러 이미지
+BLUR_PLACEHOLDER_URL = "https://storage.googleapis.com/madcamp-w2-storage/blur.jpg"
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+            thread_name_prefix='image-pipeline'
+        )
+    return _executor
+
+
+def variant_name(name, suffix, ext):
+    """posts/abc.jpg -> posts/abc_thumb.webp 처럼 원본 옆에 저장될 경로"""
+    base, _ = os.path.splitext(name)
+    return f"{base}{suffix}.{ext}"
+
+
+def display_name(name, variants):
+    """
+    응답에 내려줄 이미지 경로: 변환이 끝났으면 full 변환본, 변환 전이면 None
+    원본은 GPS 등 EXIF가 남은 업로드 그대로이므로 노출하지 않습니다.
+    (full 없이 변환본만 있으면 예전 방식으로 원본을 제자리에서 변환한 이미지)
+    """
+    if not name or not variants:
+        return None
+    return variants.get('full', name)
+
+
+def _full_ext(name):
+    # PNG는 투명도/선명도를 위해 PNG로, 나머지는 JPEG로 변환
+    return 'png' if os.path.splitext(name)[1].lower() == '.png' else 'jpg'
+
+
+def variant_names(name):
+    """
+    원본 옆에 만들어지는 변환본 경로 목록 (원본 삭제 시 함께 정리)
+    모두 접미사가 붙으므로 원본(.webp 업로드 포함)과 이름이 겹치지 않습니다.
+    """
+    return [
+        variant_name(name, '_full', _full_ext(name)),
+        variant_name(name, '_full', 'webp'),
+        variant_name(name, '_thumb', 'jpg'),
+        variant_name(name, '_thumb', 'webp'),
+    ]
+
+
+def _encode(img, fmt, **options):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **options)
+    return ContentFile(buf.getvalue())
+
+
+def _save(name, content):
+    # 같은 이름이 있으면 덮어쓰기 (로컬 파일 스토리지는 이름을 바꿔 저장하므로 먼저 삭제)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, content)
+
+
+def render_blur_preview(img):
+    """아주 작게 줄인 뒤 흐리게 만든 JPEG를 data URI 문자열로 반환 (1KB 내외)"""
+    tiny = img.copy()
+    tiny.thumbnail((BLUR_SIZE, BLUR_SIZE))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
+    buf = io.BytesIO()
+    tiny.save(buf, format='JPEG', quality=BLUR_QUALITY)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def render_variants(name):
+    """
+    원본 이미지를 축소하고 EXIF를 제거한 사본(full)과 썸네일, WebP 버전을 원본 옆에 생성합니다.
+    원본 파일은 내용 해시 경로(api/storage.py)이므로 절대 다시 쓰지 않습니다.
+    반환값: {'full': 경로, 'webp': 경로, 'thumb': 경로, 'thumb_webp': 경로}
+    """
+    return _render(name)[0]
+
+
+def _render(name, data=None):
+    if data is None:
+        with default_storage.open(name, 'rb') as f:
+            data = f.read()
+    img = Image.open(io.BytesIO(data))
+    img.load()
+
+    # 회전 정보는 픽셀에 반영하고 나머지 EXIF(GPS 등)는 버립니다.
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img.thumbnail((MAX_SIZE, MAX_SIZE))
+
+    full_ext = _full_ext(name)
+    if full_ext == 'png':
+        full = _encode(img, 'PNG', optimize=True)
+    else:
+        full = _encode(img, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+
+    thumb = img.copy()
+    thumb.thumbnail((THUMB_SIZE, THUMB_SIZE))
+
+    variants = {
+        'full': _save(variant_name(name, '_full', full_ext), full),
+        'webp': _save(variant_name(name, '_full', 'webp'), _encode(img, 'WEBP', quality=WEBP_QUALITY)),
+        'thumb': _save(variant_name(name, '_thumb', 'jpg'), _encode(thumb, 'JPEG', quality=JPEG_QUALITY)),
+        'thumb_webp': _save(variant_name(name, '_thumb', 'webp'), _encode(thumb, 'WEBP', quality=WEBP_QUALITY)),
+    }
+    return variants, img
+
+
+def process_post_image(post_id):
+    """인증 사진 변환 후 Post.image_variants, Post.blur_preview, Post.phash에 기록"""
+    from .models import Post
+
+    row = Post.objects.filter(pk=post_id).values_list('image_url', 'com_uuid').first()
+    if not row or not row[0]:
+        return None
+    name, com_uuid = row
+    # 티켓 업로드면 내용 해시 확정 (같은 내용이 이미 있으면 기존 파일로 옮겨짐)
+    name, data = settle_blob(name)
+
+    # 같은 내용의 사진이 이미 변환되어 있다면(중복 저장된 blob) 그대로 재사용
+    done = Post.objects.filter(image_url=name, blur_preview__isnull=False)\
+        .exclude(pk=post_id).values('image_variants', 'blur_preview', 'phash').first()
+    if done:
+        Post.objects.filter(pk=post_id).update(**done)
+        variants = done['image_variants']
+    else:
+        variants, img = _render(name, data)
+        Post.objects.filter(pk=post_id).update(
+            image_variants=variants, blur_preview=render_blur_preview(img), phash=dhash(img)
+        )
+
+    # 같은 유저가 이 커뮤니티에 예전에 올린 사진을 다시 쓴 것인지 확인
+    flag_recycled(post_id)
+    # 피드에 변환본/블러 미리보기가 보이도록 커뮤니티 캐시 무효화
+    caching.bump(com_uuid)
+    return variants
+
+
+def process_member_images(mem_idx):
+    """멤버 프로필/수치의 전당 이미지 변환 후 Member.image_variants에 기록"""
+    from .models import Member
+
+    row = Member.objects.filter(pk=mem_idx).values('profile_img_url', 'shame_img_url', 'image_variants', 'com_uuid').first()
+    if not row:
+        return None
+    com_uuid = row.pop('com_uuid')
+    variants = row.pop('image_variants') or {}
+    for field, name in row.items():
+        if name and field not in variants:
+            name, data = settle_blob(name)
+            variants[field] = _find_member_variants(name) or _render(name, data)[0]
+    Member.objects.filter(pk=mem_idx).update(image_variants=variants)
+    caching.bump(com_uuid)
+    return variants
+
+
+def _find_member_variants(name):
+    """같은 이미지(중복 저장된 blob)를 쓰는 다른 멤버의 변환본이 있으면 반환"""
+    from .models import Member
+
+    for field in ('profile_img_url', 'shame_img_url'):
+        rows = Member.objects.filter(**{field: name}).exclude(image_variants={})\
+            .values_list('image_variants', flat=True)[:5]
+        for variants in rows:
+            if field in variants:
+                return variants[field]
+    return None
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"--- [이미지 처리 에러] {func.__name__}{args}: {e} ---")
+    finally:
+        # 워커 스레드의 DB 커넥션 정리
+        connection.close()
+
+
+def submit(func, *args):
+    """이미지 처리 작업을 워커 풀에 넘깁니다. (트랜잭션 커밋 이후에 호출)"""
+    return get_executor().submit(_run, func, *args)
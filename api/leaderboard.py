@@ -0,0 +1,168 @@
+# api/leaderboard.py
+import bisect
+import threading
+import time
+from django.core.cache import cache
+from .models import Member
+
+# 다른 프로세스가 따라잡을 수 있도록 버전별 변경분(delta)을 공유 캐시에 남겨 두는 시간과 최대 개수
+# 그보다 많이 밀렸거나 변경분이 캐시에서 사라졌으면 DB에서 전체 재구성합니다.
+DELTA_SECONDS = 60 * 60
+MAX_DELTAS = 200
+
+
+def rank_key(cert_cnt, is_late_cnt, joined_at, mem_idx):
+    """
+    정렬 기준: 인증횟수 DESC, 지각횟수 ASC, 먼저 가입한 순, mem_idx 순
+    (동점이어도 항상 같은 순서가 나오도록 마지막에 PK로 구분)
+    """
+    return (-cert_cnt, is_late_cnt, joined_at, str(mem_idx))
+
+
+class Leaderboard:
+    """
+    커뮤니티 하나의 랭킹을 정렬된 리스트로 메모리에 유지합니다.
+    순위 조회/페이지 조회는 이진 탐색(O(log n))으로 처리하고,
+    인증/취소가 일어나면 해당 멤버의 위치만 갱신합니다.
+    """
+
+    def __init__(self, com_uuid):
+        self.com_uuid = str(com_uuid)
+        self.keys = []        # 정렬된 rank_key 목록
+        self.by_member = {}   # mem_idx(str) -> rank_key
+        self.version = None   # 공유 캐시의 버전과 같을 때만 최신 상태
+        self.lock = threading.Lock()
+
+    def rebuild(self, version):
+        """DB에서 랭킹 전체를 다시 읽어옵니다. (재시작 직후, 다른 프로세스에서 변경이 있었을 때)"""
+        rows = Member.objects.filter(com_uuid=self.com_uuid)\
+            .values_list('mem_idx', 'cert_cnt', 'is_late_cnt', 'joined_at')
+        by_member = {str(row[0]): rank_key(row[1], row[2], row[3], row[0]) for row in rows}
+        with self.lock:
+            self.by_member = by_member
+            self.keys = sorted(by_member.values())
+            self.version = version
+
+    def _discard(self, mem_idx):
+        old = self.by_member.pop(mem_idx, None)
+        if old is not None:
+            i = bisect.bisect_left(self.keys, old)
+            if i < len(self.keys) and self.keys[i] == old:
+                self.keys.pop(i)
+
+    def _insert(self, mem_idx, cert_cnt, is_late_cnt, joined_at):
+        self._discard(mem_idx)
+        key = rank_key(cert_cnt, is_late_cnt, joined_at, mem_idx)
+        self.by_member[mem_idx] = key
+        bisect.insort(self.keys, key)
+
+    def apply(self, version, delta):
+        """
+        버전 version-1 상태의 랭킹에 멤버 하나의 변경(delta)을 반영하고 성공 여부를 반환합니다.
+        중간 변경을 놓쳤다면 반영하지 않고 다음 조회 때 전체 재구성되도록 표시합니다.
+        """
+        mem_idx, cert_cnt, is_late_cnt, joined_at, removed = delta
+        with self.lock:
+            if self.version != version - 1:
+                self.version = None
+                return False
+            if removed:
+                self._discard(mem_idx)
+            else:
+                self._insert(mem_idx, cert_cnt, is_late_cnt, joined_at)
+            self.version = version
+            return True
+
+    def catch_up(self, version):
+        """
+        다른 프로세스가 공유 캐시에 남긴 변경분을 순서대로 반영해 version까지 따라잡습니다.
+        하나라도 빠져 있으면 False (호출한 쪽에서 전체 재구성)
+        """
+        current = self.version
+        if current is None or not 0 < version - current <= MAX_DELTAS:
+            return False
+        keys = [_delta_key(self.com_uuid, v) for v in range(current + 1, version + 1)]
+        deltas = cache.get_many(keys)
+        if len(deltas) != len(keys):
+            return False
+        return all(self.apply(v, deltas[key]) for v, key in zip(range(current + 1, version + 1), keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def page(self, offset=0, limit=50):
+        """offset 위치부터 limit개의 (순위, mem_idx) 목록 (top-K는 offset=0)"""
+        with self.lock:
+            keys = self.keys[offset:offset + limit]
+        return [(offset + i + 1, key[3]) for i, key in enumerate(keys)]
+
+    def rank_of(self, mem_idx):
+        """멤버의 순위 (1부터 시작), 없는 멤버면 None"""
+        with self.lock:
+            key = self.by_member.get(str(mem_idx))
+            if key is None:
+                return None
+            return bisect.bisect_left(self.keys, key) + 1
+
+
+_boards = {}
+_boards_lock = threading.Lock()
+
+
+def _version_key(com_uuid):
+    return f"leaderboard:{com_uuid}:version"
+
+
+def _delta_key(com_uuid, version):
+    return f"leaderboard:{com_uuid}:delta:{version}"
+
+
+def _new_version():
+    # 버전 키가 캐시에서 밀려났다 다시 생겨도 예전 버전 번호를 재사용하지 않도록 시각으로 시작
+    return time.time_ns() // 1000
+
+
+def _shared_version(com_uuid):
+    key = _version_key(com_uuid)
+    cache.add(key, _new_version(), None)
+    return cache.get(key, 0)
+
+
+def get_leaderboard(com_uuid):
+    """
+    프로세스 메모리의 랭킹을 반환합니다.
+    다른 프로세스에서 변경이 있었다면(공유 캐시 버전이 다르면) 남겨 둔 변경분을 반영하고,
+    변경분을 놓쳤을 때만 DB에서 다시 만듭니다.
+    """
+    com_uuid = str(com_uuid)
+    with _boards_lock:
+        board = _boards.get(com_uuid)
+        if board is None:
+            board = _boards[com_uuid] = Leaderboard(com_uuid)
+
+    version = _shared_version(com_uuid)
+    if board.version != version and not board.catch_up(version):
+        board.rebuild(version)
+    return board
+
+
+def record_change(member, removed=False):
+    """
+    멤버의 인증/지각 횟수가 바뀌었을 때 호출합니다. (커밋 이후)
+    공유 버전을 올리면서 그 버전의 변경분을 남겨 다른 프로세스도 해당 멤버만 갱신할 수 있게 하고,
+    이 프로세스의 랭킹이 최신이었다면 바로 반영합니다.
+    """
+    com_uuid = str(member.com_uuid_id)
+    key = _version_key(com_uuid)
+    cache.add(key, _new_version(), None)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # 캐시에서 키가 사라진 경우: 다음 조회 때 전체 재구성
+        return
+
+    delta = (str(member.mem_idx), member.cert_cnt, member.is_late_cnt, member.joined_at, removed)
+    cache.set(_delta_key(com_uuid, version), delta, DELTA_SECONDS)
+    board = _boards.get(com_uuid)
+    if board is not None:
+        board.apply(version, delta)
@@ -0,0 +1,77 @@
+# api/management/commands/backfill_phash.py
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+import numpy as np
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connection
+from PIL import Image
+from api.models import Post
+from api.phash import dhash, hamming, get_threshold, HASH_SIZE
+
+
+def _hash_post(row):
+    """스토리지에서 사진을 읽어 해시 계산 (읽기 실패 시 None)"""
+    post_id, name = row
+    try:
+        with default_storage.open(name, 'rb') as f:
+            img = Image.open(f)
+            img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))  # JPEG는 작게 디코딩
+            return post_id, dhash(img)
+    except Exception as e:
+        print(f"--- [해시 계산 실패] {post_id} ({name}): {e} ---")
+        return post_id, None
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "해시가 없는 기존 인증 사진의 dHash를 계산하고 재사용된 사진을 표시합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="한 번에 처리할 포스트 수")
+        parser.add_argument('--workers', type=int, default=4, help="동시에 사진을 읽어올 스레드 수")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # 1. 해시 계산 (pk 순으로 batch 단위)
+        hashed = 0
+        last_pk = None
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                rows = Post.objects.filter(phash__isnull=True).exclude(image_url='').exclude(image_url__isnull=True)
+                if last_pk is not None:
+                    rows = rows.filter(pk__gt=last_pk)
+                rows = list(rows.order_by('pk').values_list('post_id', 'image_url')[:batch_size])
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+
+                posts = [Post(post_id=post_id, phash=value)
+                         for post_id, value in pool.map(_hash_post, rows) if value is not None]
+                Post.objects.bulk_update(posts, ['phash'])
+                hashed += len(posts)
+                self.stdout.write(f"해시 계산: {hashed}개")
+
+        # 2. 유저+커뮤니티 파티션마다 이전 사진들과 한 번에 비교
+        rows = Post.objects.filter(phash__isnull=False, duplicate_of__isnull=True)\
+            .order_by('user_id', 'com_uuid', 'created_at')\
+            .values_list('user_id', 'com_uuid', 'post_id', 'phash')
+        partitions = groupby(rows.iterator(chunk_size=batch_size * 10), key=lambda row: row[:2])
+
+        threshold = get_threshold()
+        flagged = []
+        for _, group in partitions:
+            items = [row[2:] for row in group]
+            if len(items) < 2:
+                continue
+            hashes = np.array([value for _, value in items], dtype=np.int64)
+            for i in range(1, len(items)):
+                distances = hamming(hashes[i], hashes[:i])
+                j = int(np.argmin(distances))
+                if distances[j] <= threshold:
+                    flagged.append(Post(post_id=items[i][0], duplicate_of_id=items[j][0]))
+
+        Post.objects.bulk_update(flagged, ['duplicate_of'], batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"해시 {hashed}개 계산, 재사용 사진 {len(flagged)}개 표시"))
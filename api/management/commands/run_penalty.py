@@ -0,0 +1,42 @@
+# api/management/commands/run_penalty.py
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.models import PenaltyRun
+from api.operator import auto_penalty
+
+
+class Command(BaseCommand):
+    help = "미인증자 페널티 작업을 지정한 날짜로 실행(또는 중단된 실행을 재개)합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help="대상 날짜 (YYYY-MM-DD). 생략하면 어제 날짜로 실행합니다."
+        )
+        parser.add_argument('--workers', type=int, help="동시에 처리할 shard 수")
+        parser.add_argument('--batch-size', type=int, help="shard 하나에 묶을 커뮤니티 수")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                target_date = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("날짜 형식은 YYYY-MM-DD 입니다.")
+        else:
+            target_date = timezone.now().date() - datetime.timedelta(days=1)
+
+        if target_date >= timezone.now().date():
+            raise CommandError("오늘 이후 날짜에는 페널티를 부여할 수 없습니다.")
+
+        run = auto_penalty(
+            target_date=target_date,
+            workers=options['workers'],
+            batch_size=options['batch_size']
+        )
+        if run is None or run.status != PenaltyRun.STATUS_DONE:
+            raise CommandError(f"{target_date} 페널티 작업이 완료되지 않았습니다. 다시 실행하면 이어서 처리합니다.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{target_date}: 커뮤니티 {run.community_cnt}개, 멤버 {run.member_cnt}명, 유저 {run.user_cnt}명"
+        ))
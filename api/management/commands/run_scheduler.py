@@ -0,0 +1,51 @@
+# api/management/commands/run_scheduler.py
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.operator import SchedulerLeaderLock, create_scheduler
+
+
+class Command(BaseCommand):
+    help = "스케줄러 전용 워커를 실행합니다. 여러 노드에서 띄워도 리더 한 곳에서만 작업이 실행됩니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            default=getattr(settings, 'SCHEDULER_HEARTBEAT_SECONDS', 10),
+            help="리더 선출 시도 / 리더 상태 확인 주기 (초)"
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        lock = SchedulerLeaderLock()
+        scheduler = None
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write("--- [스케줄러] 워커 시작, 리더 선출 대기 중 ---")
+        try:
+            while not stopping:
+                if scheduler is None:
+                    # 1. 팔로워: 락을 얻으면 리더가 되어 스케줄러 가동
+                    if lock.acquire():
+                        scheduler = create_scheduler()
+                        scheduler.start()
+                        self.stdout.write(self.style.SUCCESS("--- [스케줄러] 리더로 선출되어 스케줄러 가동 ---"))
+                elif not lock.is_held():
+                    # 2. 리더: DB 세션이 끊겨 락을 잃으면 즉시 작업을 멈추고 다시 팔로워로
+                    scheduler.shutdown(wait=False)
+                    scheduler = None
+                    self.stdout.write(self.style.WARNING("--- [스케줄러] 리더 락을 잃었습니다. 다시 대기합니다 ---"))
+                time.sleep(interval)
+        finally:
+            if scheduler is not None:
+                scheduler.shutdown()
+                lock.release()
+            self.stdout.write("--- [스케줄러] 워커 종료 ---")
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:07
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_alter_member_profile_img_url_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PenaltyRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_date', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=20)),
+                ('community_cnt', models.IntegerField(default=0)),
+                ('member_cnt', models.IntegerField(default=0)),
+                ('user_cnt', models.IntegerField(default=0)),
+                ('elapsed_ms', models.FloatField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-target_date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image_url',
+            field=models.ImageField(blank=True, null=True, upload_to=api.models.rename_image_path),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_penaltyrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PenaltyShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_cnt', models.IntegerField(default=0)),
+                ('elapsed_ms', models.FloatField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('com_uuid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.community')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='api.penaltyrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('run', 'com_uuid'), name='unique_penalty_shard')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_penaltyshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShameSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_date', models.DateField()),
+                ('member_ids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('com_uuid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.community')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('com_uuid', 'target_date'), name='unique_shame_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_cert_entries(apps, schema_editor):
+    """
+    기존 포스트의 인증 점수를 원장에 기록합니다. (이미 User.score에 반영되어 있으므로 is_compacted=True)
+    하루에 가장 먼저 올린 포스트만 점수를 받았으므로 그 포스트에만 기록합니다.
+    """
+    Post = apps.get_model('api', 'Post')
+    ScoreEntry = apps.get_model('api', 'ScoreEntry')
+    weekdays_map = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+    seen = set()
+    entries = []
+    for post in Post.objects.select_related('com_uuid').order_by('created_at').iterator():
+        day_key = (post.user_id_id, post.com_uuid_id, post.created_at.date())
+        if day_key in seen:
+            continue
+        seen.add(day_key)
+
+        cert_days = [day.lower() for day in post.com_uuid.cert_days]
+        if weekdays_map[post.created_at.weekday()] not in cert_days:
+            point = 5
+        else:
+            point = 5 if post.is_late else 10
+        entries.append(ScoreEntry(
+            user_id_id=post.user_id_id,
+            com_uuid_id=post.com_uuid_id,
+            post=post,
+            delta=point,
+            reason='cert',
+            is_compacted=True
+        ))
+    ScoreEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_shamesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.FloatField()),
+                ('reason', models.CharField(choices=[('cert', 'Certification'), ('rollback', 'Rollback'), ('penalty', 'Penalty')], max_length=20)),
+                ('is_compacted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('com_uuid', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.community')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.post')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_compacted', False)), fields=['user_id'], name='scoreentry_pending_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_cert_entries, migrations.RunPython.noop),
+    ]
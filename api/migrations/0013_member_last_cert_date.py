@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:13
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import TruncDate
+
+
+def backfill_last_cert_date(apps, schema_editor):
+    # 기존 멤버는 마지막 인증 포스트 날짜로 채웁니다.
+    Member = apps.get_model('api', 'Member')
+    Post = apps.get_model('api', 'Post')
+    latest = Post.objects.filter(user_id=OuterRef('user_id'), com_uuid=OuterRef('com_uuid'))\
+        .order_by('-created_at')\
+        .annotate(cert_date=TruncDate('created_at'))\
+        .values('cert_date')[:1]
+    Member.objects.update(last_cert_date=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_scoreentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='last_cert_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_last_cert_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_member_last_cert_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='blur_preview',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_storedblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.post'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='phash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('phash__isnull', False)), fields=['user_id', 'com_uuid'], include=('phash', 'post_id'), name='post_phash_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:24
+
+import api.models
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+
+def backfill_cert_date(apps, schema_editor):
+    # 기존 포스트는 작성 시각의 날짜로 채웁니다.
+    Post = apps.get_model('api', 'Post')
+    Post.objects.update(cert_date=TruncDate('created_at'))
+
+
+def merge_duplicate_members(apps, schema_editor):
+    # unique_member 제약을 걸기 전에 같은 커뮤니티에 중복 가입된 행을 하나로 합칩니다.
+    # 가장 먼저 가입한 행을 남기고 카운트는 더합니다. (포스트/채팅은 유저+커뮤니티로 연결되어 옮길 필요 없음)
+    Member = apps.get_model('api', 'Member')
+    StoredBlob = apps.get_model('api', 'StoredBlob')
+
+    duplicated = Member.objects.values('user_id', 'com_uuid').annotate(n=Count('pk')).filter(n__gt=1)
+    for key in list(duplicated):
+        keep, *extras = Member.objects.filter(user_id=key['user_id'], com_uuid=key['com_uuid'])\
+            .order_by('joined_at', 'pk')
+        released = []
+        for extra in extras:
+            keep.cert_cnt += extra.cert_cnt
+            keep.is_late_cnt += extra.is_late_cnt
+            keep.report_cnt += extra.report_cnt
+            if extra.last_cert_date and (keep.last_cert_date is None or extra.last_cert_date > keep.last_cert_date):
+                keep.last_cert_date = extra.last_cert_date
+            for field in ('nick_name', 'description'):
+                if not getattr(keep, field):
+                    setattr(keep, field, getattr(extra, field))
+            # 남길 행에 없는 이미지는 옮기고, 나머지는 참조 해제 (파일은 주기적 정리에서 삭제)
+            for field in ('profile_img_url', 'shame_img_url'):
+                name = getattr(extra, field).name
+                if not name:
+                    continue
+                if not getattr(keep, field):
+                    setattr(keep, field, name)
+                    if field in extra.image_variants:
+                        keep.image_variants[field] = extra.image_variants[field]
+                else:
+                    released.append(name)
+        keep.save()
+        Member.objects.filter(pk__in=[extra.pk for extra in extras]).delete()
+        for name in released:
+            StoredBlob.objects.filter(name=name).update(ref_cnt=F('ref_cnt') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='cert_date',
+            field=models.DateField(default=api.models.cert_date_today),
+        ),
+        migrations.RunPython(backfill_cert_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['com_uuid', 'created_at'], name='chat_com_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['com_uuid', 'cert_date'], name='post_com_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user_id', 'com_uuid', 'cert_date'], name='post_user_com_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user_id', '-created_at'], name='post_user_created_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_members, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='member',
+            constraint=models.UniqueConstraint(fields=('user_id', 'com_uuid'), name='unique_member'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def days_to_mask(apps, schema_editor):
+    # ['Mon', 'wed'] -> 0b101 (대소문자 무시)
+    Community = apps.get_model('api', 'Community')
+    for community in Community.objects.only('pk', 'cert_days'):
+        mask = 0
+        for day in community.cert_days or []:
+            name = str(day).strip().lower()[:3]
+            if name in WEEKDAYS:
+                mask |= 1 << WEEKDAYS.index(name)
+        Community.objects.filter(pk=community.pk).update(cert_mask=mask)
+
+
+def mask_to_days(apps, schema_editor):
+    Community = apps.get_model('api', 'Community')
+    for community in Community.objects.only('pk', 'cert_mask'):
+        days = [name.title() for i, name in enumerate(WEEKDAYS) if community.cert_mask & (1 << i)]
+        Community.objects.filter(pk=community.pk).update(cert_days=days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_post_cert_date_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='cert_mask',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(days_to_mask, mask_to_days),
+        migrations.RemoveField(
+            model_name='community',
+            name='cert_days',
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(1)), models.F('cert_time'), name='community_mon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(2)), models.F('cert_time'), name='community_tue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(4)), models.F('cert_time'), name='community_wed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(8)), models.F('cert_time'), name='community_thu_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(16)), models.F('cert_time'), name='community_fri_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(32)), models.F('cert_time'), name='community_sat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('cert_mask'), '&', models.Value(64)), models.F('cert_time'), name='community_sun_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_community_cert_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['com_uuid', 'joined_at'], name='member_com_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_member_joined_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreentry',
+            name='refund_of',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='refund', to='api.scoreentry'),
+        ),
+        migrations.AddField(
+            model_name='scoreentry',
+            name='target_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
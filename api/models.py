@@ -1,5 +1,9 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from . import weekdays
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 # admin 계정 생성 용 
@@ -54,18 +58,62 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.user_name
 
 # 2. Communities
+class CommunityQuerySet(models.QuerySet):
+    # 마감 휠(api/deadlines.py)을 다시 만들어야 하는 필드
+    DEADLINE_FIELDS = {'cert_mask', 'cert_time'}
+
+    def certifying_on(self, value):
+        """요일(date 또는 0~6)이 인증 요일인 커뮤니티"""
+        return self.filter(weekdays.certifying_on(value))
+
+    # save()/delete()는 시그널에서, 시그널이 없는 대량 변경은 여기서 마감 휠 무효화
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows and self.DEADLINE_FIELDS & set(kwargs):
+            from .deadlines import invalidate_wheel
+            invalidate_wheel()
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        created = super().bulk_create(*args, **kwargs)
+        if created:
+            from .deadlines import invalidate_wheel
+            invalidate_wheel()
+        return created
+
+
 class Community(models.Model):
     com_uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     com_id = models.CharField(max_length=50, unique=True, help_text="User defined ID") # 사용자가 입력하는 ID
     com_name = models.CharField(max_length=200)
     description = models.TextField()
     # cert_type = models.CharField(max_length=50) 
-    cert_days = models.JSONField(default=list) # 선택 요일 ['Mon', 'Wed']
+    cert_mask = models.PositiveSmallIntegerField(default=0)  # 인증 요일 비트마스크 (월=1, 화=2, ... 일=64)
     cert_time = models.TimeField()              # 인증 마감 시간
     icon_url = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommunityQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # 요일별 (cert_mask & bit, cert_time) 표현식 인덱스: 스케줄러가 요일/마감 시간으로 한 번에 조회
+            models.Index(F('cert_mask').bitand(1 << i), 'cert_time', name=f'community_{day.lower()}_idx')
+            for i, day in enumerate(weekdays.WEEKDAYS)
+        ]
+
+    @property
+    def cert_days(self):
+        """['Mon', 'Wed'] 형태의 인증 요일 목록"""
+        return weekdays.to_days(self.cert_mask)
+
+    def is_cert_day(self, value):
+        return weekdays.is_cert_day(self.cert_mask, value)
+
+    def previous_cert_day(self, date, include_today=False):
+        return weekdays.previous_cert_day(self.cert_mask, date, include_today)
+
 # 3. Members (User <-> Community 연결 및 추가 정보)
 class Member(models.Model):
     mem_idx = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -76,11 +124,23 @@ class Member(models.Model):
     cert_cnt = models.IntegerField(default=0)
     is_late_cnt = models.IntegerField(default=0)
     report_cnt = models.IntegerField(default=0)
+    last_cert_date = models.DateField(null=True, blank=True)  # 마지막으로 점수를 받은 인증 날짜 (하루 1회 판정용)
     # profile_img_url = models.TextField(null=True, blank=True)
     profile_img_url = models.ImageField(upload_to='profile/', null=True, blank=True)
     # shame_img_url = models.TextField(null=True, blank=True)
     shame_img_url = models.ImageField(upload_to='shame/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # {'profile_img_url': {'thumb': ..., 'webp': ...}, ...}
     joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # 한 커뮤니티에는 한 번만 가입
+            models.UniqueConstraint(fields=['user_id', 'com_uuid'], name='unique_member'),
+        ]
+        indexes = [
+            # 커뮤니티 멤버 목록 (가입순 커서 페이지네이션)
+            models.Index(fields=['com_uuid', 'joined_at'], name='member_com_joined_idx'),
+        ]
     
     # def __str__(self):
     #     # 닉네임이 있으면 닉네임을, 없으면 유저 ID를 반환하도록 방어 코드 작성
@@ -108,6 +168,10 @@ class Member(models.Model):
 
 import os
 
+def cert_date_today():
+    # 인증 날짜 기본값 (서버 기준 오늘)
+    return timezone.now().date()
+
 def rename_image_path(instance, filename):
     # 파일 확장자 추출 (예: .jpg, .png)
     ext = filename.split('.')[-1]
@@ -124,12 +188,37 @@ class Post(models.Model):
     # image_url = models.TextField()
     # image_url = models.ImageField(upload_to='posts/', null=True, blank=True)
     image_url = models.ImageField(upload_to=rename_image_path, null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # {'thumb': ..., 'webp': ..., 'thumb_webp': ...}
+    blur_preview = models.TextField(null=True, blank=True)         # 블러 처리된 초소형 이미지 (data URI)
+    phash = models.BigIntegerField(null=True, blank=True)          # 64bit dHash (재사용 사진 탐지용)
+    duplicate_of = models.ForeignKey(                              # 같은 사진으로 판단된 이전 포스트
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
     is_late = models.BooleanField(default=False)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # created_at__date 대신 인덱스를 탈 수 있도록 인증 날짜를 따로 저장
+    cert_date = models.DateField(default=cert_date_today)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # 커뮤니티 오늘자 피드 / 수치의 전당 / 페널티
+            models.Index(fields=['com_uuid', 'cert_date'], name='post_com_date_idx'),
+            # 유저가 그날 그 커뮤니티에 인증했는지
+            models.Index(fields=['user_id', 'com_uuid', 'cert_date'], name='post_user_com_date_idx'),
+            # 내 포스트 히스토리 (최신순)
+            models.Index(fields=['user_id', '-created_at'], name='post_user_created_idx'),
+            # 유저+커뮤니티 단위로 해시만 읽어오도록 (index-only scan)
+            models.Index(
+                fields=['user_id', 'com_uuid'],
+                include=['phash', 'post_id'],
+                condition=models.Q(phash__isnull=False),
+                name='post_phash_idx',
+            ),
+        ]
+
 # 5. Chats
 class Chat(models.Model):
     comment_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -142,4 +231,129 @@ class Chat(models.Model):
     
     class Meta:
         # 채팅은 보통 시간순으로 가져오므로 정렬 설정을 추가하면 편합니다.
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+        indexes = [
+            # 커뮤니티 채팅 내역 (시간순)
+            models.Index(fields=['com_uuid', 'created_at'], name='chat_com_created_idx'),
+        ]
+
+# 6. PenaltyRuns (자정 페널티 실행 기록)
+class PenaltyRun(models.Model):
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+    ]
+
+    # 같은 날짜에 대해 한 번만 차감되도록 target_date를 unique로 둡니다.
+    target_date = models.DateField(unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    community_cnt = models.IntegerField(default=0)  # 대상 커뮤니티 수
+    member_cnt = models.IntegerField(default=0)     # 차감된 멤버(가입) 수
+    user_cnt = models.IntegerField(default=0)       # 차감된 유저 수 (완료 시 원장에서 중복 없이 계산)
+    elapsed_ms = models.FloatField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-target_date']
+
+    def __str__(self):
+        return f"{self.target_date} ({self.status})"
+
+
+# 7. PenaltyShards (커뮤니티 단위 페널티 체크포인트)
+class PenaltyShard(models.Model):
+    run = models.ForeignKey(PenaltyRun, on_delete=models.CASCADE, related_name='shards')
+    com_uuid = models.ForeignKey(Community, on_delete=models.CASCADE)
+    member_cnt = models.IntegerField(default=0)  # 이 커뮤니티에서 차감된 멤버 수
+    elapsed_ms = models.FloatField(null=True, blank=True)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # 같은 실행에서 한 커뮤니티는 한 번만 처리됩니다. (재시작 시 건너뜀)
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'com_uuid'], name='unique_penalty_shard'),
+        ]
+
+
+# 8. ShameSnapshots (수치의 전당 스냅샷)
+class ShameSnapshot(models.Model):
+    com_uuid = models.ForeignKey(Community, on_delete=models.CASCADE)
+    target_date = models.DateField()                 # 기준 인증일
+    member_ids = models.JSONField(default=list)      # 미인증 멤버 mem_idx 목록
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['com_uuid', 'target_date'], name='unique_shame_snapshot'),
+        ]
+
+
+# 9. ScoreEntries (점수 변동 원장)
+class ScoreEntry(models.Model):
+    REASON_CERT = 'cert'
+    REASON_ROLLBACK = 'rollback'
+    REASON_PENALTY = 'penalty'
+    REASON_CHOICES = [
+        (REASON_CERT, 'Certification'),
+        (REASON_ROLLBACK, 'Rollback'),
+        (REASON_PENALTY, 'Penalty'),
+    ]
+
+    # 점수 변동은 UPDATE 없이 INSERT로만 기록하고, User.score에는 주기적으로 합산(compact)합니다.
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_entries')
+    com_uuid = models.ForeignKey(Community, on_delete=models.SET_NULL, null=True, blank=True)
+    post = models.ForeignKey(Post, on_delete=models.SET_NULL, null=True, blank=True)
+    delta = models.FloatField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    # 페널티: 미인증으로 차감된 인증일 / 환급: 돌려준 페널티 항목 (한 페널티는 한 번만 환급)
+    target_date = models.DateField(null=True, blank=True)
+    refund_of = models.OneToOneField(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='refund'
+    )
+    is_compacted = models.BooleanField(default=False)  # User.score에 이미 반영되었는지
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # 아직 합산되지 않은 항목만 빠르게 찾기 위한 부분 인덱스
+            models.Index(fields=['user_id'], condition=models.Q(is_compacted=False), name='scoreentry_pending_idx'),
+        ]
+
+
+# 10. StoredBlobs (내용 해시 기반 이미지 저장소)
+class StoredBlob(models.Model):
+    # 같은 내용의 파일은 한 번만 저장하고, 참조하는 행(Post/Member) 수를 셉니다.
+    digest = models.CharField(max_length=64, primary_key=True)  # sha256 hex
+    name = models.CharField(max_length=255, unique=True)        # 스토리지 경로
+    size = models.BigIntegerField(default=0)
+    ref_cnt = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # 아무도 참조하지 않는 파일 정리(GC)용 부분 인덱스
+            models.Index(fields=['updated_at'], condition=models.Q(ref_cnt__lte=0), name='storedblob_unused_idx'),
+        ]
+
+
+# 11. IdempotencyKeys (재시도 요청 중복 방지)
+class IdempotencyKey(models.Model):
+    # 같은 Idempotency-Key로 다시 들어온 요청에는 처음 응답을 그대로 돌려줍니다.
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_path = models.CharField(max_length=255)                         # 다른 API에 같은 키를 쓰는 것 방지
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)   # null이면 아직 처리 중
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotencykey_created_idx'),
+        ]
@@ -1,50 +1,295 @@
 # api/operator.py
+import time
 from apscheduler.schedulers.background import BackgroundScheduler
 from django_apscheduler.jobstores import DjangoJobStore
 from django.utils import timezone
 from datetime import timedelta
-from django.db import transaction
-from .models import Community, Post, Member, User
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction, connection, connections, IntegrityError, DatabaseError
+from django.db.models import F, Exists, OuterRef, Count, Value, FloatField, CharField, DateField, BooleanField, DateTimeField
+from .models import Community, Member, PenaltyRun, PenaltyShard, ShameSnapshot, ScoreEntry
+from .services import CommunityService, ScoreService, PENALTY_POINT
+from .deadlines import deadline_tick
+from .storage import collect_unused_blobs
+from .idempotency import purge_idempotency_keys
 
-# 실행할 함수를 함수 밖으로 독립시킵니다. (Serialization 에러 방지)
-def auto_penalty():
-    """자정 점수 차감 핵심 로직"""
-    now = timezone.now()
-    yesterday = now.date() - timedelta(days=1)
-    
-    weekdays_map = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    today_weekday = yesterday.weekday()
-    yesterday_str = weekdays_map[today_weekday]
 
-    print(f"--- [스케줄러] {yesterday} 미인증자 페널티 부여 시작 ---")
+def lock_members(communities):
+    """커뮤니티들의 멤버 행을 pk 순서로 잠급니다. (행을 파이썬으로 가져오지 않고 DB에서 처리)"""
+    locked = Member.objects.filter(com_uuid__in=communities).order_by('pk').select_for_update().values('pk')
+    sql, params = locked.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM ({sql}) AS locked", params)
+        return cursor.fetchone()[0]
+
+
+def apply_penalty(communities, target_date):
+    """
+    미인증 멤버 점수 차감을 원장(ScoreEntry)에 한 번에 INSERT 합니다.
+    여러 커뮤니티에서 동시에 미인증인 유저는 미인증 횟수만큼 차감됩니다.
+    User 행은 건드리지 않으므로 행 잠금이 생기지 않습니다. (합산은 compact_scores 에서)
+    반환값: {com_uuid: 차감된 멤버 수}
+    """
+    # 멤버 행을 먼저 잠가 진행 중인 지각 인증/인증 삭제와 순서를 맞춥니다.
+    # (인증이 먼저면 커밋을 기다렸다가 그 포스트를 보고, 나중이면 이 페널티를 보고 환급)
+    lock_members(communities)
+    shame_members = CommunityService.get_shame_members(communities, target_date)
+
+    # 1. 커뮤니티별 차감 인원 (잠근 멤버 행 기준이라 아래 INSERT와 같은 집합)
+    member_counts = dict(
+        shame_members.order_by().values_list('com_uuid').annotate(n=Count('pk'))
+    )
+    if not member_counts:
+        return {}
+
+    # 2. 멤버 조회 결과를 그대로 원장에 INSERT ... SELECT (행을 파이썬으로 가져오지 않음)
+    selected = shame_members.order_by().annotate(
+        entry_delta=Value(-PENALTY_POINT, output_field=FloatField()),
+        entry_reason=Value(ScoreEntry.REASON_PENALTY, output_field=CharField()),
+        entry_target_date=Value(target_date, output_field=DateField()),
+        entry_compacted=Value(False, output_field=BooleanField()),
+        entry_created_at=Value(timezone.now(), output_field=DateTimeField()),
+    ).values_list(
+        'user_id', 'com_uuid', 'entry_delta', 'entry_reason', 'entry_target_date', 'entry_compacted', 'entry_created_at'
+    )
+    columns = ', '.join(
+        connection.ops.quote_name(ScoreEntry._meta.get_field(name).column)
+        for name in ('user_id', 'com_uuid', 'delta', 'reason', 'target_date', 'is_compacted', 'created_at')
+    )
+    sql, params = selected.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(ScoreEntry._meta.db_table)} ({columns}) {sql}", params
+        )
+    return member_counts
+
 
+def get_penalty_communities(target_date):
+    """target_date가 인증 요일이었던 커뮤니티들 (요일 비트마스크 인덱스 사용)"""
+    return Community.objects.certifying_on(target_date)
+
+
+def _is_shard_conflict(error):
+    """체크포인트 유니크 제약(unique_penalty_shard) 충돌인지 (PostgreSQL은 제약 이름, 그 외 DB는 메시지로 판단)"""
+    constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if constraint:
+        return constraint == 'unique_penalty_shard'
+    message = str(error)
+    return 'unique_penalty_shard' in message or 'api_penaltyshard' in message
+
+
+def penalize_communities(run_id, target_date, com_uuids):
+    """
+    커뮤니티 묶음(shard) 하나를 자기 트랜잭션 안에서 처리합니다.
+    체크포인트(PenaltyShard)를 먼저 기록하므로 이미 끝난 shard는 다시 차감되지 않습니다.
+    """
+    started = time.monotonic()
     try:
         with transaction.atomic():
-            # 1. 어제가 인증 요일이었던 커뮤니티들 조회
-            communities = Community.objects.filter(cert_days__contains=yesterday_str)
-            total_penalized = 0
-
-            for com in communities:
-                # 2. 어제 인증 포스트를 올린 유저 ID들
-                certified_ids = Post.objects.filter(
-                    com_id=com,
-                    created_at__date=yesterday
-                ).values_list('user_id', flat=True)
-
-                # 3. 미인증 멤버들 조회 및 점수 차감 (-10점)
-                shame_members = Member.objects.filter(com_id=com).exclude(user_id__in=certified_ids)
-
-                for member in shame_members:
-                    user = member.user_id
-                    user.score -= 10.0
-                    user.save()
-                    total_penalized += 1
-
-            print(f"--- [스케줄러] 총 {total_penalized}명 차감 완료 ---")
+            PenaltyShard.objects.bulk_create([
+                PenaltyShard(run_id=run_id, com_uuid_id=com_uuid) for com_uuid in com_uuids
+            ])
+            member_counts = apply_penalty(com_uuids, target_date)
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            for com_uuid in com_uuids:
+                PenaltyShard.objects.filter(run_id=run_id, com_uuid_id=com_uuid).update(
+                    member_cnt=member_counts.get(com_uuid, 0),
+                    elapsed_ms=elapsed_ms
+                )
+            PenaltyRun.objects.filter(pk=run_id).update(
+                member_cnt=F('member_cnt') + sum(member_counts.values())
+            )
+        return len(com_uuids)
+    except IntegrityError as e:
+        # 체크포인트 충돌이 아니면 실제 오류이므로 그대로 올림 (auto_penalty가 실패로 집계)
+        if not _is_shard_conflict(e):
+            raise
+        # 다른 워커가 일부 커뮤니티를 이미 처리함 -> 남은 커뮤니티만 다시 처리
+        finished = set(PenaltyShard.objects.filter(run_id=run_id, com_uuid__in=com_uuids)
+                       .values_list('com_uuid', flat=True))
+        remaining = [com_uuid for com_uuid in com_uuids if com_uuid not in finished]
+        if not finished or not remaining:
+            return 0
+        return penalize_communities(run_id, target_date, remaining)
+
+
+def run_penalty_shard(run_id, target_date, com_uuids):
+    """풀의 워커에서 실행하는 shard 처리 (끝나면 워커의 DB 커넥션 정리)"""
+    try:
+        return penalize_communities(run_id, target_date, com_uuids)
+    finally:
+        # 풀의 워커 스레드/프로세스가 커넥션을 붙잡고 있지 않도록 정리
+        connections.close_all()
+
+
+def _init_penalty_worker():
+    # spawn 방식의 프로세스 풀에서는 장고 설정을 다시 로드해야 합니다.
+    import django
+    django.setup()
+
+
+def _penalty_executor(workers):
+    if getattr(settings, 'PENALTY_POOL', 'thread') == 'process':
+        # fork 전에 부모의 DB 커넥션을 닫아 자식 프로세스와 공유되지 않게 합니다.
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_penalty_worker)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+# 실행할 함수를 함수 밖으로 독립시킵니다. (Serialization 에러 방지)
+def auto_penalty(target_date=None, workers=None, batch_size=None):
+    """
+    자정 점수 차감 핵심 로직
+    커뮤니티 묶음 단위로 나누어 풀에서 병렬 처리하고, 중단된 실행은 끝난 shard 이후부터 재개합니다.
+    같은 날짜로 여러 번 실행되어도 한 번만 차감됩니다.
+    """
+    if target_date is None:
+        target_date = timezone.now().date() - timedelta(days=1)
+    workers = workers or getattr(settings, 'PENALTY_WORKERS', 4)
+    batch_size = batch_size or getattr(settings, 'PENALTY_BATCH_SIZE', 20)
+
+    print(f"--- [스케줄러] {target_date} 미인증자 페널티 부여 시작 ---")
+    started = time.monotonic()
+
+    try:
+        # 1. 실행 기록(ledger) 조회, 이미 완료된 날짜면 건너뜀
+        run, _ = PenaltyRun.objects.get_or_create(target_date=target_date)
+        if run.status == PenaltyRun.STATUS_DONE:
+            print(f"--- [스케줄러] {target_date} 는 이미 처리되었습니다. 건너뜀 ---")
+            return run
+
+        # 2. 아직 체크포인트가 없는 커뮤니티만 shard로 나눔
+        com_uuids = list(get_penalty_communities(target_date).values_list('com_uuid', flat=True))
+        finished = set(run.shards.values_list('com_uuid', flat=True))
+        pending = [com_uuid for com_uuid in com_uuids if com_uuid not in finished]
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        # 3. shard별로 독립 트랜잭션에서 처리 (하나가 실패해도 나머지는 커밋됨)
+        failed = 0
+        if batches:
+            with _penalty_executor(min(workers, len(batches))) as executor:
+                futures = [
+                    executor.submit(run_penalty_shard, run.pk, target_date, batch)
+                    for batch in batches
+                ]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"--- [스케줄러 에러] shard 처리 실패: {e} ---")
+
+        run.refresh_from_db()
+        if failed:
+            print(f"--- [스케줄러] {failed}개 shard 실패, 다음 실행 시 이어서 처리합니다 ---")
+            return run
+
+        # 4. 그날 인증 요일이었던 모든 커뮤니티에 체크포인트가 있어야 완료 처리
+        finished = set(run.shards.values_list('com_uuid', flat=True))
+        missing = set(get_penalty_communities(target_date).values_list('com_uuid', flat=True)) - finished
+        if missing:
+            print(f"--- [스케줄러] 커뮤니티 {len(missing)}개 미처리, 다음 실행 시 이어서 처리합니다 ---")
+            return run
+
+        # 5. 모든 shard가 끝났으면 실행 완료 처리
+        run.status = PenaltyRun.STATUS_DONE
+        run.community_cnt = run.shards.count()
+        # 여러 shard(커뮤니티)에서 차감된 유저는 한 번만 세도록 원장에서 한 번에 계산
+        run.user_cnt = ScoreEntry.objects.filter(
+            reason=ScoreEntry.REASON_PENALTY, target_date=target_date
+        ).values('user_id').distinct().count()
+        run.elapsed_ms = (time.monotonic() - started) * 1000
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'community_cnt', 'user_cnt', 'elapsed_ms', 'finished_at'])
+
+        print(
+            f"--- [스케줄러] 커뮤니티 {run.community_cnt}개, 멤버 {run.member_cnt}명"
+            f"(유저 {run.user_cnt}명) 차감 완료 ({run.elapsed_ms:.1f}ms) ---"
+        )
+        return run
     except Exception as e:
         print(f"--- [스케줄러 에러] {e} ---")
 
-def start():
+def snapshot_hall_of_shame(now=None):
+    """오늘 인증 마감이 지난 커뮤니티들의 수치의 전당 스냅샷을 생성합니다."""
+    now = now or timezone.now()
+    today_date = now.date()
+
+    communities = Community.objects.certifying_on(today_date).filter(
+        cert_time__lt=now.time()
+    ).exclude(
+        Exists(ShameSnapshot.objects.filter(com_uuid=OuterRef('pk'), target_date=today_date))
+    )
+
+    created = 0
+    for community in communities:
+        CommunityService.build_shame_snapshot(community, today_date)
+        created += 1
+    if created:
+        print(f"--- [스케줄러] 수치의 전당 스냅샷 {created}개 생성 ---")
+
+
+class SchedulerLeaderLock:
+    """
+    여러 노드 중 한 곳에서만 스케줄러가 돌도록 Postgres advisory lock으로 리더를 선출합니다.
+    advisory lock은 DB 세션에 묶여 있어서 리더 프로세스가 죽으면 자동으로 풀리고,
+    대기 중인 다른 노드가 다음 시도에서 리더가 됩니다.
+    """
+
+    def __init__(self, lock_id=None, using='default'):
+        self.lock_id = lock_id or getattr(settings, 'SCHEDULER_LOCK_ID', 20260120)
+        if not -2 ** 63 <= self.lock_id < 2 ** 63:
+            raise ImproperlyConfigured("SCHEDULER_LOCK_ID는 64bit 정수(bigint) 범위여야 합니다.")
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def acquire(self):
+        """락 획득을 시도하고 성공 여부를 반환 (기다리지 않음)"""
+        if self.connection.vendor != 'postgresql':
+            # 로컬(sqlite 등) 단일 노드 환경에서는 항상 리더
+            return True
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [self.lock_id])
+                return cursor.fetchone()[0]
+        except DatabaseError:
+            self.connection.close()
+            return False
+
+    def is_held(self):
+        """현재 세션이 여전히 락을 쥐고 있는지 확인 (DB 연결이 끊겼다면 False)"""
+        if self.connection.vendor != 'postgresql':
+            return True
+        try:
+            # bigint 키는 pg_locks에 상위 32bit(classid) / 하위 32bit(objid)로 나뉘어 기록됨 (objsubid=1)
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted"
+                    " AND pid = pg_backend_pid() AND classid = %s AND objid = %s AND objsubid = 1",
+                    [(self.lock_id >> 32) & 0xffffffff, self.lock_id & 0xffffffff]
+                )
+                return cursor.fetchone() is not None
+        except DatabaseError:
+            self.connection.close()
+            return False
+
+    def release(self):
+        if self.connection.vendor != 'postgresql':
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [self.lock_id])
+        except DatabaseError:
+            self.connection.close()
+
+
+def create_scheduler():
     scheduler = BackgroundScheduler(timezone="Asia/Seoul")
     scheduler.add_jobstore(DjangoJobStore(), "default")
 
@@ -59,4 +304,54 @@ def start():
         replace_existing=True,
     )
 
-    scheduler.start()
\ No newline at end of file
+    # 마감 타임휠: 매 분 그 분에 마감되는 커뮤니티만 리마인더/스냅샷/페널티 처리
+    scheduler.add_job(
+        deadline_tick,
+        trigger='cron',
+        minute='*',
+        id='deadline_tick',
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    # 스케줄러가 멈춰 있던 동안 놓친 마감이 있으면 수치의 전당 스냅샷을 보충
+    scheduler.add_job(
+        snapshot_hall_of_shame,
+        trigger='cron',
+        minute='*/10',
+        id='hall_of_shame_snapshot',
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    # 점수 원장을 User.score에 주기적으로 합산
+    scheduler.add_job(
+        ScoreService.compact_scores,
+        trigger='interval',
+        minutes=1,
+        id='compact_scores',
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    # 참조가 끊긴 이미지 파일 정리
+    scheduler.add_job(
+        collect_unused_blobs,
+        trigger='interval',
+        hours=1,
+        id='collect_unused_blobs',
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    # 보관 기간이 지난 Idempotency-Key 정리
+    scheduler.add_job(
+        purge_idempotency_keys,
+        trigger='interval',
+        hours=1,
+        id='purge_idempotency_keys',
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    return scheduler
@@ -0,0 +1,88 @@
+# api/pagination.py
+import base64
+import uuid
+from datetime import datetime
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPagination:
+    """
+    (시각, pk) 기준 커서 페이지네이션
+    - 파라미터 없음: 가장 최근 page_size개
+    - ?before=<cursor>: 커서보다 이전 항목 (위로 스크롤)
+    - ?after=<cursor>: 커서 이후 항목 (재접속 후 따라잡기)
+    OFFSET 없이 인덱스 범위 조건만 쓰므로 몇 번째 페이지든 비용이 같습니다.
+    order: 한 페이지 안의 정렬 ('asc'는 오래된 것부터, 'desc'는 최신부터)
+    """
+
+    def __init__(self, time_field='created_at', order='desc'):
+        self.time_field = time_field
+        self.order = order
+
+    @staticmethod
+    def encode(value, pk):
+        raw = f"{value.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            value, pk = raw.split('|', 1)
+            return datetime.fromisoformat(value), uuid.UUID(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError("잘못된 커서입니다.")
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'CURSOR_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'CURSOR_MAX_PAGE_SIZE', 200)
+        try:
+            size = int(request.query_params.get('page_size', default))
+        except ValueError:
+            raise ValidationError("page_size는 숫자여야 합니다.")
+        return min(max(size, 1), maximum)
+
+    def _range(self, op, cursor):
+        """(시각, pk) < 또는 > 커서 (시각 범위 조건을 함께 걸어 인덱스를 탐)"""
+        value, pk = self.decode(cursor)
+        t = self.time_field
+        return Q(**{f'{t}__{op}e': value}) & (Q(**{f'{t}__{op}': value}) | Q(**{t: value, f'pk__{op}': pk}))
+
+    def paginate(self, request, queryset):
+        """반환값: (이번 페이지 객체 목록, 응답에 넣을 커서 정보)"""
+        size = self.get_page_size(request)
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        if before and after:
+            raise ValidationError("before와 after는 함께 쓸 수 없습니다.")
+
+        t = self.time_field
+        if after:
+            # 커서 이후: 오래된 것부터 size개
+            rows = list(queryset.filter(self._range('gt', after)).order_by(t, 'pk')[:size + 1])
+            has_more = len(rows) > size
+            rows = rows[:size]
+            newest, oldest = (rows[-1], rows[0]) if rows else (None, None)
+        else:
+            # 최신 또는 커서 이전: 최신 것부터 size개
+            queryset = queryset.filter(self._range('lt', before)) if before else queryset
+            rows = list(queryset.order_by(f'-{t}', '-pk')[:size + 1])
+            has_more = len(rows) > size
+            rows = rows[:size]
+            newest, oldest = (rows[0], rows[-1]) if rows else (None, None)
+            rows.reverse()  # 오래된 것부터로 맞춤
+
+        if self.order == 'desc':
+            rows.reverse()
+
+        meta = {
+            'page_size': size,
+            'has_more': has_more,
+            # 더 이전 항목을 불러올 커서 (최신/이전 방향에서 더 없으면 null)
+            'before': self.encode(getattr(oldest, t), oldest.pk) if oldest and (after or has_more) else None,
+            # 이후 새 항목을 불러올 커서 (항목이 없으면 받은 커서를 그대로 돌려줌)
+            'after': self.encode(getattr(newest, t), newest.pk) if newest else after,
+        }
+        return rows, meta
@@ -0,0 +1,89 @@
+# api/phash.py
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+# dHash: 9x8 흑백으로 줄인 뒤 가로로 이웃한 픽셀의 밝기 비교 -> 64bit
+HASH_SIZE = 8
+# 0~255 각 바이트의 1 비트 개수 (해밍 거리 계산용)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dhash(img):
+    """PIL 이미지의 64bit dHash (BigIntegerField에 맞게 부호 있는 정수로 반환)"""
+    gray = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    px = np.asarray(gray, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big', signed=True)
+
+
+def hamming(value, hashes):
+    """value와 hashes(int64 배열) 각각의 해밍 거리 (벡터 연산)"""
+    xor = np.bitwise_xor(np.asarray(hashes, dtype=np.int64), np.int64(value))
+    return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def get_threshold():
+    return getattr(settings, 'PHASH_THRESHOLD', 10)
+
+
+class PhashIndex:
+    """
+    유저 한 명이 커뮤니티 하나에 올린 사진들의 해시 목록 (= 파티션).
+    사진을 다른 유저/커뮤니티와 비교할 필요가 없으므로 전체 포스트 수와 무관하게
+    파티션 크기(인증 일수)만큼만 읽고 한 번에 비교합니다.
+    """
+
+    def __init__(self, post_ids, hashes):
+        self.post_ids = list(post_ids)
+        self.hashes = np.asarray(hashes, dtype=np.int64)
+
+    @classmethod
+    def load(cls, user_id, com_uuid, before=None, exclude=None):
+        """파티션의 해시를 읽어옵니다. before가 있으면 그 시각까지 올린 사진만"""
+        from .models import Post
+
+        rows = Post.objects.filter(user_id=user_id, com_uuid=com_uuid, phash__isnull=False)
+        if before is not None:
+            rows = rows.filter(created_at__lte=before)
+        if exclude is not None:
+            rows = rows.exclude(pk=exclude)
+        rows = rows.values_list('post_id', 'phash')
+        return cls([row[0] for row in rows], [row[1] for row in rows])
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def nearest(self, value, threshold=None):
+        """threshold 이내에서 가장 비슷한 (post_id, 거리), 없으면 None"""
+        if not self.post_ids:
+            return None
+        threshold = get_threshold() if threshold is None else threshold
+
+        distances = hamming(value, self.hashes)
+        i = int(np.argmin(distances))
+        if distances[i] > threshold:
+            return None
+        return self.post_ids[i], int(distances[i])
+
+
+def flag_recycled(post_id):
+    """
+    포스트의 해시를 같은 유저/커뮤니티의 이전 사진들과 비교해
+    재사용된 사진이면 duplicate_of에 기록합니다. (이미지 변환 작업 뒤에 호출)
+    """
+    from .models import Post
+
+    row = Post.objects.filter(pk=post_id, phash__isnull=False)\
+        .values('user_id', 'com_uuid', 'phash', 'created_at').first()
+    if not row:
+        return None
+
+    # 자기보다 먼저 올린 사진과만 비교
+    index = PhashIndex.load(row['user_id'], row['com_uuid'], before=row['created_at'], exclude=post_id)
+    match = index.nearest(row['phash'])
+    if match is None:
+        return None
+    Post.objects.filter(pk=post_id).update(duplicate_of=match[0])
+    print(f"--- [재사용 사진] {post_id} ~ {match[0]} (거리 {match[1]}) ---")
+    return match[0]
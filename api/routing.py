@@ -5,4 +5,6 @@ from . import consumers
 websocket_urlpatterns = [
     # ws/chat/<uuid>/ 형식의 요청을 ChatConsumer로 연결
     re_path(r'ws/chat/(?P<com_uuid>[^/]+)/$', consumers.ChatConsumer.as_asgi()),
+    # ws/notifications/ : 로그인한 유저 개인 알림
+    re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -1,27 +1,128 @@
 # api/serializers.py
+import json
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import User, Community, Member, Post, Chat
+from .services import ScoreService
+from .fieldsets import SparseFieldsMixin
+from . import weekdays
+from .images import BLUR_PLACEHOLDER_URL, display_name
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """저장된 변환본 경로({'thumb': 'posts/..._thumb.jpg'})를 URL로 바꿔 반환"""
+
+    def to_representation(self, value):
+        return {key: default_storage.url(name) for key, name in (value or {}).items()}
+
+
+class ProcessedImageField(serializers.ImageField):
+    """
+    이미지 필드를 원본 대신 축소/EXIF 제거된 full 변환본 URL로 반환 (변환 전이면 null)
+    variant_key: Member처럼 이미지 필드별로 변환본이 나뉜 경우 image_variants의 키
+    """
+
+    def __init__(self, variant_key=None, **kwargs):
+        self.variant_key = variant_key
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        file = super().get_attribute(instance)
+        variants = getattr(instance, 'image_variants', None) or {}
+        if self.variant_key:
+            variants = variants.get(self.variant_key) or {}
+        name = display_name(file.name if file else None, variants)
+        if name is None:
+            return None
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, value):
+        return value
+
+
+class MemberImageVariantsField(ImageVariantsField):
+    def to_representation(self, value):
+        return {field: super(MemberImageVariantsField, self).to_representation(variants)
+                for field, variants in (value or {}).items()}
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # 점수는 원장(ScoreEntry)으로만 변경되므로 읽기 전용, 아직 합산되지 않은 항목까지 포함해 반환
+    score = serializers.SerializerMethodField()
 
-class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['user_id', 'login_id', 'user_name', 'score', 'interests', 'profile_img_url', 'created_at']
         read_only_fields = ['user_id', 'created_at']
+        field_sources = {'score': ['score']}
+
+    def get_score(self, obj):
+        return ScoreService.get_score(obj)
+
+class CertDaysField(serializers.Field):
+    """cert_mask(요일 비트마스크) <-> ['Mon', 'Wed'] 목록 (API는 기존처럼 목록으로 주고받음)"""
+
+    def to_representation(self, value):
+        return weekdays.to_days(value)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            # multipart 요청: '["Mon", "Wed"]' 또는 'Mon,Wed'
+            try:
+                data = json.loads(data)
+            except ValueError:
+                data = [day for day in data.split(',') if day.strip()]
+        if not isinstance(data, list):
+            raise serializers.ValidationError("요일 목록이어야 합니다. 예: [\"Mon\", \"Wed\"]")
+        try:
+            return weekdays.to_mask(data)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
+class CommunitySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    cert_days = CertDaysField(source='cert_mask', required=False)
 
-class CommunitySerializer(serializers.ModelSerializer):
     class Meta:
         model = Community
-        fields = '__all__'
+        exclude = ['cert_mask']
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # 유저와 커뮤니티의 상세 정보를 함께 보고 싶다면 아래 주석을 해제하세요
     # user_details = UserSerializer(source='user', read_only=True)
     community_details = CommunitySerializer(source='com_uuid', read_only=True)
+    shame_img_url = ProcessedImageField(variant_key='shame_img_url', required=False, allow_null=True)
+    profile_img_url = ProcessedImageField(variant_key='profile_img_url', required=False, allow_null=True)
+    image_variants = MemberImageVariantsField()
     
     class Meta:
         model = Member
-        fields = ['mem_idx', 'user_id', 'com_uuid', 'community_details', 'nick_name', 'description', 'cert_cnt', 'is_late_cnt', 'shame_img_url', 'profile_img_url', 'joined_at']
+        fields = ['mem_idx', 'user_id', 'com_uuid', 'community_details', 'nick_name', 'description', 'cert_cnt', 'is_late_cnt', 'shame_img_url', 'profile_img_url', 'image_variants', 'joined_at']
         read_only_fields = ['mem_idx', 'joined_at']
+        field_sources = {
+            'shame_img_url': ['shame_img_url', 'image_variants'],
+            'profile_img_url': ['profile_img_url', 'image_variants'],
+        }
+
+
+class MemberRowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    한 커뮤니티 안의 멤버 목록용 (랭킹, 수치의 전당, 멤버 목록)
+    커뮤니티 정보는 응답 최상단에 한 번만 넣고, 행에는 멤버 컬럼만 담습니다.
+    조회 시 .only(*MemberRowSerializer.Meta.fields)로 필요한 컬럼만 가져옵니다.
+    """
+    shame_img_url = ProcessedImageField(variant_key='shame_img_url', read_only=True)
+    profile_img_url = ProcessedImageField(variant_key='profile_img_url', read_only=True)
+    image_variants = MemberImageVariantsField()
+
+    class Meta:
+        model = Member
+        fields = ['mem_idx', 'user_id', 'nick_name', 'description', 'cert_cnt', 'is_late_cnt', 'shame_img_url', 'profile_img_url', 'image_variants', 'joined_at']
+        field_sources = {
+            'shame_img_url': ['shame_img_url', 'image_variants'],
+            'profile_img_url': ['profile_img_url', 'image_variants'],
+        }
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -34,8 +135,9 @@ class LoginSerializer(serializers.Serializer):
     login_id = serializers.CharField(write_only=True)
     password = serializers.CharField(write_only=True)
 
-class PostSerializer(serializers.ModelSerializer):
-    image_url = serializers.ImageField(use_url=True)
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    image_url = ProcessedImageField(use_url=True)
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Post
@@ -44,15 +146,86 @@ class PostSerializer(serializers.ModelSerializer):
             'user_id', 
             'com_uuid', 
             'image_url', 
+            'image_variants',
+            'duplicate_of',
             'is_late', 
             'latitude', 
             'longitude', 
             'created_at'  
         ]
-        read_only_fields = ['post_id', 'created_at', 'is_late']
+        read_only_fields = ['post_id', 'created_at', 'is_late', 'duplicate_of']
+        expandable_fields = {'com_uuid': CommunitySerializer}
+        field_sources = {'image_url': ['image_url', 'image_variants']}
         
-class PostHistorySerializer(serializers.ModelSerializer):
+class MaskableImageField(ProcessedImageField):
+    """피드에서 가려지는 포스트면 원본 URL을 만들지 않고 블러 미리보기를 반환"""
+
+    def get_attribute(self, instance):
+        if self.parent.is_masked(instance):
+            return instance.blur_preview or BLUR_PLACEHOLDER_URL
+        return super().get_attribute(instance)
+
+
+class MaskableImageVariantsField(ImageVariantsField):
+    """가려지는 포스트는 변환본 URL도 숨김"""
+
+    def get_attribute(self, instance):
+        if self.parent.is_masked(instance):
+            return {}
+        return super().get_attribute(instance)
+
+
+class FeedPostSerializer(PostSerializer):
+    """
+    오늘자 피드용 (PostService.get_today_feed의 annotate 결과 사용)
+    보는 사람이 오늘 인증하지 않았다면 다른 사람의 사진은 직렬화 단계에서 블러로 대체합니다.
+    """
+    image_url = MaskableImageField(use_url=True, read_only=True)
+    image_variants = MaskableImageVariantsField()
+    author_nickname = serializers.ReadOnlyField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['author_nickname']
+        field_sources = {
+            'image_url': ['image_url', 'image_variants', 'blur_preview', 'user_id'],
+            'image_variants': ['image_variants', 'user_id'],
+            'author_nickname': [],
+        }
+
+    def is_masked(self, post):
+        viewer = self.context['request'].user
+        return not getattr(post, 'viewer_certified', False) and post.user_id_id != viewer.pk
+
+    @staticmethod
+    def cache_entries(posts, context):
+        """
+        캐시용: 블러 없이 직렬화한 행과 가릴 때 쓸 블러 미리보기를 함께 보관
+        (posts는 user=None으로 조회한 PostService.get_today_feed 결과)
+        """
+        posts = list(posts)
+        rows = FeedPostSerializer(posts, many=True, context=context).data
+        return [
+            {'row': dict(row), 'blur': post.blur_preview or BLUR_PLACEHOLDER_URL}
+            for post, row in zip(posts, rows)
+        ]
+
+    @staticmethod
+    def mask_entries(entries, viewer):
+        """캐시된 피드에 보는 사람 기준 블러 적용 (오늘 내 포스트가 있으면 인증한 것)"""
+        certified = any(entry['row']['user_id'] == viewer.pk for entry in entries)
+        data = []
+        for entry in entries:
+            row = entry['row']
+            if not certified and row['user_id'] != viewer.pk:
+                row = {**row, 'image_url': entry['blur'], 'image_variants': {}}
+            data.append(row)
+        return data
+
+
+class PostHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     com_name = serializers.ReadOnlyField(source='com_uuid.com_name')
+    image_url = ProcessedImageField(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Post
@@ -62,20 +235,62 @@ class PostHistorySerializer(serializers.ModelSerializer):
             'com_uuid',
             'com_name',
             'image_url', 
+            'image_variants',
             'is_late', 
             'created_at'  
         ]
+        expandable_fields = {'com_uuid': CommunitySerializer}
+        field_sources = {'image_url': ['image_url', 'image_variants']}
+
+class ChatListSerializer(serializers.ListSerializer):
+    """채팅 목록: 페이지 안 보낸 사람들의 닉네임을 한 번에 조회해 context에 넣어둡니다."""
+
+    def to_representation(self, data):
+        chats = list(data.all() if hasattr(data, 'all') else data)
+        if 'sender_nickname' in self.child.fields:
+            self.context['sender_nicknames'] = ChatSerializer.load_nicknames(chats)
+        return super().to_representation(chats)
+
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender_nickname = serializers.SerializerMethodField()
-    sender_id = serializers.ReadOnlyField(source='user_id.user_id')
+    sender_id = serializers.ReadOnlyField(source='user_id_id')
 
     class Meta:
         model = Chat
         fields = ['comment_id', 'user_id', 'com_uuid', 'sender_id', 'sender_nickname', 'content', 'created_at']
-        
+        list_serializer_class = ChatListSerializer
+        field_sources = {'sender_nickname': ['user_id', 'com_uuid']}
+
+    @staticmethod
+    def load_nicknames(chats):
+        """
+        {(user_id, com_uuid): 닉네임} (멤버 1번 + 탈퇴한 유저 이름 1번 조회)
+        닉네임은 저장하지 않고 조회 시점의 값을 쓰므로 닉네임 변경이 그대로 반영됩니다.
+        """
+        keys = {(chat.user_id_id, chat.com_uuid_id) for chat in chats}
+        if not keys:
+            return {}
+        rows = Member.objects.filter(
+            user_id__in={user_id for user_id, _ in keys},
+            com_uuid__in={com_uuid for _, com_uuid in keys}
+        ).values_list('user_id', 'com_uuid', 'nick_name')
+        nicknames = {(user_id, com_uuid): nick_name for user_id, com_uuid, nick_name in rows}
+
+        # 멤버가 아닌(탈퇴한) 유저는 유저 이름으로 표시
+        missing = {user_id for user_id, com_uuid in keys if (user_id, com_uuid) not in nicknames}
+        if missing:
+            names = dict(User.objects.filter(pk__in=missing).values_list('pk', 'user_name'))
+            for user_id, com_uuid in keys:
+                nicknames.setdefault((user_id, com_uuid), names.get(user_id))
+        return nicknames
+
     def get_sender_nickname(self, obj):
-        # 현재 채팅 메시지의 '유저'와 '커뮤니티' 정보를 동시에 만족하는 '멤버'를 찾습니다.
+        nicknames = self.context.get('sender_nicknames')
+        if nicknames is not None:
+            return nicknames.get((obj.user_id_id, obj.com_uuid_id))
+
+        # 단건 직렬화: 현재 채팅 메시지의 '유저'와 '커뮤니티' 정보를 동시에 만족하는 '멤버'를 찾습니다.
         try:
             member = Member.objects.get(user_id=obj.user_id, com_uuid=obj.com_uuid)
             return member.nick_name
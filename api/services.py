@@ -1,16 +1,23 @@
 # api/services.py
-import datetime
 from django.utils import timezone
-from datetime import timedelta
-from django.db import transaction
-from django.db.models import Count, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Q, F, Sum, Value, Exists, OuterRef, Subquery, ExpressionWrapper, BooleanField
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import authenticate
-from .models import User, Community, Member, Post
+from .models import User, Community, Member, Post, ShameSnapshot, ScoreEntry, PenaltyShard
+from . import leaderboard, images, caching
+from .storage import store_image, release_blob
 # JWT 발급을 위한 라이브러리 (설치 필요: djangorestframework-simplejwt)
 # from rest_framework_simplejwt.tokens import RefreshToken
+
 import uuid
 
+# 미인증 1회당 차감 점수
+PENALTY_POINT = 10.0
+
 
 class AuthService:
     @staticmethod
@@ -49,71 +56,206 @@ class AuthService:
 
 
 
+class ScoreService:
+    @staticmethod
+    def record(user, delta, reason, community=None, post=None, refund_of=None, target_date=None):
+        """점수 변동을 원장에 기록 (INSERT만 수행)"""
+        return ScoreEntry.objects.create(
+            user_id=user,
+            com_uuid=community,
+            post=post,
+            delta=delta,
+            reason=reason,
+            refund_of=refund_of,
+            target_date=target_date
+        )
+
+    @staticmethod
+    def pending_score_subquery():
+        """User 쿼리셋에 annotate 할 수 있는 '아직 합산되지 않은 점수' 서브쿼리"""
+        return Coalesce(
+            Subquery(
+                ScoreEntry.objects.filter(user_id=OuterRef('pk'), is_compacted=False)
+                .values('user_id')
+                .annotate(total=Sum('delta'))
+                .values('total')
+            ),
+            Value(0.0)
+        )
+
+    @staticmethod
+    def get_score(user):
+        """현재 점수 = 합산된 점수(User.score) + 아직 합산되지 않은 원장 항목"""
+        pending = getattr(user, 'pending_score', None)
+        if pending is None:
+            pending = ScoreEntry.objects.filter(user_id=user, is_compacted=False)\
+                .aggregate(total=Sum('delta'))['total'] or 0
+        return user.score + pending
+
+    @staticmethod
+    def compact_scores(batch_size=10000):
+        """원장의 미합산 항목을 User.score에 합산합니다. (스케줄러에서 주기적으로 실행)"""
+        with transaction.atomic():
+            # 합산할 항목을 id로 고정해 두어야, 도중에 커밋된 항목이 합산 없이 표시되지 않습니다.
+            # 행 잠금(SKIP LOCKED)으로 동시에 실행된 다른 compact_scores와 같은 항목을 두 번 합산하지 않습니다.
+            entry_ids = list(
+                ScoreEntry.objects.filter(is_compacted=False)
+                .select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not entry_ids:
+                return 0
+
+            entries = ScoreEntry.objects.filter(id__in=entry_ids)
+            total = entries.filter(user_id=OuterRef('pk'))\
+                .values('user_id')\
+                .annotate(total=Sum('delta'))\
+                .values('total')
+            User.objects.filter(Exists(entries.filter(user_id=OuterRef('pk'))))\
+                .update(score=F('score') + Subquery(total))
+            entries.update(is_compacted=True)
+        return len(entry_ids)
+
+
 class CommunityService:
     @staticmethod
     def join_community(user, community, nick_name, profile_img_url, shame_img_url, description=""):
         """프론트에서 받은 닉네임과 소개를 포함하여 가입 처리"""
         if Member.objects.filter(user_id=user, com_uuid=community).exists():
             raise ValidationError("이미 가입된 커뮤니티입니다.")
+
+        # 이미지는 내용 해시 저장소에 먼저 올림 (같은 이미지는 업로드 생략)
+        profile_name = store_image(profile_img_url)
+        shame_name = store_image(shame_img_url)
+        try:
+            with transaction.atomic():
+                member = Member.objects.create(
+                    user_id=user,         # 모델의 FK 필드명
+                    com_uuid=community,     # 모델의 FK 필드명
+                    nick_name=nick_name,
+                    profile_img_url=profile_name,
+                    shame_img_url=shame_name,
+                    description=description,
+                    cert_cnt=0,
+                    is_late_cnt=0
+                )
+        except Exception as e:
+            release_blob(profile_name)
+            release_blob(shame_name)
+            if isinstance(e, IntegrityError):
+                # 동시에 들어온 가입 요청 (unique_member 제약)
+                raise ValidationError("이미 가입된 커뮤니티입니다.")
+            raise
+        transaction.on_commit(lambda: leaderboard.record_change(member))
+        if profile_name or shame_name:
+            transaction.on_commit(lambda: images.submit(images.process_member_images, member.mem_idx))
+        return member
         
-        return Member.objects.create(
-            user_id=user,         # 모델의 FK 필드명
-            com_uuid=community,     # 모델의 FK 필드명
-            nick_name=nick_name,
-            profile_img_url=profile_img_url,
-            shame_img_url=shame_img_url,
-            description=description,
-            cert_cnt=0,
-            is_late_cnt=0
+    @staticmethod
+    def get_community_rankings(com_uuid, offset=0, limit=50, fields=None):
+        """
+        커뮤니티 내 유저별 순위 매기기 (인증횟수 DESC, 지각횟수 ASC, 가입순)
+        fields를 주면 해당 컬럼만 조회합니다.
+        반환값: ([(순위, Member), ...], 전체 멤버 수)
+        """
+        board = leaderboard.get_leaderboard(com_uuid)
+        ranked = board.page(offset, limit)
+        members = Member.objects.all()
+        if fields:
+            members = members.only(*fields)
+        members = members.in_bulk([mem_idx for _, mem_idx in ranked])
+        return [
+            (rank, members[uuid.UUID(mem_idx)]) for rank, mem_idx in ranked
+            if uuid.UUID(mem_idx) in members
+        ], len(board)
+
+    @staticmethod
+    def get_member_rank(user, com_uuid):
+        """내 순위 조회 (가입하지 않은 커뮤니티면 Member.DoesNotExist)"""
+        member = Member.objects.get(user_id=user, com_uuid=com_uuid)
+        board = leaderboard.get_leaderboard(com_uuid)
+        return board.rank_of(member.mem_idx), len(board), member
+
+    @staticmethod
+    def get_shame_members(communities, target_date):
+        """target_date에 인증 포스트가 없는 멤버들 (여러 커뮤니티를 한 번에 조회)"""
+        certified = Post.objects.filter(
+            user_id=OuterRef('user_id'),
+            com_uuid=OuterRef('com_uuid'),
+            cert_date=target_date
         )
-        
+        return Member.objects.filter(com_uuid__in=communities).filter(~Exists(certified))
+
+    @staticmethod
+    def get_shame_target_date(community, now=None):
+        """수치의 전당 기준 날짜: 오늘 마감이 지났으면 오늘, 아니면 가장 최근 인증 요일"""
+        now = now or timezone.now()
+        today_date = now.date()
+
+        # Case A: 오늘이 인증 요일이고 마감 시간이 지났으면 오늘이 기준
+        if community.is_cert_day(today_date) and now.time() > community.cert_time:
+            return today_date
+
+        # Case B: 그 외의 경우, 어제부터 과거로 거슬러 올라가며 가장 가까운 인증 요일
+        return community.previous_cert_day(today_date)
+
+    @staticmethod
+    def _shame_cache_key(com_uuid, target_date):
+        return f"hall_of_shame:{com_uuid}:{target_date}"
+
+    @staticmethod
+    def build_shame_snapshot(community, target_date):
+        """마감이 지난 인증일의 미인증 멤버 목록을 스냅샷으로 저장 (이미 있으면 그대로 반환)"""
+        member_ids = [
+            str(mem_idx) for mem_idx in
+            CommunityService.get_shame_members([community.pk], target_date).values_list('mem_idx', flat=True)
+        ]
+        snapshot, _ = ShameSnapshot.objects.get_or_create(
+            com_uuid=community,
+            target_date=target_date,
+            defaults={'member_ids': member_ids}
+        )
+        cache.set(
+            CommunityService._shame_cache_key(community.pk, target_date),
+            snapshot.member_ids,
+            settings.HALL_OF_SHAME_CACHE_SECONDS
+        )
+        return snapshot
+
     @staticmethod
-    def get_community_rankings(com_uuid):
-        """커뮤니티 내 유저별 순위 매기기 (인증횟수 DESC, 지각횟수 ASC)"""
-        return Member.objects.filter(com_uuid=com_uuid)\
-            .order_by('-cert_cnt', 'is_late_cnt')
+    def invalidate_shame_snapshot(community, target_date):
+        """기준일에 늦게 인증한 멤버가 생기면 스냅샷을 지워 다음 조회 때 다시 만듭니다."""
+        ShameSnapshot.objects.filter(com_uuid=community, target_date=target_date).delete()
+        cache.delete(CommunityService._shame_cache_key(community.pk, target_date))
 
     @staticmethod
     def get_hall_of_shame(com_uuid):
-        """수치의 전당: 인증 요일에만 최신화, 그 외엔 유지"""
+        """수치의 전당: 인증 요일에만 최신화, 그 외엔 유지 (스냅샷 + 캐시에서 조회)"""
         # ViewSet.hall_of_shame에서 pk(uuid)를 넘김.
         if isinstance(com_uuid, str) or isinstance(com_uuid, uuid.UUID):
              community = Community.objects.get(pk=com_uuid)
         else:
              community = com_uuid
-        
-        now = timezone.now()
-        today_date = now.date()
-        weekdays_map = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
-        
+
         # 1. 기준이 되는 '대상 날짜(target_date)' 찾기
-        target_date = None
-        
-        # 오늘이 인증 요일이고 마감 시간이 지났는지 확인
-        is_cert_day = weekdays_map[now.weekday()] in community.cert_days
-        is_after_deadline = now.time() > community.cert_time
-        
-        if is_cert_day and is_after_deadline:
-            # Case A: 오늘이 인증 요일이고 시간이 지났으면 오늘이 기준
-            target_date = today_date
-        else:
-            # Case B: 그 외의 경우, 어제부터 과거로 거슬러 올라가며 가장 가까운 인증 요일을 찾음
-            for i in range(1, 8):  # 최대 일주일 전까지 탐색
-                past_date = today_date - timedelta(days=i)
-                if weekdays_map[past_date.weekday()] in community.cert_days:
-                    target_date = past_date
-                    break
-        
+        target_date = CommunityService.get_shame_target_date(community)
+
         # 2. 만약 커뮤니티가 방금 생성되어 이전 인증일이 아예 없다면 빈 값 반환
         if not target_date:
             return Member.objects.none()
-        
-        certified_users = Post.objects.filter(
-            com_uuid=com_uuid, 
-            created_at__date=target_date
-        ).values_list('user_id', flat=True)
-        
-        return Member.objects.filter(com_uuid=com_uuid).exclude(user_id__in=certified_users)
+
+        # 3. 캐시 -> 스냅샷 테이블 순으로 조회, 둘 다 없으면(스케줄러 실행 전) 그 자리에서 생성
+        key = CommunityService._shame_cache_key(community.pk, target_date)
+        member_ids = cache.get(key)
+        if member_ids is None:
+            snapshot = ShameSnapshot.objects.filter(com_uuid=community, target_date=target_date).first()
+            if snapshot is None:
+                snapshot = CommunityService.build_shame_snapshot(community, target_date)
+            member_ids = snapshot.member_ids
+            cache.set(key, member_ids, settings.HALL_OF_SHAME_CACHE_SECONDS)
+
+        return Member.objects.filter(pk__in=member_ids).order_by('joined_at', 'pk')
 
 class PostService:
     @staticmethod
@@ -123,19 +265,77 @@ class PostService:
         return Post.objects.filter(
             user_id=user,
             com_uuid=community_id,
-            created_at__date=today
+            cert_date=today
         ).exists()
 
     @staticmethod
-    @transaction.atomic
-    def process_certification(user, com_id, image, latitude, longitude):
+    def get_today_feed(user, com_uuid):
         """
-        인증하기 핵심 로직: (인증 요일 고려)
-        1. 지각 체크 2. 포스트 생성 3. 멤버 카운트++ 4. 유저 점수 업데이트
+        오늘자 피드 (쿼리 1번)
+        - viewer_certified: 보는 사람이 오늘 이 커뮤니티에 인증했는지 (블러 여부 판단용)
+        - author_nickname: 작성자의 커뮤니티 닉네임
+        user=None이면 블러 없이 조회합니다. (커뮤니티 캐시용)
         """
+        today = timezone.now().date()
+        if user is None:
+            viewer_certified = Value(True)
+        elif user.is_authenticated:
+            viewer_certified = Exists(Post.objects.filter(
+                user_id=user, com_uuid=OuterRef('com_uuid'), cert_date=today
+            ))
+        else:
+            viewer_certified = Value(False)
+        return Post.objects.filter(com_uuid=com_uuid, cert_date=today).annotate(
+            viewer_certified=viewer_certified,
+            author_nickname=PostService.author_nickname_subquery()
+        )
+
+    @staticmethod
+    def author_nickname_subquery():
+        """Post 쿼리셋에 annotate 할 수 있는 '작성자의 커뮤니티 닉네임' 서브쿼리"""
+        return Subquery(
+            Member.objects.filter(user_id=OuterRef('user_id'), com_uuid=OuterRef('com_uuid'))
+            .values('nick_name')[:1]
+        )
+
+    @staticmethod
+    def get_my_feed(user):
         """
-        인증하기 핵심 로직: (인증 요일 고려)
-        1. 지각 체크 2. 포스트 생성 3. 멤버 카운트++ 4. 유저 점수 업데이트
+        내가 가입한 모든 커뮤니티의 오늘자 피드
+        반환값: ([{com_uuid, com_name, certified_today}, ...], 포스트 쿼리셋)
+        """
+        today = timezone.now().date()
+
+        # 1. 가입한 커뮤니티와 커뮤니티별 나의 오늘 인증 여부 (쿼리 1번)
+        communities = list(
+            Community.objects.filter(member__user_id=user)
+            .annotate(certified_today=Exists(Post.objects.filter(
+                user_id=user, com_uuid=OuterRef('pk'), cert_date=today
+            )))
+            .order_by('com_name', 'pk')
+            .values('com_uuid', 'com_name', 'certified_today')
+        )
+        certified = [row['com_uuid'] for row in communities if row['certified_today']]
+
+        # 2. 전체 커뮤니티의 오늘자 포스트 (블러 여부는 커뮤니티별 인증 여부로 결정)
+        if certified:
+            viewer_certified = ExpressionWrapper(Q(com_uuid__in=certified), output_field=BooleanField())
+        else:
+            viewer_certified = Value(False)
+        posts = Post.objects.filter(
+            com_uuid__in=[row['com_uuid'] for row in communities], cert_date=today
+        ).annotate(
+            viewer_certified=viewer_certified,
+            author_nickname=PostService.author_nickname_subquery()
+        )
+        return communities, posts
+
+    @staticmethod
+    def process_certification(user, com_id, image, latitude, longitude, uploaded_key=None, post_id=None):
+        """
+        인증하기: 1) 이미지를 스토리지에 먼저 업로드 2) 짧은 트랜잭션에서 DB 행만 기록
+        트랜잭션 시간이 클라이언트 업로드 속도에 좌우되지 않으며, 커밋에 실패하면 올린 파일을 지웁니다.
+        업로드 티켓으로 클라이언트가 직접 올린 경우 uploaded_key(스토리지 경로)와 post_id를 넘깁니다.
         """
         # View에서 이미 Community Object를 넘겨줌 (혹은 UUID/String)
         if isinstance(com_id, Community):
@@ -147,73 +347,175 @@ class PostService:
              except Community.DoesNotExist:
                  # PK(UUID)로 재시도
                  community = Community.objects.get(pk=com_id)
-                 
+
+        # 가입하지 않은 커뮤니티라면 업로드 전에 실패
         member = Member.objects.get(user_id=user, com_uuid=community)
+
+        if uploaded_key:
+            # 티켓 업로드: 파일은 이미 스토리지에 있으므로 내용 해시로 등록만 함
+            if Post.objects.filter(pk=post_id).exists():
+                raise ValidationError("이미 확정된 업로드입니다.")
+            image_name = store_image(uploaded_key)
+        else:
+            # 1. 업로드 (트랜잭션 밖, 같은 내용이 이미 있으면 업로드 생략)
+            post_id = uuid.uuid4()
+            image_name = store_image(image)
+
+        # 2. DB 기록 (짧은 트랜잭션)
+        try:
+            return PostService.write_certification(user, community, member, post_id, image_name, latitude, longitude)
+        except Exception:
+            # 실패 시 참조 해제 (티켓 업로드는 재시도할 수 있도록 바로 지우지 않음)
+            release_blob(image_name, collect=not uploaded_key)
+            raise
+
+    @staticmethod
+    @transaction.atomic
+    def write_certification(user, community, member, post_id, image_name, latitude, longitude):
+        """
+        인증하기 핵심 로직: (인증 요일 고려)
+        1. 지각 체크 2. 오늘 첫 인증 판정 + 멤버 카운트++ 3. 포스트 생성 4. 유저 점수 기록
+        동시에 여러 번 업로드되어도 '오늘 첫 인증'은 조건부 UPDATE 한 번으로만 판정됩니다.
+        """
         now = timezone.now()
         today_date = now.date()
         
-        # 1. 중복 업로드 체크
-        already_certified = PostService.is_user_certified_today(user, com_id)
+        # 1. 요일 및 시간 판정
+        is_cert_day = community.is_cert_day(today_date)
+        # 지각 여부 계산 (자율 요일은 지각 없음)
+        is_late = is_cert_day and now.time() > community.cert_time
         
-        # 2. 요일 및 시간 판정
-        weekdays_map = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        today_str = weekdays_map[now.weekday()]
-        is_cert_day = today_str in community.cert_days
-        # 지각 여부 계산
-        is_late = now.time() > community.cert_time
+        # 2. 오늘 첫 인증인지 판정하면서 카운트 증가
+        #    last_cert_date가 오늘이 아닌 행만 갱신되므로, 동시에 요청이 와도 한 건만 1을 반환합니다.
+        #    이 UPDATE가 멤버 행을 잠그므로 마감 페널티(apply_penalty)와도 순서가 정해집니다.
+        is_first_today = Member.objects.filter(pk=member.pk)\
+            .exclude(last_cert_date=today_date)\
+            .update(
+                last_cert_date=today_date,
+                cert_cnt=F('cert_cnt') + 1,
+                is_late_cnt=F('is_late_cnt') + (1 if is_late else 0)
+            )
         
-        # 3. 점수 및 카운트 계산
-        point = 0
-        current_is_late = False
-        
-        if not already_certified:
-            if is_cert_day:
-                # [인증 요일] 정시 +10, 지각 +5 (10-5)
-                point = 5 if is_late else 10
-                current_is_late = is_late
-                member.cert_cnt += 1
-                if is_late:
-                    member.is_late_cnt += 1
-            else:
-                # [자율 요일] 지각 체크 없이 무조건 +5
-                point = 5
-                member.cert_cnt += 1
-            
-            # 유저 점수 및 멤버 통계 반영
-            user.score += point
-            user.save()
-            member.save()
+        # 3. 오늘 첫 인증이면 리더보드 갱신 (점수는 포스트 생성 후 기록)
+        if is_first_today:
+            member.refresh_from_db(fields=['cert_cnt', 'is_late_cnt', 'last_cert_date'])
+            transaction.on_commit(lambda: leaderboard.record_change(member))
         
         # 4. 포스트 생성
         post = Post.objects.create(
+            post_id=post_id,
             user_id=user,
             com_uuid=community,
-            image_url=image, # 실제론 S3 업로드 후 URL 저장 로직 필요
-            is_late=current_is_late if is_cert_day else False,
+            image_url=image_name, # 이미 업로드된 스토리지 경로
+            is_late=bool(is_first_today) and is_late,
             latitude=latitude,
-            longitude=longitude
+            longitude=longitude,
+            cert_date=today_date
         )
-        post.save()
+
+        # 5. 유저 점수는 원장에 INSERT로만 기록 (User 행을 잠그지 않음)
+        if is_first_today:
+            PostService.award_certification(user, community, post, is_late, is_cert_day)
+
+        # 6. 커밋 후 워커 풀에서 축소/EXIF 제거/썸네일/WebP 생성
+        if image_name:
+            transaction.on_commit(lambda: images.submit(images.process_post_image, post_id))
+
+        # 마감 후 늦게 인증했다면 오늘자 수치의 전당 스냅샷을 다시 만들도록 무효화
+        if is_late:
+            transaction.on_commit(lambda: CommunityService.invalidate_shame_snapshot(community, today_date))
+
+        # 커뮤니티 캐시(피드/랭킹/수치의 전당) 무효화
+        caching.invalidate(community.pk)
         
         return post
 
+    @staticmethod
+    def award_certification(user, community, post, is_late, is_cert_day):
+        """
+        그날 인증으로 인정된 포스트에 점수 기록: [인증 요일] 정시 +10, 지각 +5 (10-5) / [자율 요일] 무조건 +5
+        마감 시각에 이미 미인증 페널티를 받았다면 돌려줌 (지각 인증도 인증으로 인정)
+        이 포스트에 묶어 기록하므로 포스트를 삭제하면 환급도 함께 취소됩니다.
+        """
+        point = 5 if (is_late or not is_cert_day) else 10
+        ScoreService.record(user, point, ScoreEntry.REASON_CERT, community=community, post=post)
+
+        if is_late:
+            # 이 유저가 그날 실제로 받은 페널티가 있고 아직 환급되지 않았을 때만 (마감 후 가입자는 페널티 없음)
+            penalty = ScoreEntry.objects.filter(
+                user_id=user, com_uuid=community, reason=ScoreEntry.REASON_PENALTY,
+                target_date=post.cert_date, refund__isnull=True
+            ).first()
+            if penalty:
+                ScoreService.record(user, PENALTY_POINT, ScoreEntry.REASON_ROLLBACK,
+                                    community=community, post=post, refund_of=penalty)
+
+    @staticmethod
+    def apply_missed_penalty(user, community, cert_date, joined_at):
+        """
+        마감 처리(PenaltyShard)가 끝난 날짜의 마지막 인증을 지우면 그날은 미인증이 되므로 페널티를 직접 기록합니다.
+        마감 작업은 이미 이 멤버를 건너뛰었으므로, 여기서 기록하지 않으면 수치의 전당과 원장이 어긋납니다.
+        (마감 때 이미 페널티를 받았다면 환급 취소로 되살아나고, 마감 후 가입자는 원래 페널티 대상이 아님)
+        """
+        shard = PenaltyShard.objects.filter(run__target_date=cert_date, com_uuid=community)\
+            .order_by('finished_at').first()
+        if shard is None:
+            # 아직 마감 처리 전이면 마감 작업이 차감
+            return None
+        if joined_at > shard.finished_at:
+            return None
+        if ScoreEntry.objects.filter(
+            user_id=user, com_uuid=community, reason=ScoreEntry.REASON_PENALTY, target_date=cert_date
+        ).exists():
+            return None
+        return ScoreService.record(user, -PENALTY_POINT, ScoreEntry.REASON_PENALTY,
+                                   community=community, target_date=cert_date)
+
     @staticmethod
     @transaction.atomic
     def rollback_certification(post):
         """포스트 삭제 시 점수 및 카운트 복구"""
         user = post.user_id # FK field name is user_id
-        member = Member.objects.get(user_id=user, com_uuid=post.com_uuid)
+        # 멤버 행을 잠가 진행 중인 마감 페널티(apply_penalty)와 순서를 맞춤
+        member = Member.objects.select_for_update().get(user_id=user, com_uuid=post.com_uuid)
+        cert_date = post.cert_date
         
-        # 점수 차감 복구
-        point = 5 if post.is_late else 10
-        user.score -= point
-        user.save()
+        # 점수 차감 복구: 이 포스트로 실제 받은 점수만큼만 되돌림
+        awarded = ScoreEntry.objects.filter(post=post).aggregate(total=Sum('delta'))['total'] or 0
+        if awarded:
+            ScoreService.record(user, -awarded, ScoreEntry.REASON_ROLLBACK, community=post.com_uuid, post=post)
+            # 환급도 함께 되돌렸으므로 페널티 연결을 풀어 다시 인증하면 한 번 더 환급받을 수 있게 함
+            ScoreEntry.objects.filter(post=post, refund_of__isnull=False).update(refund_of=None)
         
-        # 멤버 카운트 복구
-        member.cert_cnt -= 1
-        if post.is_late:
-            member.is_late_cnt -= 1
-        member.save()
+            # 카운트된 포스트를 지우면 그날 남은 포스트 중 가장 먼저 올린 것이 인증으로 인정됨
+            successor = Post.objects.filter(user_id=user, com_uuid=post.com_uuid, cert_date=cert_date)\
+                .exclude(pk=post.pk).order_by('created_at', 'pk').first()
+            if successor is None:
+                # 멤버 카운트 복구 후, 다시 인증할 수 있도록 하루 1회 표시 해제
+                Member.objects.filter(pk=member.pk).update(
+                    cert_cnt=F('cert_cnt') - 1,
+                    is_late_cnt=F('is_late_cnt') - (1 if post.is_late else 0)
+                )
+                Member.objects.filter(pk=member.pk, last_cert_date=cert_date).update(last_cert_date=None)
+                PostService.apply_missed_penalty(user, post.com_uuid, cert_date, member.joined_at)
+            else:
+                # 인증 횟수는 그대로, 지각 여부만 남은 포스트의 작성 시각으로 다시 판정
+                community = post.com_uuid
+                is_cert_day = community.is_cert_day(cert_date)
+                is_late = is_cert_day and successor.created_at.time() > community.cert_time
+                Post.objects.filter(pk=successor.pk).update(is_late=is_late)
+                successor.is_late = is_late
+                Member.objects.filter(pk=member.pk).update(
+                    is_late_cnt=F('is_late_cnt') + int(is_late) - int(post.is_late)
+                )
+                PostService.award_certification(user, community, successor, is_late, is_cert_day)
+            member.refresh_from_db(fields=['cert_cnt', 'is_late_cnt', 'last_cert_date'])
+            transaction.on_commit(lambda: leaderboard.record_change(member))
+
+        # 삭제된 포스트의 날짜가 수치의 전당 기준일이었다면 스냅샷 다시 생성
+        community = post.com_uuid
+        transaction.on_commit(lambda: CommunityService.invalidate_shame_snapshot(community, cert_date))
+        caching.invalidate(community.pk)
         
         # 포스트 삭제
-        post.delete()
\ No newline at end of file
+        post.delete()
@@ -0,0 +1,42 @@
+# api/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Community, Member, Post
+from . import caching, deadlines, leaderboard
+from .storage import release_blob
+
+
+@receiver(post_delete, sender=Member)
+def remove_member_from_leaderboard(sender, instance, **kwargs):
+    # 탈퇴/커뮤니티 삭제로 멤버가 지워지면 랭킹에서도 제거
+    # (삭제가 끝나면 instance의 pk가 None이 되므로 커밋 전에 키를 복사해 둠)
+    removed = Member(mem_idx=instance.mem_idx, com_uuid_id=instance.com_uuid_id)
+    transaction.on_commit(lambda: leaderboard.record_change(removed, removed=True))
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    # 다른 포스트/멤버가 같은 이미지를 쓰지 않을 때만 스토리지에서 삭제됨
+    release_blob(instance.image_url.name)
+
+
+@receiver(post_delete, sender=Member)
+def release_member_images(sender, instance, **kwargs):
+    release_blob(instance.profile_img_url.name)
+    release_blob(instance.shame_img_url.name)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_member_community(sender, instance, **kwargs):
+    # 가입/탈퇴/프로필 수정: 랭킹, 수치의 전당, 피드 닉네임이 바뀜
+    caching.invalidate(instance.com_uuid_id)
+
+
+@receiver(post_save, sender=Community)
+@receiver(post_delete, sender=Community)
+def invalidate_community(sender, instance, **kwargs):
+    caching.invalidate(instance.pk)
+    # 추가/삭제/마감 시간 변경: 스케줄러의 마감 휠 다시 만들기
+    deadlines.invalidate_wheel()
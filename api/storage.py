@@ -0,0 +1,194 @@
+# api/storage.py
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import StoredBlob, Post, Member
+
+BLOB_PREFIX = 'blobs/'
+CHUNK_SIZE = 64 * 1024
+# 티켓 업로드 파일은 내용 해시를 이미지 워커가 계산하기 전까지 임시 digest로 등록
+PENDING_PREFIX = 'pending:'
+
+
+def _digest(file):
+    """파일 내용의 sha256 (업로드 파일/스토리지 파일 모두 청크 단위로 읽음)"""
+    sha = hashlib.sha256()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+        sha.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return sha.hexdigest()
+
+
+def blob_name(digest, filename):
+    """blobs/ab/abcdef....jpg (앞 두 글자로 폴더를 나눔)"""
+    ext = os.path.splitext(filename)[1].lower() or '.jpg'
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}{ext}"
+
+
+def _acquire(digest, name, size):
+    """참조 수를 1 늘리고 행이 새로 만들어졌는지 반환 (GC와 경합하지 않도록 행 잠금)"""
+    with transaction.atomic():
+        blob, created = StoredBlob.objects.select_for_update().get_or_create(
+            digest=digest,
+            defaults={'name': name, 'size': size}
+        )
+        StoredBlob.objects.filter(pk=blob.pk).update(ref_cnt=F('ref_cnt') + 1, updated_at=timezone.now())
+    return blob.name, created
+
+
+def store_blob(file):
+    """
+    업로드 파일을 내용 해시 경로에 저장하고 참조 수를 올립니다.
+    같은 내용이 이미 저장되어 있으면 업로드를 건너뛰고 기존 경로를 반환합니다.
+    DB 트랜잭션 밖에서 호출해야 업로드 시간 동안 행 잠금을 잡고 있지 않습니다.
+    """
+    if not file:
+        return None
+    digest = _digest(file)
+    name = blob_name(digest, getattr(file, 'name', ''))
+
+    # 1. 처음 보는 내용이면 먼저 업로드
+    uploaded = False
+    if not StoredBlob.objects.filter(digest=digest).exists() and not default_storage.exists(name):
+        uploaded = _save_as(name, file)
+
+    # 2. 참조 등록
+    stored_name, created = _acquire(digest, name, getattr(file, 'size', 0) or 0)
+    if uploaded and stored_name != name:
+        # 그 사이 같은 내용이 다른 경로(티켓 업로드)로 등록됨
+        delete_blob(name)
+    elif created and not default_storage.exists(stored_name):
+        # 그 사이 GC가 파일을 지웠다면 다시 업로드
+        file.seek(0)
+        _save_as(stored_name, file)
+    return stored_name
+
+
+def _save_as(name, file):
+    """
+    정확히 name 경로에 저장하고 새로 올렸는지 반환합니다.
+    스토리지가 다른 이름으로 저장했다면 그 사이 같은 경로(같은 내용)가 먼저 올라온 것이므로 사본을 지웁니다.
+    """
+    saved = default_storage.save(name, file)
+    if saved != name:
+        delete_blob(saved)
+        return False
+    return True
+
+
+def store_image(value):
+    """업로드 파일이면 store_blob, 티켓으로 올라온 스토리지 경로(str)면 adopt_blob"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return adopt_blob(value)
+    return store_blob(value)
+
+
+def adopt_blob(name):
+    """
+    클라이언트가 업로드 티켓으로 직접 올린 파일을 저장소에 등록합니다.
+    파일을 내려받지 않고 경로 기준으로 등록하므로 같은 티켓으로 다시 확정해도 같은 행을 씁니다.
+    내용 해시와 중복 정리는 이미지 워커가 파일을 읽을 때 처리합니다. (settle_blob)
+    """
+    with transaction.atomic():
+        blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+            name=name,
+            defaults={'digest': f"{PENDING_PREFIX}{uuid.uuid4().hex}", 'size': default_storage.size(name)}
+        )
+        StoredBlob.objects.filter(pk=blob.pk).update(ref_cnt=F('ref_cnt') + 1, updated_at=timezone.now())
+    return name
+
+
+def settle_blob(name):
+    """
+    티켓으로 등록된 파일의 내용 해시를 확정합니다. (이미지 워커에서 호출)
+    같은 내용이 이미 있으면 참조하던 Post/Member와 참조 수를 기존 파일로 옮기고,
+    이 파일은 참조 0으로 남겨 주기적 정리(collect_unused_blobs)에 맡깁니다.
+    반환값: (앞으로 쓸 경로, 읽은 파일 내용 또는 None)
+    """
+    if not StoredBlob.objects.filter(name=name, digest__startswith=PENDING_PREFIX).exists():
+        return name, None
+    with default_storage.open(name, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    # 같은 내용이 동시에 업로드 파일(store_blob)로 등록되면 digest가 겹치므로 한 번 더 시도
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                pending = StoredBlob.objects.select_for_update()\
+                    .filter(name=name, digest__startswith=PENDING_PREFIX).first()
+                if pending is None:
+                    return name, data
+                existing = StoredBlob.objects.select_for_update().filter(digest=digest).first()
+                if existing is None:
+                    StoredBlob.objects.filter(pk=pending.pk).update(digest=digest, size=len(data))
+                    return name, data
+
+                # 1. 참조하던 행을 기존 파일로 2. 참조 수 이동
+                Post.objects.filter(image_url=name).update(image_url=existing.name)
+                for field in ('profile_img_url', 'shame_img_url'):
+                    Member.objects.filter(**{field: name}).update(**{field: existing.name})
+                now = timezone.now()
+                StoredBlob.objects.filter(pk=existing.pk).update(ref_cnt=F('ref_cnt') + pending.ref_cnt, updated_at=now)
+                StoredBlob.objects.filter(pk=pending.pk).update(ref_cnt=0, updated_at=now)
+            return existing.name, data
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def release_blob(name, collect=True):
+    """
+    참조 수를 1 줄이고, 더 이상 아무도 쓰지 않으면 커밋 후 파일을 정리합니다.
+    collect=False면 바로 지우지 않고 주기적 정리(collect_unused_blobs)에 맡깁니다.
+    """
+    if not name:
+        return
+    StoredBlob.objects.filter(name=name).update(ref_cnt=F('ref_cnt') - 1, updated_at=timezone.now())
+    if collect:
+        transaction.on_commit(lambda: collect_blob(name))
+
+
+def collect_blob(name):
+    """참조 수가 0인 파일과 변환본을 스토리지에서 지웁니다. (행을 잠근 채 다시 확인)"""
+    from .images import variant_names
+
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update(skip_locked=True)\
+            .filter(name=name, ref_cnt__lte=0).first()
+        if blob is None:
+            return False
+        for stored in [blob.name] + variant_names(blob.name):
+            delete_blob(stored)
+        blob.delete()
+    return True
+
+
+def collect_unused_blobs(grace=timedelta(minutes=10)):
+    """참조가 끊긴 채 남은 파일 정리 (스케줄러에서 주기적으로 실행)"""
+    names = StoredBlob.objects.filter(ref_cnt__lte=0, updated_at__lt=timezone.now() - grace)\
+        .values_list('name', flat=True)
+    removed = sum(1 for name in list(names) if collect_blob(name))
+    if removed:
+        print(f"--- [스케줄러] 사용되지 않는 이미지 {removed}개 정리 ---")
+    return removed
+
+
+def delete_blob(name):
+    """스토리지에서 파일 삭제 (실패해도 예외를 올리지 않음)"""
+    if not name:
+        return
+    try:
+        default_storage.delete(name)
+    except Exception as e:
+        print(f"--- [스토리지 에러] {name} 삭제 실패: {e} ---")
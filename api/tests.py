@@ -1,3 +1,1498 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock, skipIf, skipUnless
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from . import caching, checks, deadlines, images, leaderboard, operator, storage, uploads, weekdays
+from .models import User, Community, Member, Post, Chat, ScoreEntry, StoredBlob, ShameSnapshot, PenaltyRun, PenaltyShard
+from .serializers import CommunitySerializer, PostSerializer
+from .services import PostService, CommunityService, ScoreService, PENALTY_POINT
 
-# Create your tests here.
+# 단위 테스트는 실제 Redis 없이 프로세스 메모리 캐시로 실행 (공유 캐시 확인은 SharedRedisCacheTest)
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+CONFIGURED_CACHES = settings.CACHES
+local_cache = override_settings(CACHES=LOCMEM_CACHES)
+
+
+def setUpModule():
+    local_cache.enable()
+
+
+def tearDownModule():
+    local_cache.disable()
+
+
+def redis_available():
+    """설정된 캐시가 Redis이고 지금 연결할 수 있는지"""
+    config = CONFIGURED_CACHES.get('default', {})
+    if config.get('BACKEND') != 'django.core.cache.backends.redis.RedisCache':
+        return False
+    try:
+        import redis
+        return redis.Redis.from_url(config['LOCATION'], socket_connect_timeout=0.5).ping()
+    except Exception:
+        return False
+
+
+def make_community(com_id='test-com', cert_time=datetime.time(23, 59, 59)):
+    return Community.objects.create(
+        com_id=com_id,
+        com_name='테스트 커뮤니티',
+        description='',
+        cert_mask=weekdays.ALL_DAYS,
+        cert_time=cert_time,
+    )
+
+
+def make_member(community, login_id):
+    user = User.objects.create_user(login_id=login_id, user_name=login_id, password='pw')
+    member = Member.objects.create(user_id=user, com_uuid=community, nick_name=login_id)
+    return user, member
+
+
+class CertificationTest(TestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.user, self.member = make_member(self.community, 'cert-user')
+
+    def test_only_first_upload_counts(self):
+        first = PostService.process_certification(self.user, self.community, None, None, None)
+        second = PostService.process_certification(self.user, self.community, None, None, None)
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.cert_cnt, 1)
+        self.assertEqual(self.member.last_cert_date, timezone.now().date())
+        self.assertEqual(ScoreEntry.objects.filter(post=first).count(), 1)
+        self.assertFalse(ScoreEntry.objects.filter(post=second).exists())
+
+    def test_rollback_restores_counters(self):
+        post = PostService.process_certification(self.user, self.community, None, None, None)
+        PostService.rollback_certification(post)
+
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.cert_cnt, 0)
+        self.assertIsNone(self.member.last_cert_date)
+        self.assertEqual(sum(ScoreEntry.objects.filter(user_id=self.user).values_list('delta', flat=True)), 0)
+
+
+def use_local_storage(testcase):
+    """GCS 대신 임시 폴더의 파일 스토리지를 사용 (업로드 티켓도 로컬 백엔드로)"""
+    media_root = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    storage_settings = override_settings(
+        MEDIA_ROOT=media_root,
+        UPLOAD_BACKEND='local',
+        STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        },
+    )
+    storage_settings.enable()
+    testcase.addCleanup(storage_settings.disable)
+
+
+class WeekdayMaskTest(TestCase):
+    MONDAY = datetime.date(2026, 1, 19)
+
+    def test_mask_helpers(self):
+        mask = weekdays.to_mask(['Mon', 'wed', 'FRI'])
+        self.assertEqual(mask, 0b10101)
+        self.assertEqual(weekdays.to_days(mask), ['Mon', 'Wed', 'Fri'])
+        self.assertTrue(weekdays.is_cert_day(mask, self.MONDAY))
+        self.assertFalse(weekdays.is_cert_day(mask, self.MONDAY + datetime.timedelta(days=1)))
+        # 월요일 이전 가장 가까운 인증일은 지난 금요일
+        self.assertEqual(weekdays.previous_cert_day(mask, self.MONDAY), self.MONDAY - datetime.timedelta(days=3))
+        self.assertEqual(weekdays.previous_cert_day(mask, self.MONDAY, include_today=True), self.MONDAY)
+        self.assertIsNone(weekdays.previous_cert_day(0, self.MONDAY))
+        with self.assertRaises(ValueError):
+            weekdays.to_mask(['Funday'])
+
+    def test_certifying_on(self):
+        weekday = make_community('weekday')
+        weekday.cert_mask = weekdays.to_mask(['Mon', 'Tue', 'Wed', 'Thu', 'Fri'])
+        weekday.save()
+        weekend = make_community('weekend')
+        weekend.cert_mask = weekdays.to_mask(['Sat', 'Sun'])
+        weekend.save()
+
+        self.assertEqual(list(Community.objects.certifying_on(self.MONDAY)), [weekday])
+        self.assertEqual(list(Community.objects.certifying_on(6)), [weekend])
+
+    def test_serializer_keeps_day_list(self):
+        serializer = CommunitySerializer(data={
+            'com_id': 'api-days', 'com_name': 'days', 'description': 'days',
+            'cert_days': ['mon', 'Thu'], 'cert_time': '09:00:00',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        community = serializer.save()
+        self.assertEqual(community.cert_mask, 0b1001)
+        self.assertEqual(CommunitySerializer(community).data['cert_days'], ['Mon', 'Thu'])
+        self.assertNotIn('cert_mask', CommunitySerializer(community).data)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.user, self.member = make_member(self.community, 'chatty')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        base = timezone.now()
+        self.chats = []
+        for i in range(7):
+            chat = Chat.objects.create(com_uuid=self.community, user_id=self.user, content=f'm{i}')
+            # 3, 4번은 같은 시각 (pk로 순서 구분)
+            created_at = base + datetime.timedelta(seconds=min(i, 3) if i != 4 else 3)
+            Chat.objects.filter(pk=chat.pk).update(created_at=created_at)
+            self.chats.append(chat)
+
+    def history(self, **params):
+        response = self.client.get('/api/chats/chat_history/', {'com_uuid': str(self.community.com_uuid), **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def contents(self, data):
+        return [row['content'] for row in data['results']]
+
+    def test_scroll_back_and_catch_up(self):
+        order = [chat.content for chat in sorted(
+            Chat.objects.filter(com_uuid=self.community), key=lambda c: (c.created_at, c.pk)
+        )]
+
+        latest = self.history(page_size=3)
+        self.assertEqual(self.contents(latest), order[-3:])
+        self.assertTrue(latest['has_more'])
+
+        older = self.history(page_size=3, before=latest['before'])
+        self.assertEqual(self.contents(older), order[-6:-3])
+        oldest = self.history(page_size=3, before=older['before'])
+        self.assertEqual(self.contents(oldest), order[:1])
+        self.assertFalse(oldest['has_more'])
+        self.assertIsNone(oldest['before'])
+
+        # 재접속: 마지막으로 받은 커서 이후만
+        self.assertEqual(self.history(after=latest['after'])['results'], [])
+        new = Chat.objects.create(com_uuid=self.community, user_id=self.user, content='new')
+        Chat.objects.filter(pk=new.pk).update(created_at=timezone.now() + datetime.timedelta(minutes=1))
+        caught_up = self.history(after=latest['after'])
+        self.assertEqual(self.contents(caught_up), ['new'])
+        self.assertNotEqual(caught_up['after'], latest['after'])
+
+    def test_history_nicknames_use_constant_queries(self):
+        friend, friend_member = make_member(self.community, 'friend')
+        outsider = User.objects.create_user(login_id='outsider', user_name='탈퇴한 유저', password='pw')
+        for i in range(30):
+            Chat.objects.create(com_uuid=self.community, user_id=[friend, outsider][i % 2], content=f'x{i}')
+        friend_member.nick_name = '바뀐 닉네임'
+        friend_member.save()
+
+        # ETag용 마지막 채팅 시각 1번 + 채팅 1번 + 멤버 닉네임 1번 + 멤버가 아닌 유저 이름 1번
+        with self.assertNumQueries(4):
+            data = self.history(page_size=40)
+        nicknames = {row['sender_id']: row['sender_nickname'] for row in data['results']}
+        self.assertEqual(nicknames[friend.user_id], '바뀐 닉네임')
+        self.assertEqual(nicknames[outsider.user_id], '탈퇴한 유저')
+        self.assertEqual(nicknames[self.user.user_id], 'chatty')
+
+    def test_bad_cursor(self):
+        response = self.client.get('/api/chats/chat_history/', {'com_uuid': str(self.community.com_uuid), 'before': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_is_newest_first(self):
+        first = PostService.process_certification(self.user, self.community, None, None, None)
+        second = PostService.process_certification(self.user, self.community, None, None, None)
+        response = self.client.get('/api/posts/my-history/', {'page_size': 1})
+        self.assertEqual([row['post_id'] for row in response.data['results']], [str(second.post_id)])
+        response = self.client.get('/api/posts/my-history/', {'page_size': 1, 'before': response.data['before']})
+        self.assertEqual([row['post_id'] for row in response.data['results']], [str(first.post_id)])
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboard._boards.clear()
+        self.community = make_community()
+        joined = timezone.now() - datetime.timedelta(days=10)
+        # (login_id, 인증횟수, 지각횟수, 가입 순서)
+        self.members = {}
+        for i, (login_id, cert_cnt, is_late_cnt) in enumerate([
+            ('late-joiner', 3, 1), ('top', 4, 0), ('early-bird', 3, 1), ('punctual', 3, 0), ('idle', 0, 0),
+        ]):
+            user, member = make_member(self.community, login_id)
+            joined_at = joined + datetime.timedelta(days=4 - i) if login_id != 'early-bird' else joined
+            Member.objects.filter(pk=member.pk).update(cert_cnt=cert_cnt, is_late_cnt=is_late_cnt, joined_at=joined_at)
+            self.members[login_id] = (user, member)
+
+    def order(self, offset=0, limit=50):
+        rankings, _ = CommunityService.get_community_rankings(self.community.pk, offset, limit)
+        return [(rank, member.nick_name) for rank, member in rankings]
+
+    def test_rank_order_and_tie_breaking(self):
+        # 인증횟수 DESC -> 지각횟수 ASC -> 먼저 가입한 순
+        self.assertEqual(self.order(), [
+            (1, 'top'), (2, 'punctual'), (3, 'early-bird'), (4, 'late-joiner'), (5, 'idle'),
+        ])
+
+        # 모두 같으면 mem_idx로 항상 같은 순서
+        a, b = sorted(str(mem_idx) for mem_idx in Member.objects.values_list('mem_idx', flat=True)[:2])
+        self.assertLess(leaderboard.rank_key(1, 0, timezone.now(), a), leaderboard.rank_key(1, 0, timezone.now(), b))
+
+    def test_page_boundaries(self):
+        self.assertEqual(self.order(0, 2), [(1, 'top'), (2, 'punctual')])
+        self.assertEqual(self.order(2, 2), [(3, 'early-bird'), (4, 'late-joiner')])
+        self.assertEqual(self.order(4, 2), [(5, 'idle')])
+        self.assertEqual(self.order(5, 2), [])
+
+        client = APIClient()
+        response = client.get(f'/api/communities/{self.community.pk}/rankings/', {'offset': 3, 'limit': 1})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([(row['rank'], row['nick_name']) for row in response.data['results']], [(4, 'late-joiner')])
+
+    def test_my_rank_outside_requested_page(self):
+        user, member = self.members['idle']
+        client = APIClient()
+        client.force_authenticate(user)
+        top = client.get(f'/api/communities/{self.community.pk}/rankings/', {'limit': 2})
+        self.assertNotIn(str(member.mem_idx), [row['mem_idx'] for row in top.data['results']])
+
+        response = client.get(f'/api/communities/{self.community.pk}/my_rank/')
+        self.assertEqual((response.data['rank'], response.data['count']), (5, 5))
+
+    def test_record_change_moves_member_and_invalidates_other_processes(self):
+        self.order()
+        user, member = self.members['idle']
+        board = leaderboard.get_leaderboard(self.community.pk)
+        for _ in range(5):
+            Member.objects.filter(pk=member.pk).update(cert_cnt=F('cert_cnt') + 1)
+            member.refresh_from_db()
+            leaderboard.record_change(member)
+        # 이 프로세스의 랭킹은 DB를 다시 읽지 않고 해당 멤버만 갱신
+        with self.assertNumQueries(0):
+            self.assertEqual(board.rank_of(member.mem_idx), 1)
+        self.assertEqual(self.order(0, 1), [(1, 'idle')])
+
+        # 다른 프로세스의 변경(공유 버전만 오름) -> 다음 조회 때 DB에서 재구성
+        Member.objects.filter(pk=member.pk).update(cert_cnt=0)
+        cache.incr(leaderboard._version_key(str(self.community.pk)))
+        self.assertEqual(self.order()[-1], (5, 'idle'))
+
+        # 버전 키가 캐시에서 사라져도 예전 번호를 재사용하지 않음
+        Member.objects.filter(pk=member.pk).update(cert_cnt=10)
+        cache.delete(leaderboard._version_key(str(self.community.pk)))
+        self.assertEqual(self.order(0, 1), [(1, 'idle')])
+
+        # 탈퇴
+        with self.captureOnCommitCallbacks(execute=True):
+            member.delete()
+        self.assertEqual(len(leaderboard.get_leaderboard(self.community.pk)), 4)
+        self.assertNotIn('idle', [name for _, name in self.order()])
+
+
+    def test_other_process_applies_published_deltas(self):
+        self.order()
+        board = leaderboard.get_leaderboard(self.community.pk)
+        user, member = self.members['idle']
+        for _ in range(5):
+            Member.objects.filter(pk=member.pk).update(cert_cnt=F('cert_cnt') + 1)
+            member.refresh_from_db()
+            # 다른 프로세스에서 기록 (이 프로세스의 랭킹은 건드리지 않음)
+            with mock.patch.dict(leaderboard._boards, clear=True):
+                leaderboard.record_change(member)
+
+        # 남겨 둔 변경분만 순서대로 반영하고 DB는 다시 읽지 않음
+        with self.assertNumQueries(0):
+            self.assertIs(leaderboard.get_leaderboard(self.community.pk), board)
+            self.assertEqual(board.rank_of(member.mem_idx), 1)
+
+        # 변경분이 빠진 버전이 있으면 전체 재구성
+        Member.objects.filter(pk=member.pk).update(cert_cnt=0)
+        cache.incr(leaderboard._version_key(str(self.community.pk)))
+        with self.assertNumQueries(1):
+            leaderboard.get_leaderboard(self.community.pk)
+        self.assertEqual(board.rank_of(member.mem_idx), 5)
+
+
+class MemberListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.community = make_community()
+        self.client = APIClient()
+        for i in range(3):
+            make_member(self.community, f'member{i}')
+
+    def count_queries(self, url, params=None):
+        self.client.get(url, params)  # 랭킹/수치의 전당 캐시 채우기
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return len(ctx.captured_queries), response.data
+
+    def test_member_lists_return_community_once_with_constant_queries(self):
+        pk = self.community.com_uuid
+        urls = [
+            (f'/api/communities/{pk}/rankings/', None),
+            (f'/api/communities/{pk}/hall_of_shame/', None),
+            ('/api/members/get_members/', {'com_uuid': str(pk)}),
+        ]
+        before = [self.count_queries(url, params)[0] for url, params in urls]
+
+        for i in range(3, 20):
+            make_member(self.community, f'member{i}')
+        cache.clear()
+        leaderboard._boards.clear()
+        ShameSnapshot.objects.all().delete()
+        for (url, params), queries in zip(urls, before):
+            count, data = self.count_queries(url, params)
+            self.assertEqual(count, queries, url)
+            self.assertEqual(data['community']['com_uuid'], str(pk))
+            self.assertEqual(len(data["results"]), 20, url)
+            self.assertNotIn('community_details', data['results'][0])
+            self.assertNotIn('com_uuid', data['results'][0])
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.user, self.member = make_member(self.community, 'sparse')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            other = make_community(f'other-{i}')
+            make_member(other, f'sparse-{i}')
+            Member.objects.create(user_id=self.user, com_uuid=other, nick_name=f'n{i}')
+            PostService.process_certification(self.user, other, None, None, None)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, [q['sql'] for q in ctx.captured_queries]
+
+    def test_fields_trim_output_and_columns(self):
+        data, queries = self.get('/api/posts/my-history/', {'fields': 'post_id,com_name'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(data['results'][0]), {'post_id', 'com_name'})
+        self.assertNotIn('image_variants', queries[0])
+        self.assertNotIn('"api_community"."description"', queries[0])
+
+        data, queries = self.get(f'/api/communities/{self.community.com_uuid}/', {'fields': 'com_name'})
+        self.assertEqual(data, {'com_name': self.community.com_name})
+        self.assertNotIn('description', queries[0])
+
+    def test_expand_joins_related_object(self):
+        data, queries = self.get('/api/posts/my-history/', {'expand': 'com_uuid', 'fields': 'post_id'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(data['results'][0]), {'post_id', 'com_uuid'})
+        self.assertEqual(data['results'][0]['com_uuid']['com_id'][:6], 'other-')
+        self.assertIn('cert_days', data['results'][0]['com_uuid'])
+
+    def test_chat_without_nicknames_skips_lookup(self):
+        Chat.objects.create(com_uuid=self.community, user_id=self.user, content='hi')
+        data, queries = self.get('/api/chats/chat_history/', {'com_uuid': str(self.community.com_uuid), 'fields': 'content'})
+        self.assertEqual(data['results'], [{'content': 'hi'}])
+        # ETag용 마지막 채팅 시각 + 채팅 (닉네임 조회 없음)
+        self.assertEqual(len(queries), 2)
+
+
+class TodayFeedTest(TestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.viewer, _ = make_member(self.community, 'viewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        for i in range(3):
+            author, _ = make_member(self.community, f'author{i}')
+            post = PostService.process_certification(author, self.community, None, None, None)
+            Post.objects.filter(pk=post.pk).update(image_url=f'posts/{i}.jpg', image_variants={'thumb': f'posts/{i}_thumb.jpg'})
+
+    def feed(self, queries=1, **params):
+        with mock.patch.object(default_storage, 'url', side_effect=lambda name: f'https://cdn/{name}') as url:
+            with self.assertNumQueries(queries):
+                response = self.client.get('/api/posts/', {'com_uuid': str(self.community.com_uuid), **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data, url.call_count
+
+    def test_blur_is_decided_while_serializing(self):
+        data, urls = self.feed(fields='post_id,user_id,image_url,image_variants,author_nickname')
+        self.assertEqual(urls, 0)
+        self.assertEqual({row['image_url'] for row in data}, {images.BLUR_PLACEHOLDER_URL})
+        self.assertEqual({row['image_variants'] == {} for row in data}, {True})
+        self.assertEqual(sorted(row['author_nickname'] for row in data), ['author0', 'author1', 'author2'])
+
+        # 내가 인증하면 다른 사람 사진도 원본으로
+        PostService.process_certification(self.viewer, self.community, None, None, None)
+        data, urls = self.feed(fields='image_url')
+        self.assertTrue(urls)
+        self.assertIn('https://cdn/posts/0.jpg', {row['image_url'] for row in data})
+
+    def test_default_feed_is_cached_per_community(self):
+        cache.clear()
+        masked, _ = self.feed()
+        self.assertEqual({row['image_url'] for row in masked}, {images.BLUR_PLACEHOLDER_URL})
+
+        # 같은 버전이면 DB/스토리지 조회 없이 캐시에서, 블러는 보는 사람 기준
+        author = Post.objects.exclude(user_id=self.viewer).first().user_id
+        self.client.force_authenticate(author)
+        data, urls = self.feed(queries=0)
+        self.assertEqual(urls, 0)
+        self.assertIn('https://cdn/posts/0.jpg', {row['image_url'] for row in data})
+
+        # 인증하면 버전이 올라가 다시 계산
+        self.client.force_authenticate(self.viewer)
+        with self.captureOnCommitCallbacks(execute=True):
+            PostService.process_certification(self.viewer, self.community, None, None, None)
+        data, _ = self.feed()
+        self.assertEqual(len(data), 4)
+        self.assertIn('https://cdn/posts/0.jpg', {row['image_url'] for row in data})
+
+        stats = self.client.get('/api/cache-stats/')
+        self.assertEqual(stats.status_code, 403)
+        self.assertGreaterEqual(caching.stats()['local_hits'], 1)
+
+    def test_my_feed_spans_communities(self):
+        others = [make_community(f'feed-{i}') for i in range(2)]
+        for i, community in enumerate(others):
+            Member.objects.create(user_id=self.viewer, com_uuid=community, nick_name='viewer')
+            author, _ = make_member(community, f'feed-author{i}')
+            post = PostService.process_certification(author, community, None, None, None)
+            Post.objects.filter(pk=post.pk).update(image_url=f'posts/feed{i}.jpg', image_variants={'full': f'posts/feed{i}_full.jpg'})
+        PostService.process_certification(self.viewer, others[0], None, None, None)
+
+        with mock.patch.object(default_storage, 'url', side_effect=lambda name: f'https://cdn/{name}'):
+            # 커뮤니티 목록 1번 + 포스트 페이지 1번
+            with self.assertNumQueries(2):
+                first = self.client.get('/api/posts/my-feed/', {'page_size': 4}).data
+            rest = self.client.get('/api/posts/my-feed/', {'page_size': 4, 'before': first['before']}).data
+
+        status = {row['com_uuid']: row['certified_today'] for row in first['communities']}
+        self.assertEqual(status, {self.community.com_uuid: False, others[0].com_uuid: True, others[1].com_uuid: False})
+        rows = first['results'] + rest['results']
+        self.assertEqual(len(rows), 6)
+        self.assertFalse(rest['has_more'])
+        images_by_com = {row['com_uuid']: row['image_url'] for row in rows if row['user_id'] != self.viewer.user_id}
+        self.assertEqual(images_by_com[others[0].com_uuid], 'https://cdn/posts/feed0_full.jpg')
+        self.assertEqual(images_by_com[others[1].com_uuid], images.BLUR_PLACEHOLDER_URL)
+
+
+class SharedCacheCheckTest(TestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://redis:6379/1'}}
+
+    def test_local_memory_cache_is_refused_outside_debug(self):
+        with override_settings(DEBUG=False, CACHES=self.LOCMEM):
+            self.assertEqual([error.id for error in checks.check_shared_cache(None)], ['api.E001'])
+        with override_settings(DEBUG=True, CACHES=self.LOCMEM):
+            self.assertEqual(checks.check_shared_cache(None), [])
+        with override_settings(DEBUG=False, CACHES=self.REDIS):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+@skipUnless(redis_available(), "Redis에 연결할 수 없음")
+class SharedRedisCacheTest(TestCase):
+    def test_versions_are_shared_between_processes(self):
+        with override_settings(CACHES=CONFIGURED_CACHES):
+            self.assertEqual(checks.check_shared_cache(None), [])
+            # 프로세스마다 따로 만든 캐시 연결이 같은 버전 키를 봄
+            first, second = caches.create_connection('default'), caches.create_connection('default')
+            key = f"test:shared:{uuid.uuid4()}"
+            first.set(key, 1, 60)
+            second.incr(key)
+            self.assertEqual(first.get(key), 2)
+            first.delete(key)
+
+
+class CommunityCacheTest(TestCase):
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {'value': len(calls)}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            caching.get_or_compute('test', 'single-flight', compute)
+        )) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 5)
+
+        # 버전이 오르면 새로 계산
+        caching.bump('single-flight')
+        self.assertEqual(caching.get_or_compute('test', 'single-flight', compute), {'value': 2})
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.user, _ = make_member(self.community, 'poller')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_community_returns_304_without_queries(self):
+        url = f'/api/communities/{self.community.com_uuid}/'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        # 다른 모양의 응답은 다른 ETag
+        trimmed = self.client.get(url, {'fields': 'com_name'})
+        self.assertNotEqual(trimmed['ETag'], first['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.community.com_name = 'renamed'
+            self.community.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['com_name'], 'renamed')
+
+    def test_hall_of_shame_changes_when_deadline_passes(self):
+        url = f'/api/communities/{self.community.com_uuid}/hall_of_shame/'
+        monday = datetime.datetime(2026, 1, 19, tzinfo=datetime.timezone.utc)
+        deadline = datetime.datetime.combine(monday.date(), self.community.cert_time, tzinfo=datetime.timezone.utc)
+
+        with mock.patch('django.utils.timezone.now', return_value=deadline - datetime.timedelta(minutes=1)):
+            before = self.client.get(url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag']).status_code, 304)
+
+        # 마감 처리(버전 증가)가 아직 없어도 기준 날짜가 바뀌었으므로 새로 받음
+        with mock.patch('django.utils.timezone.now', return_value=deadline + datetime.timedelta(minutes=1)):
+            after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual([row['user_id'] for row in after.data['results']], [self.user.pk])
+
+    def test_members_change_with_joins(self):
+        params = {'com_uuid': str(self.community.com_uuid)}
+        first = self.client.get('/api/members/get_members/', params)
+        self.assertEqual(self.client.get('/api/members/get_members/', params, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_member(self.community, 'newcomer')
+        self.assertEqual(self.client.get('/api/members/get_members/', params, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_chat_history_uses_latest_message(self):
+        params = {'com_uuid': str(self.community.com_uuid)}
+        Chat.objects.create(com_uuid=self.community, user_id=self.user, content='hello')
+        first = self.client.get('/api/chats/chat_history/', params)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(self.client.get('/api/chats/chat_history/', params, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        Chat.objects.create(com_uuid=self.community, user_id=self.user, content='again')
+        second = self.client.get('/api/chats/chat_history/', params, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+        # 닉네임이 바뀌어도 다시 받음
+        with self.captureOnCommitCallbacks(execute=True):
+            Member.objects.filter(user_id=self.user).first().save()
+        self.assertEqual(self.client.get('/api/chats/chat_history/', params, HTTP_IF_NONE_MATCH=second['ETag']).status_code, 200)
+
+
+class DeadlineWheelTest(TestCase):
+    MONDAY = datetime.datetime(2026, 1, 19, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.nine = make_community('nine', cert_time=datetime.time(21, 0))
+        self.weekend = make_community('weekend', cert_time=datetime.time(21, 0, 30))
+        self.weekend.cert_mask = weekdays.to_mask(['Sat', 'Sun'])
+        self.weekend.save()
+        self.ten = make_community('ten', cert_time=datetime.time(22, 0))
+        self.lazy, _ = make_member(self.nine, 'lazy')
+        self.diligent, _ = make_member(self.nine, 'diligent')
+        Post.objects.create(user_id=self.diligent, com_uuid=self.nine, cert_date=self.MONDAY.date())
+        self.wheel = deadlines.DeadlineWheel()
+        self.wheel.refresh()
+
+    def at(self, hour, minute):
+        return self.MONDAY.replace(hour=hour, minute=minute)
+
+    def test_buckets_by_weekday_and_minute(self):
+        self.assertEqual(self.wheel.due(self.at(21, 0)), [self.nine.pk])
+        self.assertEqual(self.wheel.due(self.at(22, 0)), [self.ten.pk])
+        self.assertEqual(self.wheel.due(self.at(21, 1)), [])
+        self.assertIn(self.weekend.pk, self.wheel.due(self.at(21, 0) + datetime.timedelta(days=5)))
+
+        # 바뀐 게 없으면 DB를 조회하지 않음
+        with self.assertNumQueries(0):
+            self.assertFalse(self.wheel.refresh())
+
+        # 마감 시간이 바뀌면 다음 틱에서 다시 만들어짐
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ten.cert_time = datetime.time(23, 0)
+            self.ten.save()
+        self.assertTrue(self.wheel.refresh())
+        self.assertEqual(self.wheel.due(self.at(22, 0)), [])
+
+        # updated_at을 건드리지 않는 대량 변경도 반영
+        with self.captureOnCommitCallbacks(execute=True):
+            Community.objects.filter(pk=self.ten.pk).update(cert_time=datetime.time(22, 0))
+        self.assertTrue(self.wheel.refresh())
+        self.assertEqual(self.wheel.due(self.at(22, 0)), [self.ten.pk])
+
+        # 마감과 관계없는 변경은 다시 만들지 않음
+        with self.captureOnCommitCallbacks(execute=True):
+            Community.objects.filter(pk=self.ten.pk).update(com_name='renamed')
+        self.assertFalse(self.wheel.refresh())
+
+    def test_tick_sends_reminders_then_penalizes_only_due_communities(self):
+        with mock.patch('api.deadlines.get_wheel', return_value=self.wheel), \
+                mock.patch('api.deadlines.notify') as notify:
+            deadlines.deadline_tick(self.at(20, 30))
+            self.assertEqual([call.args[0] for call in notify.call_args_list], [self.lazy.user_id])
+            self.assertFalse(ShameSnapshot.objects.exists())
+
+            deadlines.deadline_tick(self.at(21, 1))
+
+        snapshot = ShameSnapshot.objects.get()
+        self.assertEqual(snapshot.com_uuid_id, self.nine.pk)
+        self.assertEqual(list(PenaltyShard.objects.values_list('com_uuid', flat=True)), [self.nine.pk])
+        self.assertEqual(
+            list(ScoreEntry.objects.filter(reason=ScoreEntry.REASON_PENALTY).values_list('user_id', flat=True)),
+            [self.lazy.user_id]
+        )
+
+        # 같은 마감을 다시 처리해도 한 번만 차감
+        deadlines.on_deadline([self.nine.pk], self.MONDAY.date())
+        self.assertEqual(ScoreEntry.objects.filter(reason=ScoreEntry.REASON_PENALTY).count(), 1)
+
+    def test_late_certification_refunds_deadline_penalty(self):
+        community = make_community('early', cert_time=datetime.time(0, 0))
+        user, _ = make_member(community, 'late-user')
+        deadlines.on_deadline([community.pk], timezone.now().date())
+
+        post = PostService.process_certification(user, community, None, None, None)
+        self.assertTrue(post.is_late)
+        self.assertEqual(sum(ScoreEntry.objects.filter(user_id=user).values_list('delta', flat=True)), 5)
+
+        PostService.rollback_certification(post)
+        self.assertEqual(sum(ScoreEntry.objects.filter(user_id=user).values_list('delta', flat=True)), -10)
+
+    def total(self, user):
+        return sum(ScoreEntry.objects.filter(user_id=user).values_list('delta', flat=True))
+
+    def test_member_joined_after_deadline_gets_no_refund(self):
+        community = make_community('early', cert_time=datetime.time(0, 0))
+        make_member(community, 'penalized')
+        deadlines.on_deadline([community.pk], timezone.now().date())
+
+        # 마감 이후 가입해 페널티를 받지 않은 멤버는 지각 인증 점수만
+        joiner, _ = make_member(community, 'joiner')
+        post = PostService.process_certification(joiner, community, None, None, None)
+        self.assertTrue(post.is_late)
+        self.assertEqual(self.total(joiner), 5)
+        self.assertFalse(ScoreEntry.objects.filter(user_id=joiner, refund_of__isnull=False).exists())
+
+    def test_deleting_on_time_post_after_deadline_applies_penalty(self):
+        user, _ = make_member(self.nine, 'on-time')
+        with mock.patch('django.utils.timezone.now', return_value=self.at(20, 0)):
+            post = PostService.process_certification(user, self.nine, None, None, None)
+        self.assertFalse(post.is_late)
+        deadlines.on_deadline([self.nine.pk], self.MONDAY.date())
+        self.assertEqual(self.total(user), 10)
+
+        # 마감 작업은 이미 끝났으므로 삭제할 때 페널티를 직접 기록 (수치의 전당 스냅샷과 일치)
+        with mock.patch('django.utils.timezone.now', return_value=self.at(22, 0)), \
+                self.captureOnCommitCallbacks(execute=True):
+            PostService.rollback_certification(post)
+        penalty = ScoreEntry.objects.get(user_id=user, reason=ScoreEntry.REASON_PENALTY)
+        self.assertEqual(penalty.target_date, self.MONDAY.date())
+        self.assertEqual(self.total(user), -10)
+        # 다음 조회 때 다시 만들어지는 스냅샷에도 포함
+        snapshot = CommunityService.build_shame_snapshot(self.nine, self.MONDAY.date())
+        self.assertIn(str(Member.objects.get(user_id=user).mem_idx), snapshot.member_ids)
+
+        # 다시 올리면 지각 인증으로 그 페널티를 환급
+        with mock.patch('django.utils.timezone.now', return_value=self.at(22, 30)):
+            PostService.process_certification(user, self.nine, None, None, None)
+        self.assertEqual(self.total(user), 5)
+        self.assertEqual(ScoreEntry.objects.get(refund_of=penalty).delta, 10)
+
+    def test_deleting_counted_post_moves_credit_to_next_post(self):
+        user, member = make_member(self.nine, 'twice')
+        with mock.patch('django.utils.timezone.now', return_value=self.at(20, 0)):
+            first = PostService.process_certification(user, self.nine, None, None, None)
+        with mock.patch('django.utils.timezone.now', return_value=self.at(21, 30)):
+            second = PostService.process_certification(user, self.nine, None, None, None)
+        deadlines.on_deadline([self.nine.pk], self.MONDAY.date())
+        self.assertEqual(self.total(user), 10)
+
+        # 남은 포스트가 인증으로 인정되고, 작성 시각 기준으로 지각 판정
+        with mock.patch('django.utils.timezone.now', return_value=self.at(22, 0)):
+            PostService.rollback_certification(first)
+        member.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((member.cert_cnt, member.is_late_cnt), (1, 1))
+        self.assertEqual(member.last_cert_date, self.MONDAY.date())
+        self.assertTrue(second.is_late)
+        self.assertEqual(self.total(user), 5)
+        self.assertEqual(ScoreEntry.objects.get(post=second, reason=ScoreEntry.REASON_CERT).delta, 5)
+
+        # 마지막 포스트까지 지우면 마감 때 건너뛴 페널티를 기록
+        with mock.patch('django.utils.timezone.now', return_value=self.at(22, 30)):
+            PostService.rollback_certification(second)
+        member.refresh_from_db()
+        self.assertEqual((member.cert_cnt, member.is_late_cnt, member.last_cert_date), (0, 0, None))
+        self.assertEqual(self.total(user), -10)
+
+    def test_delete_then_repost_refunds_penalty_once(self):
+        community = make_community('early', cert_time=datetime.time(0, 0))
+        user, _ = make_member(community, 'late-user')
+        deadlines.on_deadline([community.pk], timezone.now().date())
+        penalty = ScoreEntry.objects.get(user_id=user, reason=ScoreEntry.REASON_PENALTY)
+
+        for _ in range(2):
+            post = PostService.process_certification(user, community, None, None, None)
+            self.assertEqual(self.total(user), 5)
+            PostService.rollback_certification(post)
+            self.assertEqual(self.total(user), -10)
+
+        PostService.process_certification(user, community, None, None, None)
+        self.assertEqual(self.total(user), 5)
+        self.assertEqual(ScoreEntry.objects.filter(refund_of=penalty).count(), 1)
+
+
+class CertificationUploadTest(TestCase):
+    def setUp(self):
+        use_local_storage(self)
+        self.community = make_community()
+        self.user, self.member = make_member(self.community, 'upload-user')
+
+    def image(self, content=b'fake-image-bytes'):
+        return SimpleUploadedFile('photo.jpg', content, content_type='image/jpeg')
+
+    def test_post_points_at_uploaded_blob(self):
+        post = PostService.process_certification(self.user, self.community, self.image(), None, None)
+        self.assertRegex(post.image_url.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertTrue(default_storage.exists(post.image_url.name))
+
+    def test_same_image_is_stored_once(self):
+        first = PostService.process_certification(self.user, self.community, self.image(), None, None)
+        second = PostService.process_certification(self.user, self.community, self.image(), None, None)
+        self.assertEqual(first.image_url.name, second.image_url.name)
+        self.assertEqual(StoredBlob.objects.get().ref_cnt, 2)
+
+        # 한쪽을 지워도 다른 포스트가 쓰는 파일은 남음
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(default_storage.exists(second.image_url.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(default_storage.exists(second.image_url.name))
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_concurrent_upload_of_same_content_keeps_one_file(self):
+        # 다른 요청이 같은 내용을 같은 경로에 먼저 올린 직후 (아직 StoredBlob 행은 없음)
+        name = storage.blob_name(storage._digest(self.image()), 'photo.jpg')
+        default_storage.save(name, self.image())
+        real_exists, checked = default_storage.exists, []
+        # 업로드 전 존재 확인만 놓치게 함 (그 뒤 저장할 때는 실제로 확인)
+        def exists_once(path):
+            checked.append(path)
+            return False if len(checked) == 1 else real_exists(path)
+
+        with mock.patch.object(default_storage, 'exists', side_effect=exists_once):
+            post = PostService.process_certification(self.user, self.community, self.image(), None, None)
+
+        self.assertEqual(post.image_url.name, name)
+        _, files = default_storage.listdir(os.path.dirname(name))
+        self.assertEqual(files, [os.path.basename(name)])
+
+    def test_pipeline_downscales_strips_exif_and_renders_variants(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        buf = io.BytesIO()
+        Image.new('RGB', (3000, 2000), 'red').save(buf, format='JPEG', exif=exif)
+        upload = SimpleUploadedFile('photo.jpg', buf.getvalue(), content_type='image/jpeg')
+
+        post = PostService.process_certification(self.user, self.community, upload, None, None)
+        # 변환 전에는 EXIF가 남은 원본 경로를 내려주지 않음
+        self.assertIsNone(PostSerializer(post).data['image_url'])
+        variants = images.process_post_image(post.post_id)
+
+        self.assertEqual(set(variants), {'full', 'webp', 'thumb', 'thumb_webp'})
+        post.refresh_from_db()
+        self.assertEqual(PostSerializer(post).data['image_url'], default_storage.url(variants['full']))
+        # 원본(내용 해시 경로)은 그대로 두고 변환본은 새 이름으로 저장
+        with default_storage.open(post.image_url.name) as f:
+            self.assertEqual(f.read(), buf.getvalue())
+        self.assertNotIn(post.image_url.name, variants.values())
+        with default_storage.open(variants['full']) as f:
+            full = Image.open(f)
+            self.assertEqual(full.format, 'JPEG')
+            self.assertEqual(max(full.size), images.MAX_SIZE)
+            self.assertEqual(len(full.getexif()), 0)
+        with default_storage.open(variants['thumb_webp']) as f:
+            thumb = Image.open(f)
+            self.assertEqual(thumb.format, 'WEBP')
+            self.assertEqual(max(thumb.size), images.THUMB_SIZE)
+
+        post.refresh_from_db()
+        self.assertTrue(post.blur_preview.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(post.blur_preview), 2048)
+
+    def test_webp_upload_keeps_original_and_distinct_variant_names(self):
+        buf = io.BytesIO()
+        Image.new('RGB', (400, 300), 'blue').save(buf, format='WEBP')
+        upload = SimpleUploadedFile('photo.webp', buf.getvalue(), content_type='image/webp')
+
+        post = PostService.process_certification(self.user, self.community, upload, None, None)
+        variants = images.process_post_image(post.post_id)
+
+        name = post.image_url.name
+        self.assertTrue(name.endswith('.webp'))
+        self.assertEqual(len(set(variants.values()) | {name}), 5)
+        self.assertEqual(sorted(variants.values()), sorted(images.variant_names(name)))
+        with default_storage.open(name) as f:
+            self.assertEqual(f.read(), buf.getvalue())
+
+        # 원본을 지우면 변환본도 함께 정리
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertFalse(any(default_storage.exists(stored) for stored in [name, *variants.values()]))
+
+    def photo(self, size, quality=90, pattern=0):
+        """같은 장면을 크기/화질만 바꿔 다시 저장한 사진 (pattern이 다르면 다른 장면)"""
+        img = Image.new('RGB', (64, 48), 'white')
+        for x in range(64):
+            for y in range(48):
+                img.putpixel((x, y), ((x * 4 + pattern * 97) % 256, (y * 5 * (pattern + 1)) % 256, (x * y) % 256))
+        buf = io.BytesIO()
+        img.resize(size).save(buf, format='JPEG', quality=quality)
+        return SimpleUploadedFile('photo.jpg', buf.getvalue(), content_type='image/jpeg')
+
+    def test_recycled_photo_is_flagged(self):
+        first = PostService.process_certification(self.user, self.community, self.photo((640, 480)), None, None)
+        images.process_post_image(first.post_id)
+        again = PostService.process_certification(self.user, self.community, self.photo((800, 600), 60), None, None)
+        images.process_post_image(again.post_id)
+        other = PostService.process_certification(self.user, self.community, self.photo((640, 480), pattern=1), None, None)
+        images.process_post_image(other.post_id)
+
+        again.refresh_from_db()
+        other.refresh_from_db()
+        self.assertNotEqual(first.image_url.name, again.image_url.name)
+        self.assertEqual(again.duplicate_of_id, first.post_id)
+        self.assertIsNone(other.duplicate_of_id)
+
+    def test_backfill_phash(self):
+        first = PostService.process_certification(self.user, self.community, self.photo((640, 480)), None, None)
+        again = PostService.process_certification(self.user, self.community, self.photo((800, 600), 60), None, None)
+
+        call_command('backfill_phash', stdout=io.StringIO())
+
+        again.refresh_from_db()
+        self.assertIsNotNone(again.phash)
+        self.assertEqual(again.duplicate_of_id, first.post_id)
+
+    def test_failed_commit_removes_uploaded_blob(self):
+        blob_dir = storage.blob_name(storage._digest(self.image()), 'photo.jpg').rsplit('/', 1)[0]
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch('api.services.ScoreService.record', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                PostService.process_certification(self.user, self.community, self.image(), None, None)
+
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(StoredBlob.objects.exists())
+        _, files = default_storage.listdir(blob_dir)
+        self.assertEqual(files, [])
+
+
+class UploadTicketTest(TestCase):
+    def setUp(self):
+        use_local_storage(self)
+        self.community = make_community()
+        self.user = User.objects.create_user(login_id='ticket-user', user_name='ticket-user', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, kind, content=None):
+        ticket = self.client.post('/api/uploads/ticket/', {'kind': kind, 'filename': 'a.jpg'}, format='json').data
+        response = self.client.generic(
+            ticket['method'], ticket['upload_url'], content or kind.encode(), content_type=ticket['headers']['Content-Type']
+        )
+        self.assertEqual(response.status_code, 200)
+        return ticket
+
+    def test_gcs_signed_url_refuses_overwrite(self):
+        with mock.patch('api.uploads.default_storage') as storage_mock:
+            storage_mock.bucket.blob.return_value.generate_signed_url.return_value = 'https://signed'
+            target = uploads.GCSUploadBackend().upload_target(None, 'posts/a.jpg', 'token', 'image/jpeg')
+
+        signed = storage_mock.bucket.blob.return_value.generate_signed_url.call_args.kwargs['headers']
+        self.assertEqual(signed['x-goog-if-generation-match'], '0')
+        self.assertEqual(signed['x-goog-content-length-range'], f'0,{settings.UPLOAD_MAX_BYTES}')
+        # 서명한 헤더를 클라이언트에게 그대로 전달
+        self.assertEqual(target['headers'], signed)
+
+    def test_join_and_certify_with_tickets(self):
+        profile, shame = self.upload('profile'), self.upload('shame')
+        response = self.client.post('/api/communities/join_confirm/', {
+            'com_id': self.community.com_id,
+            'nick_name': 'direct',
+            'profile_token': profile['token'],
+            'shame_token': shame['token'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        member = Member.objects.get(user_id=self.user)
+        self.assertEqual(member.profile_img_url.name, profile['key'])
+
+        ticket = self.upload('post')
+        response = self.client.post('/api/posts/confirm/', {
+            'com_uuid': str(self.community.com_uuid),
+            'token': ticket['token'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(user_id=self.user)
+        self.assertEqual(post.image_url.name, ticket['key'])
+        self.assertEqual(ticket['key'], f'posts/{post.post_id}.jpg')
+
+    def test_confirm_requires_finished_upload_and_matching_kind(self):
+        Member.objects.create(user_id=self.user, com_uuid=self.community, nick_name='direct')
+        ticket = self.client.post('/api/uploads/ticket/', {'kind': 'post'}, format='json').data
+        response = self.client.post('/api/posts/confirm/', {
+            'com_uuid': str(self.community.com_uuid), 'token': ticket['token'],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        profile = self.upload('profile')
+        response = self.client.post('/api/posts/confirm/', {
+            'com_uuid': str(self.community.com_uuid), 'token': profile['token'],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+
+    def confirm_post(self, ticket):
+        return self.client.post('/api/posts/confirm/', {
+            'com_uuid': str(self.community.com_uuid), 'token': ticket['token'],
+        }, format='json')
+
+    def test_duplicate_upload_is_merged_by_image_worker(self):
+        Member.objects.create(user_id=self.user, com_uuid=self.community, nick_name='direct')
+        buf = io.BytesIO()
+        Image.new('RGB', (40, 30), 'green').save(buf, format='JPEG')
+        upload = SimpleUploadedFile('photo.jpg', buf.getvalue(), content_type='image/jpeg')
+        first = PostService.process_certification(self.user, self.community, upload, None, None)
+        images.process_post_image(first.post_id)
+
+        # 확정 때는 파일을 내려받지 않고 경로로만 등록
+        ticket = self.upload('post', buf.getvalue())
+        with mock.patch.object(default_storage, 'open', side_effect=AssertionError('downloaded on confirm')):
+            self.assertEqual(self.confirm_post(ticket).status_code, 201)
+        second = Post.objects.exclude(pk=first.pk).get()
+        self.assertEqual(second.image_url.name, ticket['key'])
+
+        # 워커가 내용 해시를 계산해 기존 파일로 합침 (올린 파일은 참조 0으로 남아 정리 대상)
+        images.process_post_image(second.post_id)
+        second.refresh_from_db()
+        self.assertEqual(second.image_url.name, first.image_url.name)
+        self.assertEqual(StoredBlob.objects.get(name=first.image_url.name).ref_cnt, 2)
+        self.assertEqual(StoredBlob.objects.get(name=ticket['key']).ref_cnt, 0)
+        self.assertEqual(storage.collect_unused_blobs(grace=datetime.timedelta(0)), 1)
+        self.assertFalse(default_storage.exists(ticket['key']))
+        self.assertTrue(default_storage.exists(first.image_url.name))
+
+    def test_confirm_can_be_retried_after_failure(self):
+        Member.objects.create(user_id=self.user, com_uuid=self.community, nick_name='direct')
+        ticket = self.upload('post')
+        with mock.patch('api.services.ScoreService.record', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.confirm_post(ticket)
+        self.assertEqual(StoredBlob.objects.get(name=ticket['key']).ref_cnt, 0)
+
+        self.assertEqual(self.confirm_post(ticket).status_code, 201)
+        self.assertEqual(StoredBlob.objects.get(name=ticket['key']).ref_cnt, 1)
+        self.assertEqual(Post.objects.get().image_url.name, ticket['key'])
+
+    @override_settings(UPLOAD_MAX_BYTES=8)
+    def test_oversized_upload_is_rejected(self):
+        ticket = self.client.post('/api/uploads/ticket/', {'kind': 'profile'}, format='json').data
+        response = self.client.generic('PUT', ticket['upload_url'], b'x' * 9, content_type='image/jpeg')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(default_storage.exists(ticket['key']))
+
+        # 스토리지에 직접 올라간 큰 파일은 확정 단계에서 거절하고 지움
+        default_storage.save(ticket['key'], ContentFile(b'x' * 9))
+        response = self.client.post('/api/communities/join_confirm/', {
+            'com_id': self.community.com_id, 'nick_name': 'big', 'profile_token': ticket['token'],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(default_storage.exists(ticket['key']))
+        self.assertFalse(Member.objects.exists())
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        use_local_storage(self)
+        self.community = make_community()
+        self.user, self.member = make_member(self.community, 'retry-user')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def certify(self, key, content=b'photo'):
+        image = SimpleUploadedFile('photo.jpg', content, content_type='image/jpeg')
+        return self.client.post(
+            '/api/posts/', {'com_uuid': str(self.community.com_uuid), 'image_url': image},
+            format='multipart', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_returns_first_response(self):
+        first = self.certify('retry-1')
+        with mock.patch('api.services.store_image') as store_image:
+            retry = self.certify('retry-1')
+            store_image.assert_not_called()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['post_id'], first.data['post_id'])
+        self.assertEqual(Post.objects.count(), 1)
+
+        self.assertEqual(self.certify('retry-2', b'other').status_code, 201)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_failed_request_releases_key(self):
+        with mock.patch('api.services.ScoreService.record', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                self.certify('retry-1')
+        self.assertEqual(self.certify('retry-1').status_code, 201)
+
+    def test_key_is_bound_to_endpoint(self):
+        self.certify('retry-1')
+        response = self.client.post(
+            '/api/communities/join/', {'com_id': self.community.com_id, 'nick_name': 'x'},
+            HTTP_IDEMPOTENCY_KEY='retry-1'
+        )
+        self.assertEqual(response.status_code, 422)
+
+
+@skipIf(connection.vendor != 'postgresql', "실행 계획 확인은 PostgreSQL에서만 합니다.")
+class QueryPlanTest(TestCase):
+    """자주 쓰는 조회가 인덱스를 타는지 EXPLAIN으로 확인 (데이터가 적어도 seq scan은 끄고 비교)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.community = make_community()
+        cls.user, cls.member = make_member(cls.community, 'plan-user')
+        cls.today = timezone.now().date()
+
+        # 여러 유저/날짜에 걸친 포스트를 만들고 통계를 갱신
+        others = [make_member(cls.community, f'plan-{i}')[0] for i in range(10)]
+        Post.objects.bulk_create([
+            Post(user_id=user, com_uuid=cls.community, cert_date=cls.today - datetime.timedelta(days=day))
+            for user in others + [cls.user] for day in range(30)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_post")
+            cursor.execute("ANALYZE api_member")
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in index_names), plan)
+
+    def test_feed_uses_community_date_index(self):
+        self.assertUsesIndex(Post.objects.filter(com_uuid=self.community, cert_date=self.today), 'post_com_date_idx')
+
+    def test_certified_today_uses_user_community_date_index(self):
+        queryset = Post.objects.filter(user_id=self.user, com_uuid=self.community, cert_date=self.today)
+        self.assertUsesIndex(queryset, 'post_user_com_date_idx')
+
+    def test_shame_members_use_date_index(self):
+        queryset = CommunityService.get_shame_members([self.community], self.today)
+        self.assertUsesIndex(queryset, 'post_user_com_date_idx', 'post_com_date_idx')
+
+    def test_history_uses_user_created_index(self):
+        self.assertUsesIndex(Post.objects.filter(user_id=self.user).order_by('-created_at'), 'post_user_created_idx')
+
+    def test_weekday_filter_uses_expression_index(self):
+        queryset = Community.objects.certifying_on(self.today).filter(cert_time__lt=datetime.time(12))
+        self.assertUsesIndex(queryset, f'community_{weekdays.WEEKDAYS[self.today.weekday()].lower()}_idx')
+
+    def test_chat_history_uses_community_created_index(self):
+        self.assertUsesIndex(Chat.objects.filter(com_uuid=self.community).order_by('created_at'), 'chat_com_created_idx')
+
+
+@skipIf(connection.vendor == 'sqlite', "sqlite는 동시 쓰기를 지원하지 않습니다.")
+class ConcurrentCertificationTest(TransactionTestCase):
+    THREADS = 8
+
+    def _fire(self, jobs):
+        """jobs의 (user, community)를 동시에 업로드"""
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def upload(user, community):
+            try:
+                barrier.wait()
+                PostService.process_certification(user, community, None, None, None)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=upload, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_uploads_from_one_user_count_once(self):
+        community = make_community()
+        user, member = make_member(community, 'phone-user')
+
+        self._fire([(user, community)] * self.THREADS)
+
+        member.refresh_from_db()
+        self.assertEqual(Post.objects.filter(user_id=user).count(), self.THREADS)
+        self.assertEqual(member.cert_cnt, 1)
+        self.assertEqual(ScoreEntry.objects.filter(user_id=user).count(), 1)
+
+    def test_parallel_uploads_from_many_users(self):
+        community = make_community()
+        users = [make_member(community, f'user-{i}')[0] for i in range(self.THREADS)]
+
+        self._fire([(user, community) for user in users] * 2)
+
+        self.assertEqual(
+            sorted(Member.objects.filter(com_uuid=community).values_list('cert_cnt', flat=True)),
+            [1] * self.THREADS
+        )
+        self.assertEqual(ScoreEntry.objects.filter(com_uuid=community).count(), self.THREADS)
+
+    def test_concurrent_retries_with_same_key_create_one_post(self):
+        community = make_community()
+        user, member = make_member(community, 'retry-user')
+        responses = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def retry():
+            try:
+                client = APIClient()
+                client.force_authenticate(user)
+                barrier.wait()
+                responses.append(client.post(
+                    '/api/posts/', {'com_uuid': str(community.com_uuid)}, HTTP_IDEMPOTENCY_KEY='same-key'
+                ))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retry) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([r.status_code for r in responses], [201] * self.THREADS)
+        self.assertEqual(len({r.data['post_id'] for r in responses}), 1)
+        self.assertEqual(Post.objects.filter(user_id=user).count(), 1)
+
+
+class PenaltyRunTest(TransactionTestCase):
+    DAY = datetime.date(2026, 1, 19)
+
+    def setUp(self):
+        self.first = make_community('first')
+        self.second = make_community('second')
+        self.lazy, _ = make_member(self.first, 'lazy')
+        Member.objects.create(user_id=self.lazy, com_uuid=self.second, nick_name='lazy')
+        self.diligent, _ = make_member(self.first, 'diligent')
+        Post.objects.create(user_id=self.diligent, com_uuid=self.first, cert_date=self.DAY)
+
+    def penalties(self):
+        return ScoreEntry.objects.filter(reason=ScoreEntry.REASON_PENALTY, target_date=self.DAY)
+
+    def test_unexpected_integrity_error_is_not_treated_as_done(self):
+        with mock.patch('api.operator.apply_penalty', side_effect=IntegrityError('other constraint')):
+            run = operator.auto_penalty(self.DAY, workers=1, batch_size=1)
+        self.assertEqual(run.status, PenaltyRun.STATUS_RUNNING)
+        self.assertFalse(PenaltyShard.objects.exists())
+
+        run = operator.auto_penalty(self.DAY, workers=1, batch_size=1)
+        self.assertEqual(run.status, PenaltyRun.STATUS_DONE)
+        self.assertEqual(self.penalties().count(), 2)
+
+    def test_shard_conflict_processes_only_remaining_communities(self):
+        run = PenaltyRun.objects.create(target_date=self.DAY)
+        PenaltyShard.objects.create(run=run, com_uuid=self.first)
+
+        self.assertEqual(operator.penalize_communities(run.pk, self.DAY, [self.first.pk, self.second.pk]), 1)
+        self.assertEqual(list(self.penalties().values_list('com_uuid', flat=True)), [self.second.pk])
+
+    def test_running_twice_deducts_once_and_counts_users_once(self):
+        for _ in range(2):
+            run = operator.auto_penalty(self.DAY, workers=2, batch_size=1)
+        self.assertEqual(run.status, PenaltyRun.STATUS_DONE)
+        self.assertEqual(self.penalties().count(), 2)
+        # 두 커뮤니티(두 shard)에서 차감된 같은 유저는 한 명
+        self.assertEqual((run.community_cnt, run.member_cnt, run.user_cnt), (2, 2, 1))
+
+    def test_penalty_is_inserted_from_select(self):
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            counts = operator.apply_penalty([self.first.pk, self.second.pk], self.DAY)
+        self.assertEqual(counts, {self.first.pk: 1, self.second.pk: 1})
+        # 멤버 행을 파이썬으로 가져오지 않고 INSERT ... SELECT 한 번으로 기록
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('SELECT', inserts[0])
+
+        entries = list(self.penalties().values_list('user_id', 'delta', 'is_compacted'))
+        self.assertEqual(entries, [(self.lazy.pk, -PENALTY_POINT, False)] * 2)
+        self.assertFalse(self.penalties().filter(created_at__isnull=True).exists())
+
+    def test_resumes_after_shard_failure_without_double_charging(self):
+        apply_penalty = operator.apply_penalty
+
+        def fail_second(communities, target_date):
+            if self.second.pk in communities:
+                raise RuntimeError('shard down')
+            return apply_penalty(communities, target_date)
+
+        with mock.patch('api.operator.apply_penalty', side_effect=fail_second):
+            run = operator.auto_penalty(self.DAY, workers=2, batch_size=1)
+        self.assertEqual(run.status, PenaltyRun.STATUS_RUNNING)
+        self.assertEqual(list(self.penalties().values_list('com_uuid', flat=True)), [self.first.pk])
+
+        run = operator.auto_penalty(self.DAY, workers=2, batch_size=1)
+        self.assertEqual(run.status, PenaltyRun.STATUS_DONE)
+        self.assertEqual(
+            sorted(self.penalties().values_list('com_uuid', flat=True)),
+            sorted([self.first.pk, self.second.pk])
+        )
+        self.assertEqual((run.member_cnt, run.user_cnt), (2, 1))
+
+    def test_run_penalty_command(self):
+        out = io.StringIO()
+        call_command('run_penalty', date=self.DAY.isoformat(), workers=1, stdout=out)
+        self.assertIn('커뮤니티 2개, 멤버 2명, 유저 1명', out.getvalue())
+
+        # 다시 실행해도 추가 차감 없음
+        call_command('run_penalty', date=self.DAY.isoformat(), stdout=io.StringIO())
+        self.assertEqual(self.penalties().count(), 2)
+
+        with self.assertRaises(CommandError):
+            call_command('run_penalty', date=timezone.now().date().isoformat())
+
+
+class CompactScoresTest(TransactionTestCase):
+    def setUp(self):
+        self.community = make_community()
+        self.alice, _ = make_member(self.community, 'alice')
+        self.bob, _ = make_member(self.community, 'bob')
+        for user, delta in [(self.alice, 5), (self.alice, 2.5), (self.bob, -10), (self.alice, -1), (self.bob, 5)]:
+            ScoreService.record(user, delta, ScoreEntry.REASON_CERT, community=self.community)
+
+    def scores(self):
+        return dict(User.objects.filter(pk__in=[self.alice.pk, self.bob.pk]).values_list('login_id', 'score'))
+
+    def test_folds_exactly_once(self):
+        self.assertEqual(ScoreService.compact_scores(batch_size=2), 2)
+        self.assertEqual(ScoreService.compact_scores(), 3)
+        self.assertEqual(self.scores(), {'alice': 56.5, 'bob': 45.0})
+
+        # 이미 합산된 항목은 다시 합산하지 않음
+        self.assertEqual(ScoreService.compact_scores(), 0)
+        self.assertEqual(self.scores(), {'alice': 56.5, 'bob': 45.0})
+        self.assertFalse(ScoreEntry.objects.filter(is_compacted=False).exists())
+
+    @skipIf(connection.vendor != 'postgresql', "SKIP LOCKED 동작은 PostgreSQL에서만 확인")
+    def test_skips_entries_locked_by_concurrent_run(self):
+        locked, release = threading.Event(), threading.Event()
+
+        def other_run():
+            try:
+                with transaction.atomic():
+                    list(ScoreEntry.objects.filter(user_id=self.alice).select_for_update())
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        locked.wait(10)
+        try:
+            # 다른 실행이 잠근 alice의 항목은 건너뛰고 bob의 항목만 합산
+            self.assertEqual(ScoreService.compact_scores(), 2)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.scores(), {'alice': 50.0, 'bob': 45.0})
+        self.assertEqual(ScoreService.compact_scores(), 3)
+        self.assertEqual(self.scores(), {'alice': 56.5, 'bob': 45.0})
+
+
+class StopLoop(Exception):
+    pass
+
+
+@skipIf(connection.vendor != 'postgresql', "advisory lock은 PostgreSQL에서만 확인")
+class SchedulerLeaderLockTest(TransactionTestCase):
+    # 상위 32bit(classid)가 0이 아닌 키, 음수 키
+    LOCK_IDS = [(7 << 32) + 20260120, -20260120]
+
+    def other_node(self):
+        """다른 노드 역할을 하는 별도 DB 세션"""
+        other = connections.create_connection('default')
+        self.addCleanup(other.close)
+        return other
+
+    def try_lock(self, session, lock_id):
+        with session.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+            return cursor.fetchone()[0]
+
+    def test_is_held_matches_bigint_keys(self):
+        for lock_id in self.LOCK_IDS:
+            lock = operator.SchedulerLeaderLock(lock_id)
+            self.assertFalse(lock.is_held())
+            self.assertTrue(lock.acquire())
+            self.assertTrue(lock.is_held())
+            # 하위 32bit만 같은 다른 키는 다른 락
+            self.assertFalse(operator.SchedulerLeaderLock(lock_id & 0xffffffff).is_held())
+
+            other = self.other_node()
+            self.assertFalse(self.try_lock(other, lock_id))
+            lock.release()
+            self.assertFalse(lock.is_held())
+            self.assertTrue(self.try_lock(other, lock_id))
+
+        with self.assertRaises(ImproperlyConfigured):
+            operator.SchedulerLeaderLock(2 ** 63)
+
+    def run_scheduler(self, sleeps):
+        """time.sleep 마다 sleeps의 동작을 하나씩 실행하고, 다 쓰면 루프 종료"""
+        sleeps = iter(sleeps)
+
+        def sleep(seconds):
+            action = next(sleeps, None)
+            if action is None:
+                raise StopLoop
+            action()
+
+        out = io.StringIO()
+        with mock.patch('api.management.commands.run_scheduler.create_scheduler') as create, \
+                mock.patch('api.management.commands.run_scheduler.time.sleep', side_effect=sleep), \
+                mock.patch('api.management.commands.run_scheduler.signal.signal'), \
+                self.assertRaises(StopLoop):
+            call_command('run_scheduler', stdout=out)
+        return create, out.getvalue()
+
+    @override_settings(SCHEDULER_LOCK_ID=LOCK_IDS[0])
+    def test_leader_loop_steps_down_when_lock_is_lost(self):
+        other = self.other_node()
+        # 1. 다른 노드가 리더인 동안은 대기
+        self.assertTrue(self.try_lock(other, self.LOCK_IDS[0]))
+        create, _ = self.run_scheduler([])
+        create.assert_not_called()
+
+        # 2. 리더가 사라지면 선출 -> DB 세션이 끊겨 락을 잃으면 스케줄러 중지
+        other.close()
+        create, out = self.run_scheduler([connection.close])
+        create.return_value.start.assert_called_once()
+        create.return_value.shutdown.assert_called_once_with(wait=False)
+        self.assertIn('리더 락을 잃었습니다', out)
+
+
+class PenaltyRaceTest(TransactionTestCase):
+    """마감 페널티 shard와 지각 인증이 동시에 진행될 때 (멤버 행 잠금으로 순서가 정해짐)"""
+
+    def setUp(self):
+        self.community = make_community('early', cert_time=datetime.time(0, 0))
+        self.user, self.member = make_member(self.community, 'racer')
+        self.today = timezone.now().date()
+        self.run = PenaltyRun.objects.create(target_date=self.today)
+
+    def total(self):
+        return sum(ScoreEntry.objects.filter(user_id=self.user).values_list('delta', flat=True))
+
+    def in_thread(self, func):
+        errors = []
+
+        def target():
+            try:
+                func()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        self.addCleanup(lambda: self.assertEqual(errors, []))
+        return thread
+
+    def test_shard_waits_for_uncommitted_late_certification(self):
+        certifying, release = threading.Event(), threading.Event()
+
+        def slow_invalidate(com_uuid):
+            # write_certification 트랜잭션의 마지막 단계에서 커밋 전에 멈춤
+            certifying.set()
+            release.wait(10)
+
+        with mock.patch('api.services.caching.invalidate', side_effect=slow_invalidate):
+            cert = self.in_thread(lambda: PostService.process_certification(self.user, self.community, None, None, None))
+            certifying.wait(10)
+            shard = self.in_thread(lambda: operator.penalize_communities(self.run.pk, self.today, [self.community.pk]))
+            time.sleep(0.3)
+            release.set()
+            cert.join()
+            shard.join()
+
+        # 인증이 커밋된 뒤에 미인증자를 조회하므로 차감 없음
+        self.assertEqual(self.total(), 5)
+
+    def test_late_certification_waits_for_uncommitted_shard(self):
+        penalized, release = threading.Event(), threading.Event()
+        apply_penalty = operator.apply_penalty
+
+        def slow_apply(*args):
+            counts = apply_penalty(*args)
+            penalized.set()
+            release.wait(10)  # 커밋 전에 멈춤
+            return counts
+
+        with mock.patch('api.operator.apply_penalty', side_effect=slow_apply):
+            shard = self.in_thread(lambda: operator.penalize_communities(self.run.pk, self.today, [self.community.pk]))
+            penalized.wait(10)
+            cert = self.in_thread(lambda: PostService.process_certification(self.user, self.community, None, None, None))
+            time.sleep(0.3)
+            release.set()
+            shard.join()
+            cert.join()
+
+        # 페널티가 커밋된 뒤에 환급 대상을 조회하므로 -10 + 10 + 5
+        self.assertEqual(self.total(), 5)
+        self.assertTrue(ScoreEntry.objects.filter(refund_of__reason=ScoreEntry.REASON_PENALTY).exists())
@@ -0,0 +1,121 @@
+# api/uploads.py
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+
+# 업로드 종류별 저장 경로 (기존 multipart 업로드와 같은 위치)
+UPLOAD_PREFIXES = {
+    'post': 'posts/',
+    'profile': 'profile/',
+    'shame': 'shame/',
+}
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'heic'}
+TICKET_SALT = 'api.uploads.ticket'
+
+
+class GCSUploadBackend:
+    """클라이언트가 GCS에 직접 PUT 하도록 서명된 URL을 발급"""
+
+    def upload_target(self, request, key, token, content_type):
+        # 서명에 포함된 헤더는 클라이언트가 그대로 보내야 하며,
+        # generation-match 0 은 객체가 없을 때만 쓰기를 허용하므로 같은 URL로 덮어쓸 수 없습니다. (412)
+        # content-length-range 는 최대 크기를 넘는 업로드를 GCS에서 거절합니다. (400)
+        headers = {
+            'Content-Type': content_type,
+            'x-goog-if-generation-match': '0',
+            'x-goog-content-length-range': f'0,{settings.UPLOAD_MAX_BYTES}',
+        }
+        if getattr(settings, 'GS_DEFAULT_ACL', None) == 'publicRead':
+            # 기존 업로드와 마찬가지로 공개 읽기 권한으로 저장
+            headers['x-goog-acl'] = 'public-read'
+        url = default_storage.bucket.blob(key).generate_signed_url(
+            version='v4',
+            expiration=timedelta(seconds=settings.UPLOAD_TICKET_SECONDS),
+            method='PUT',
+            headers=headers,
+        )
+        return {'upload_url': url, 'method': 'PUT', 'headers': headers}
+
+
+class LocalUploadBackend:
+    """로컬/테스트 환경용: 우리 서버의 업로드 엔드포인트로 PUT 하면 default_storage에 저장"""
+
+    def upload_target(self, request, key, token, content_type):
+        url = request.build_absolute_uri(reverse('upload-local', kwargs={'pk': token}))
+        return {'upload_url': url, 'method': 'PUT', 'headers': {'Content-Type': content_type}}
+
+
+UPLOAD_BACKENDS = {
+    'gcs': GCSUploadBackend,
+    'local': LocalUploadBackend,
+}
+
+
+def get_upload_backend():
+    return UPLOAD_BACKENDS[settings.UPLOAD_BACKEND]()
+
+
+def issue_ticket(request, kind, filename='', content_type='image/jpeg'):
+    """
+    업로드 티켓 발급: 저장될 키를 미리 정하고, 그 키로만 업로드/확정할 수 있는 서명 토큰을 만듭니다.
+    인증 사진(post)은 키에 미리 발급한 post_id를 사용합니다.
+    """
+    if kind not in UPLOAD_PREFIXES:
+        raise ValidationError(f"kind는 {', '.join(UPLOAD_PREFIXES)} 중 하나여야 합니다.")
+
+    ext = os.path.splitext(filename)[1].lstrip('.').lower() or 'jpg'
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValidationError("지원하지 않는 이미지 형식입니다.")
+
+    object_id = uuid.uuid4()
+    key = f"{UPLOAD_PREFIXES[kind]}{object_id}.{ext}"
+    token = signing.dumps(
+        {'user': str(request.user.user_id), 'kind': kind, 'key': key, 'id': str(object_id)},
+        salt=TICKET_SALT
+    )
+
+    ticket = {
+        'kind': kind,
+        'key': key,
+        'token': token,
+        'expires_in': settings.UPLOAD_TICKET_SECONDS,
+    }
+    ticket.update(get_upload_backend().upload_target(request, key, token, content_type))
+    return ticket
+
+
+def read_ticket(token, user=None, kind=None):
+    """토큰 검증 후 티켓 내용을 반환 (만료/위조/다른 유저/다른 종류면 ValidationError)"""
+    try:
+        ticket = signing.loads(token, salt=TICKET_SALT, max_age=settings.UPLOAD_TICKET_SECONDS)
+    except signing.SignatureExpired:
+        raise ValidationError("업로드 티켓이 만료되었습니다.")
+    except signing.BadSignature:
+        raise ValidationError("잘못된 업로드 티켓입니다.")
+
+    if user is not None and ticket['user'] != str(user.user_id):
+        raise ValidationError("본인에게 발급된 업로드 티켓이 아닙니다.")
+    if kind is not None and ticket['kind'] != kind:
+        raise ValidationError(f"{kind} 용 업로드 티켓이 아닙니다.")
+    return ticket
+
+
+def too_large_message():
+    return f"이미지는 {settings.UPLOAD_MAX_BYTES // (1024 * 1024)}MB 이하만 업로드할 수 있습니다."
+
+
+def redeem_ticket(token, user, kind):
+    """확정 단계: 티켓을 검증하고 실제로 업로드가 끝났는지, 크기 제한 안인지 확인한 뒤 티켓 내용을 반환"""
+    ticket = read_ticket(token, user=user, kind=kind)
+    if not default_storage.exists(ticket['key']):
+        raise ValidationError("아직 업로드되지 않은 파일입니다.")
+    # 스토리지에서 크기 제한을 우회해 올라온 파일은 확정하지 않고 지움 (아직 어떤 blob에도 연결되지 않은 키)
+    if default_storage.size(ticket['key']) > settings.UPLOAD_MAX_BYTES:
+        default_storage.delete(ticket['key'])
+        raise ValidationError(too_large_message())
+    return ticket
@@ -8,10 +8,29 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework import viewsets
 from .models import User, Community, Member, Post, Chat
 from .serializers import *
-from .services import PostService, CommunityService, AuthService
+from .services import PostService, CommunityService, AuthService, ScoreService
+import uuid
+from django.conf import settings
+from django.http import Http404
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from . import uploads
+from .idempotency import idempotent
+from .pagination import KeysetPagination
+from .fieldsets import SparseFieldsViewMixin, is_sparse
+from . import caching
+from .conditional import community_condition, chat_condition, cached_community, shame_target_date
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+
+# 커서 페이지네이션 공통 파라미터 (api/pagination.py)
+CURSOR_PARAMETERS = [
+    OpenApiParameter(name='before', type=str, location='query', required=False, description='이 커서 이전 항목'),
+    OpenApiParameter(name='after', type=str, location='query', required=False, description='이 커서 이후 항목'),
+    OpenApiParameter(name='page_size', type=int, location='query', required=False, description='페이지 크기 (기본 50, 최대 200)'),
+]
 
 # 1. 회원가입 및 로그인 (Google Auth)
 class AuthViewSet(viewsets.ViewSet):
@@ -85,8 +104,9 @@ class AuthViewSet(viewsets.ViewSet):
 
 
 # 2. 유저 정보 관리
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    # 목록 조회 시 유저마다 원장을 따로 조회하지 않도록 미합산 점수를 함께 가져옵니다.
+    queryset = User.objects.annotate(pending_score=ScoreService.pending_score_subquery())
     serializer_class = UserSerializer
     
     @action(detail=False, methods=['get', 'put'], url_path='me')
@@ -103,10 +123,15 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
 
 # 3. 커뮤니티 관리
-class CommunityViewSet(viewsets.ModelViewSet):
+class CommunityViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Community.objects.all()
     serializer_class = CommunitySerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    # 커뮤니티 상세 조회 (바뀐 게 없으면 304)
+    @community_condition('community')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     # 커뮤니티 ID 검색 (기본 제공) 및 가입 로직
     @extend_schema(
@@ -128,6 +153,7 @@ class CommunityViewSet(viewsets.ModelViewSet):
         responses={201: MemberSerializer}
     )
     @action(detail=False, methods=['post'])
+    @idempotent
     def join(self, request):
         com_id_text = request.data.get('com_id') # 사용자가 입력한 문자열 ID
         try:
@@ -153,22 +179,128 @@ class CommunityViewSet(viewsets.ModelViewSet):
             shame_img_url=shame_image
         )
         return Response(MemberSerializer(member).data, status=status.HTTP_201_CREATED)
+
+    # 업로드 티켓으로 직접 올린 이미지로 커뮤니티 가입
+    @extend_schema(
+        summary="커뮤니티 가입 (업로드 티켓)",
+        description="/uploads/ticket/ 으로 프로필(kind=profile), 수치의 전당(kind=shame) 이미지를 직접 올린 뒤 티켓 토큰으로 가입합니다.",
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'com_id': {'type': 'string'},
+                    'nick_name': {'type': 'string'},
+                    'description': {'type': 'string'},
+                    'profile_token': {'type': 'string'},
+                    'shame_token': {'type': 'string'},
+                },
+                'required': ['com_id', 'nick_name', 'profile_token', 'shame_token']
+            }
+        },
+        responses={201: MemberSerializer}
+    )
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def join_confirm(self, request):
+        try:
+            community = Community.objects.get(com_id=request.data.get('com_id'))
+        except Community.DoesNotExist:
+             return Response({"error": "존재하지 않는 커뮤니티 ID입니다."}, status=404)
+
+        nick_name = request.data.get('nick_name')
+        if not nick_name:
+            return Response({"error": "닉네임은 필수입니다."}, status=400)
+
+        profile = uploads.redeem_ticket(request.data.get('profile_token', ''), request.user, 'profile')
+        shame = uploads.redeem_ticket(request.data.get('shame_token', ''), request.user, 'shame')
+
+        member = CommunityService.join_community(
+            user=request.user,
+            community=community,
+            nick_name=nick_name,
+            description=request.data.get('description', ""),
+            profile_img_url=profile['key'],
+            shame_img_url=shame['key']
+        )
+        return Response(MemberSerializer(member).data, status=status.HTTP_201_CREATED)
     
     # 커뮤니티 내 랭킹 조회
+    @extend_schema(
+        summary="커뮤니티 랭킹 조회",
+        description="인증횟수 DESC, 지각횟수 ASC, 가입순으로 정렬된 랭킹을 offset/limit 단위로 가져옵니다. (top-K는 offset=0)",
+        parameters=[
+            OpenApiParameter(name='offset', type=int, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='limit', type=int, location=OpenApiParameter.QUERY, required=False, description="최대 100"),
+        ]
+    )
     @action(detail=True, methods=['get'])
+    @community_condition('rankings')
     def rankings(self, request, pk=None):
-        rankings = CommunityService.get_community_rankings(pk)
-        serializer = MemberSerializer(rankings, many=True)
-        return Response(serializer.data)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 100)
+        except ValueError:
+            return Response({"error": "offset, limit은 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 커뮤니티 정보는 최상단에 한 번만, 멤버 행은 필요한 컬럼만 조회
+        community = self.get_cached_community()
+
+        def build():
+            rankings, count = CommunityService.get_community_rankings(
+                community.pk, offset, limit, fields=MemberRowSerializer.Meta.fields
+            )
+            results = []
+            for rank, member in rankings:
+                results.append({'rank': rank, **MemberRowSerializer(member, context={'request': request}).data})
+            return {
+                'community': dict(CommunitySerializer(community).data),
+                'count': count,
+                'offset': offset,
+                'limit': limit,
+                'results': results,
+            }
+
+        if is_sparse(request):
+            return Response(build())
+        return Response(caching.get_or_compute('rankings', community.pk, build, params=[offset, limit]))
+
+    # 커뮤니티 내 내 순위 조회
+    @extend_schema(summary="내 랭킹 조회", description="로그인한 유저의 해당 커뮤니티 내 순위를 가져옵니다.")
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def my_rank(self, request, pk=None):
+        try:
+            rank, count, member = CommunityService.get_member_rank(request.user, pk)
+        except Member.DoesNotExist:
+            return Response({"error": "가입하지 않은 커뮤니티입니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'rank': rank, 'count': count, 'member': MemberSerializer(member).data})
 
     # 수치의 전당 조회
     @action(detail=True, methods=['get'])
+    @community_condition('hall_of_shame', extra=shame_target_date)
     def hall_of_shame(self, request, pk=None):
-        shame_list = CommunityService.get_hall_of_shame(pk)
-        serializer = MemberSerializer(shame_list, many=True, context={'request': request})
-        return Response(serializer.data)
+        community = self.get_cached_community()
+
+        def build():
+            shame_list = CommunityService.get_hall_of_shame(community).only(*MemberRowSerializer.Meta.fields)
+            shame_list = self.project(shame_list, MemberRowSerializer)
+            serializer = MemberRowSerializer(shame_list, many=True, context={'request': request})
+            return {'community': dict(CommunitySerializer(community).data), 'results': list(serializer.data)}
+
+        if is_sparse(request):
+            return Response(build())
+        # 기준 날짜가 바뀌면(마감이 지나면) 다른 항목으로 캐시
+        target_date = CommunityService.get_shame_target_date(community)
+        return Response(caching.get_or_compute('hall_of_shame', community.pk, build, params=[target_date]))
 
-class MemberViewSet(viewsets.ModelViewSet):
+    def get_cached_community(self):
+        """URL의 커뮤니티 (커뮤니티 캐시에서 조회, 수정/삭제되면 버전이 바뀜)"""
+        try:
+            pk = uuid.UUID(str(self.kwargs['pk']))
+        except ValueError:
+            raise Http404
+        return cached_community(pk)
+
+class MemberViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
     
@@ -188,28 +320,40 @@ class MemberViewSet(viewsets.ModelViewSet):
     @extend_schema(
         summary="커뮤니티 멤버 목록 조회",
         description="com_uuid를 사용하여 해당 커뮤니티의 멤버 리스트를 가져옵니다.",
-        parameters=[OpenApiParameter(name='com_uuid', description='커뮤니티의 고유 UUID (PK)', required=False, type=str)],
-        responses={200: MemberSerializer(many=True)}
+        parameters=[
+            OpenApiParameter(name='com_uuid', description='커뮤니티의 고유 UUID (PK)', required=False, type=str),
+            *CURSOR_PARAMETERS,
+        ],
+        responses={200: MemberRowSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
+    @community_condition('members')
     def get_members(self, request):
         com_uuid = request.query_params.get('com_uuid')
         # com_id = request.query_params.get('com_id') # 텍스트 ID
 
         if com_uuid:
             try:
-                members = Member.objects.filter(com_uuid=com_uuid)
-            except Community.DoesNotExist:
+                community = Community.objects.get(pk=com_uuid)
+            except (Community.DoesNotExist, ValidationError):
                 return Response({"error": "해당 커뮤니티를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+            members = Member.objects.filter(com_uuid=community).only(*MemberRowSerializer.Meta.fields)
+            members = self.project(members, MemberRowSerializer, also=['joined_at'])
         else:
             return Response({"error": "com_uuid가 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = MemberSerializer(members, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # 가입 순으로 커서 페이지네이션 (커뮤니티 정보는 최상단에 한 번만)
+        page, cursors = KeysetPagination('joined_at', order='asc').paginate(request, members)
+        serializer = MemberRowSerializer(page, many=True, context={'request': request})
+        return Response({
+            'community': CommunitySerializer(community).data,
+            'results': serializer.data,
+            **cursors
+        }, status=status.HTTP_200_OK)
     
 
 # 4. 포스트 관리
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -233,26 +377,46 @@ class PostViewSet(viewsets.ModelViewSet):
         if not com_uuid:
             return Response({"error": "com_uuid 파라미터가 필요합니다."}, status=400)
         
-        today = timezone.now().date()
-        
-        # 1. 오늘 나의 인증 여부 확인 (Service 호출)
-        has_certified = PostService.is_user_certified_today(request.user, com_uuid)
-        
-        # 2. 오늘자 포스트 쿼리
-        posts = Post.objects.filter(com_uuid=com_uuid, created_at__date=today)
-        serializer = self.get_serializer(posts, many=True)
-        data = serializer.data
-        
-        # 3. 미인증 시 타인의 이미지를 마스킹(Blur) 처리
-        if not has_certified:
-            MASKED_URL = "https://storage.googleapis.com/madcamp-w2-storage/blur.jpg" # "https://your-s3-bucket.com/static/blurred-placeholder.png"
-            for p in data:
-                # '내 글'이 아닌 경우에만 마스킹 처리
-                # Serializer outputs 'user_id' (UUID) for the ForeignKey
-                if str(p['user_id']) != str(request.user.user_id):
-                    p['image_url'] = MASKED_URL
-                    
-        return Response(data)
+        try:
+            com_uuid = uuid.UUID(com_uuid)
+        except ValueError:
+            return Response({"error": "잘못된 com_uuid입니다."}, status=400)
+
+        if is_sparse(request):
+            # 1. 오늘자 포스트 + 나의 오늘 인증 여부 + 작성자 닉네임을 한 번에 조회
+            posts = self.project(PostService.get_today_feed(request.user, com_uuid))
+
+            # 2. 미인증 시 타인의 사진은 직렬화 단계에서 블러 미리보기로 대체
+            #    (아직 변환 전인 포스트는 공용 블러 이미지, 변환본 URL은 숨김)
+            serializer = self.get_serializer(posts, many=True)
+            return Response(serializer.data)
+
+        # 기본 응답: 커뮤니티 캐시에 블러 없이 저장해 두고 보는 사람에 맞춰 블러 적용
+        entries = caching.get_or_compute(
+            'feed', com_uuid,
+            lambda: FeedPostSerializer.cache_entries(
+                PostService.get_today_feed(None, com_uuid), self.get_serializer_context()
+            ),
+            params=[timezone.now().date()]
+        )
+        return Response(FeedPostSerializer.mask_entries(entries, request.user))
+
+    # 1-1. 내가 가입한 모든 커뮤니티의 오늘자 포스트
+    @extend_schema(
+        summary="내 전체 커뮤니티 오늘자 피드",
+        description="가입한 모든 커뮤니티의 오늘 포스트를 최신순으로 한 번에 가져옵니다. 커뮤니티별로 내가 인증하지 않았다면 타인의 사진은 블러 처리됩니다.",
+        parameters=CURSOR_PARAMETERS,
+        responses={200: FeedPostSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], url_path='my-feed', permission_classes=[IsAuthenticated])
+    def my_feed(self, request):
+        communities, posts = PostService.get_my_feed(request.user)
+        posts = self.project(posts, also=['created_at'])
+
+        # 커뮤니티 구분 없이 최신순 커서 페이지네이션
+        page, cursors = KeysetPagination('created_at', order='desc').paginate(request, posts)
+        serializer = self.get_serializer(page, many=True)
+        return Response({'communities': communities, 'results': serializer.data, **cursors})
 
     # 2. 인증하기 (사진 업로드)
     @extend_schema(
@@ -276,6 +440,7 @@ class PostViewSet(viewsets.ModelViewSet):
         },
         responses={201: PostSerializer}
     )
+    @idempotent
     def create(self, request):
         # 사진 업로드, 지각 체크, 점수 가중치 계산은 모두 Service에서 수행
         # 문자열 com_id로 uuid 조회
@@ -295,25 +460,67 @@ class PostViewSet(viewsets.ModelViewSet):
         )
         return Response(PostSerializer(post).data, status=status.HTTP_201_CREATED)
 
+    # 2-1. 인증하기 (업로드 티켓으로 직접 올린 사진 확정)
+    @extend_schema(
+        summary="인증 사진 업로드 확정",
+        description="/uploads/ticket/ 으로 받은 URL에 사진을 직접 올린 뒤, 티켓 토큰으로 인증을 완료합니다.",
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'com_uuid': {'type': 'string', 'format': 'uuid'},
+                    'token': {'type': 'string', 'description': 'kind=post 업로드 티켓 토큰'},
+                    'latitude': {'type': 'number', 'format': 'double'},
+                    'longitude': {'type': 'number', 'format': 'double'},
+                },
+                'required': ['com_uuid', 'token']
+            }
+        },
+        responses={201: PostSerializer}
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, FormParser, MultiPartParser])
+    @idempotent
+    def confirm(self, request):
+        try:
+            community = Community.objects.get(com_uuid=request.data.get('com_uuid'))
+        except (Community.DoesNotExist, ValidationError, ValueError):
+            return Response({"error": "존재하지 않는 커뮤니티 UUID입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ticket = uploads.redeem_ticket(request.data.get('token', ''), request.user, 'post')
+        post = PostService.process_certification(
+            user=request.user,
+            com_id=community,
+            image=None,
+            latitude=request.data.get('latitude'),
+            longitude=request.data.get('longitude'),
+            uploaded_key=ticket['key'],
+            post_id=ticket['id']
+        )
+        return Response(PostSerializer(post).data, status=status.HTTP_201_CREATED)
+
     # 3. 나의 포스트 불러오기 (캘린더)
     def get_serializer_class(self):
         if self.action == 'my_history':
             return PostHistorySerializer
+        if self.action in ('list', 'my_feed'):
+            return FeedPostSerializer
         return PostSerializer
     
     @extend_schema(
         summary="내 전체 포스트 히스토리 조회",
         description="내가 모든 커뮤니티에 올린 글을 가져오며, 커뮤니티 이름(com_name)이 포함됩니다.",
+        parameters=CURSOR_PARAMETERS,
         responses={200: PostHistorySerializer(many=True)}
     )
     @action(detail=False, methods=['get'], url_path='my-history')
     def my_history(self, request):
-        posts = Post.objects.filter(user_id=request.user)\
-                    .select_related('com_uuid')\
-                    .order_by('-created_at')
-        serializer = self.get_serializer(posts, many=True)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        posts = Post.objects.filter(user_id=request.user).select_related('com_uuid')
+        posts = self.project(posts, also=['created_at'])
+        # 최신순, 커서 페이지네이션
+        page, cursors = KeysetPagination('created_at', order='desc').paginate(request, posts)
+        serializer = self.get_serializer(page, many=True)
+
+        return Response({'results': serializer.data, **cursors}, status=status.HTTP_200_OK)
         
     
     # 4. 포스트 삭제 (점수/카운트 복구 포함)
@@ -324,7 +531,7 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # 5. 채팅 관리
-class ChatViewSet(viewsets.ModelViewSet):
+class ChatViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Chat.objects.all()
     serializer_class = ChatSerializer
     
@@ -332,23 +539,88 @@ class ChatViewSet(viewsets.ModelViewSet):
         summary="채팅 내역 조회",
         description="특정 커뮤니티의 이전 대화 내역을 불러옵니다.",
         parameters=[
-            OpenApiParameter(name='com_uuid', type=str, location='query', required=True)
+            OpenApiParameter(name='com_uuid', type=str, location='query', required=True),
+            *CURSOR_PARAMETERS,
         ]
     )
     @action(detail=False, methods=['get'], url_path='chat_history')
+    @chat_condition
     def chat_history(self, request):
         com_uuid = request.query_params.get('com_uuid')
         
         if not com_uuid:
             return Response({"error": "com_uuid가 필요합니다."}, status=400)
 
-        # 해당 커뮤니티의 메시지를 최신순(또는 과거순)으로 정렬하여 가져옵니다.
-        messages = Chat.objects.filter(com_uuid=com_uuid).order_by('created_at')
-        
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
+        # 최근 메시지부터 커서로 끊어서 가져오고, 한 페이지 안에서는 시간순으로 정렬합니다.
+        messages = self.project(Chat.objects.filter(com_uuid=com_uuid), also=['created_at'])
+        page, cursors = KeysetPagination('created_at', order='asc').paginate(request, messages)
+
+        serializer = self.get_serializer(page, many=True)
+        return Response({'results': serializer.data, **cursors})
+    
+
+# 6. 업로드 티켓 (클라이언트 -> 스토리지 직접 업로드)
+class UploadViewSet(viewsets.ViewSet):
+    lookup_value_regex = '[^/]+'
+
+    @extend_schema(
+        summary="업로드 티켓 발급",
+        description="사진을 서버를 거치지 않고 스토리지에 직접 올릴 수 있는 서명된 URL을 발급합니다. "
+                    "업로드 후 /posts/confirm/ 또는 /communities/join_confirm/ 에 token을 보내 확정합니다.",
+        request={
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'kind': {'type': 'string', 'enum': list(uploads.UPLOAD_PREFIXES)},
+                    'filename': {'type': 'string', 'description': '확장자 판별용 (예: photo.jpg)'},
+                    'content_type': {'type': 'string', 'description': '기본값 image/jpeg'},
+                },
+                'required': ['kind']
+            }
+        }
+    )
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def ticket(self, request):
+        ticket = uploads.issue_ticket(
+            request,
+            kind=request.data.get('kind'),
+            filename=request.data.get('filename', ''),
+            content_type=request.data.get('content_type', 'image/jpeg')
+        )
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+    # 로컬 스토리지 백엔드(UPLOAD_BACKEND='local')일 때 GCS 대신 파일을 받는 엔드포인트
+    @extend_schema(exclude=True)
+    @action(detail=True, methods=['put'], url_path='local', url_name='local', permission_classes=[permissions.AllowAny])
+    def local(self, request, pk=None):
+        if settings.UPLOAD_BACKEND != 'local':
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        # 업로드 권한은 서명된 토큰 자체로 확인 (GCS 서명 URL과 동일)
+        ticket = uploads.read_ticket(pk)
+        if default_storage.exists(ticket['key']):
+            return Response({"error": "이미 업로드된 티켓입니다."}, status=status.HTTP_409_CONFLICT)
+
+        # 최대 크기 + 1바이트까지만 읽어 초과 여부를 판단 (Content-Length 없이 보내도 메모리에 다 올리지 않음)
+        max_bytes = settings.UPLOAD_MAX_BYTES
+        if int(request.META.get('CONTENT_LENGTH') or 0) > max_bytes:
+            return Response({"error": uploads.too_large_message()}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        body = request._request.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            return Response({"error": uploads.too_large_message()}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        default_storage.save(ticket['key'], ContentFile(body))
+        return Response(status=status.HTTP_200_OK)
     
 
+# 7. 운영 (관리자 전용)
+# 커뮤니티 캐시 적중/미스 횟수 (이 프로세스 기준)
+@extend_schema(summary="커뮤니티 캐시 통계", description="관리자 전용: 오늘자 피드/랭킹/수치의 전당 캐시의 적중/미스 횟수")
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    return Response(caching.stats())
+
+
 # 테스트 API
 @api_view(['GET'])
 def connection_test(request):
@@ -0,0 +1,60 @@
+# api/weekdays.py
+import datetime
+from django.db.models import F
+from django.db.models.lookups import GreaterThan
+
+# 인증 요일은 비트마스크로 저장합니다. (월=1, 화=2, 수=4, ... 일=64)
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+ALL_DAYS = (1 << len(WEEKDAYS)) - 1
+
+
+def _weekday(value):
+    """date/datetime이면 요일 번호, 숫자면 그대로 (월=0)"""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.weekday()
+    return int(value)
+
+
+def bit(value):
+    """요일(date 또는 0~6)의 비트"""
+    return 1 << _weekday(value)
+
+
+def to_mask(days):
+    """['Mon', 'wed'] -> 0b101 (대소문자 무시, 모르는 요일이면 ValueError)"""
+    names = [name.lower() for name in WEEKDAYS]
+    mask = 0
+    for day in days or []:
+        try:
+            mask |= 1 << names.index(str(day).strip().lower()[:3])
+        except ValueError:
+            raise ValueError(f"알 수 없는 요일입니다: {day}")
+    return mask
+
+
+def to_days(mask):
+    """0b101 -> ['Mon', 'Wed']"""
+    return [name for i, name in enumerate(WEEKDAYS) if (mask or 0) & (1 << i)]
+
+
+def is_cert_day(mask, value):
+    return bool((mask or 0) & bit(value))
+
+
+def previous_cert_day(mask, date, include_today=False):
+    """date 이전(include_today면 date 포함)의 가장 가까운 인증일, 인증 요일이 없으면 None"""
+    if not mask:
+        return None
+    for i in range(0 if include_today else 1, 8):
+        day = date - datetime.timedelta(days=i)
+        if is_cert_day(mask, day):
+            return day
+    return None
+
+
+def certifying_on(value):
+    """
+    요일(date 또는 0~6)이 인증 요일인 커뮤니티 조건 ((cert_mask & bit) > 0)
+    Community의 요일별 표현식 인덱스와 같은 식이라 인덱스를 탑니다.
+    """
+    return GreaterThan(F('cert_mask').bitand(bit(value)), 0)
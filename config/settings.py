@@ -193,11 +193,63 @@ SIMPLE_JWT = {
 }
 
 # Redis 등록을 위한 채널 레이어 설정
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379')  # 도커 서비스 이름인 'redis' 사용
+
+# 공유 캐시 (커뮤니티 캐시 버전, 랭킹 버전, 수치의 전당) : 여러 프로세스가 같은 값을 봐야 하므로 Redis 사용
+# 채널 레이어(0번 DB)와 키가 섞이지 않도록 1번 DB 사용 / DEBUG가 아니면 LocMemCache는 시스템 체크에서 거부됩니다.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"{REDIS_URL}/1",
+    }
+}
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [('redis', 6379)], # 도커 서비스 이름인 'redis' 사용
+            "hosts": [f"{REDIS_URL}/0"],
         },
     },
-}
\ No newline at end of file
+}
+# 자정 페널티 작업 설정
+# 커뮤니티를 PENALTY_BATCH_SIZE개씩 묶어 shard 단위 트랜잭션으로 처리합니다.
+PENALTY_POOL = os.getenv('PENALTY_POOL', 'thread')  # 'thread' 또는 'process'
+PENALTY_WORKERS = int(os.getenv('PENALTY_WORKERS', 4))
+PENALTY_BATCH_SIZE = int(os.getenv('PENALTY_BATCH_SIZE', 20))
+
+# 스케줄러 워커 리더 선출 설정 (run_scheduler)
+SCHEDULER_LOCK_ID = int(os.getenv('SCHEDULER_LOCK_ID', 20260120))       # Postgres advisory lock 키
+SCHEDULER_HEARTBEAT_SECONDS = int(os.getenv('SCHEDULER_HEARTBEAT_SECONDS', 10))
+
+# 수치의 전당 스냅샷 캐시 유지 시간 (초)
+HALL_OF_SHAME_CACHE_SECONDS = 60 * 60
+
+# 업로드 이미지 변환(축소/EXIF 제거/썸네일/WebP) 워커 스레드 수
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+# 업로드 티켓 (클라이언트가 스토리지에 직접 업로드)
+# 'gcs': GCS 서명 URL 발급 / 'local': 서버의 /api/uploads/<token>/local/ 로 업로드 (로컬, 테스트용)
+UPLOAD_BACKEND = os.getenv('UPLOAD_BACKEND', 'gcs')
+UPLOAD_TICKET_SECONDS = 60 * 10
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 10 * 1024 * 1024))   # 직접 업로드 1건의 최대 크기
+
+# 재사용 인증 사진 탐지: 64bit dHash 사이 해밍 거리가 이 값 이하이면 같은 사진으로 판단
+PHASH_THRESHOLD = int(os.getenv('PHASH_THRESHOLD', 10))
+
+# Idempotency-Key 헤더 (인증/가입 재시도 중복 방지)
+IDEMPOTENCY_KEY_SECONDS = 60 * 60 * 24    # 처음 응답을 보관하는 시간
+IDEMPOTENCY_WAIT_SECONDS = 10             # 같은 키의 요청이 처리 중이면 기다리는 최대 시간
+IDEMPOTENCY_LOCK_SECONDS = 60 * 5         # 이 시간이 지나도 처리 중이면 중단된 요청으로 보고 다시 처리
+
+# 인증 마감 몇 분 전에 미인증 멤버에게 리마인더를 보낼지 (ws/notifications/)
+DEADLINE_REMINDER_MINUTES = int(os.getenv('DEADLINE_REMINDER_MINUTES', 30))
+
+# 커서 페이지네이션 (채팅 내역, 내 포스트, 멤버 목록)
+CURSOR_PAGE_SIZE = 50
+CURSOR_MAX_PAGE_SIZE = 200
+
+# 커뮤니티 단위 읽기 캐시 (오늘자 피드, 랭킹, 수치의 전당 / api/caching.py)
+COMMUNITY_CACHE_SECONDS = 60 * 5          # 버전이 바뀌지 않아도 이 시간이 지나면 다시 계산
+COMMUNITY_CACHE_LOCAL_ENTRIES = 512       # 프로세스 메모리에 보관할 최대 항목 수
+COMMUNITY_CACHE_WAIT_SECONDS = 3          # 같은 항목을 다른 요청이 계산 중일 때 기다리는 최대 시간